@@ -0,0 +1,18 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Performance benchmarks of PySemantic.
+
+The benchmarks are written in the style of asv, and can be run either by asv
+or by the runner of this package, from the root of the repository::
+
+    python -m benchmarks.run --output=before.json
+    # ...checkout another commit...
+    python -m benchmarks.run --output=after.json
+    python -m benchmarks.run compare before.json after.json
+"""
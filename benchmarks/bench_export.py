@@ -0,0 +1,53 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Benchmarks of exporting datasets."""
+
+import os.path as op
+
+from pysemantic import Project
+
+from benchmarks.datasets import DATA_DIR, make_dataset
+
+
+class ExportDataset(object):
+
+    """Export a cleaned dataset, whole or streamed in chunks."""
+
+    params = [["csv", "h5", "pscol", "partitioned"], [None, 10000]]
+    param_names = ["format", "chunksize"]
+
+    def setup(self, fmt, chunksize):
+        if fmt == "pscol" and chunksize is not None:
+            # Columnar stores cannot be appended to.
+            raise NotImplementedError
+        specs = make_dataset(100000, columns=10, rule_density=0.5)
+        if fmt == "partitioned":
+            specs['exporter'] = {'kind': "partitioned", 'by': ["col_2"],
+                                 'workers': 4}
+            self.outpath = op.join(DATA_DIR, "export_partitioned")
+        else:
+            self.outpath = op.join(DATA_DIR, "export." + fmt)
+        self.project = Project(schema={'bench': specs})
+        self.chunksize = chunksize
+        self.dframe = None
+        if chunksize is None:
+            # Streamed exports read the dataset as they go, whole exports
+            # are timed without loading it.
+            self.dframe = self.project.load_dataset("bench")
+
+    def export(self):
+        self.project.export_dataset("bench", dataframe=self.dframe,
+                                    outpath=self.outpath,
+                                    chunksize=self.chunksize)
+
+    def time_export_dataset(self, fmt, chunksize):
+        self.export()
+
+    def peakmem_export_dataset(self, fmt, chunksize):
+        self.export()
@@ -0,0 +1,103 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Benchmarks of parsing, cleaning and loading datasets."""
+
+import pandas as pd
+
+from pysemantic import Project
+from pysemantic.validator import DataFrameValidator
+
+from benchmarks.datasets import make_dataset
+
+
+class ParseDataset(object):
+
+    """Load a dataset without any column rules, i.e. mostly parse it."""
+
+    params = [[10000, 100000], ["csv", "tsv", "xlsx"], ["float", "mixed"]]
+    param_names = ["rows", "format", "dtypes"]
+
+    def setup(self, rows, fmt, dtype_mix):
+        if fmt == "xlsx" and rows > 10000:
+            # Writing and reading spreadsheets is too slow for this size.
+            raise NotImplementedError
+        specs = make_dataset(rows, columns=10, dtype_mix=dtype_mix,
+                             rule_density=0, fmt=fmt)
+        self.project = Project(schema={'bench': specs})
+
+    def time_load_dataset(self, rows, fmt, dtype_mix):
+        self.project.load_dataset("bench")
+
+    def peakmem_load_dataset(self, rows, fmt, dtype_mix):
+        self.project.load_dataset("bench")
+
+
+class CleanDataFrame(object):
+
+    """Enforce the column rules on a dataset that has already been parsed."""
+
+    params = [[10000, 100000], [0.0, 0.5, 1.0]]
+    param_names = ["rows", "rule_density"]
+
+    def setup(self, rows, rule_density):
+        specs = make_dataset(rows, columns=10, rule_density=rule_density)
+        self.dframe = pd.read_csv(specs['path'])
+        self.column_rules = specs['column_rules']
+
+    def time_clean(self, rows, rule_density):
+        DataFrameValidator(data=self.dframe.copy(),
+                           column_rules=self.column_rules).clean()
+
+    def peakmem_clean(self, rows, rule_density):
+        DataFrameValidator(data=self.dframe.copy(),
+                           column_rules=self.column_rules).clean()
+
+
+class LoadDataset(object):
+
+    """Parse and clean a dataset."""
+
+    params = [[10000, 100000], [0.0, 0.5, 1.0]]
+    param_names = ["rows", "rule_density"]
+
+    def setup(self, rows, rule_density):
+        specs = make_dataset(rows, columns=10, rule_density=rule_density)
+        self.project = Project(schema={'bench': specs})
+
+    def time_load_dataset(self, rows, rule_density):
+        self.project.load_dataset("bench")
+
+    def time_iter_dataset(self, rows, rule_density):
+        for _ in self.project.iter_dataset("bench", chunksize=rows // 10):
+            pass
+
+    def peakmem_iter_dataset(self, rows, rule_density):
+        for _ in self.project.iter_dataset("bench", chunksize=rows // 10):
+            pass
+
+
+class MultifileLoad(object):
+
+    """Load a dataset whose rows are split into several files."""
+
+    params = [[1, 4, 16], [1, 4]]
+    param_names = ["files", "workers"]
+
+    def setup(self, n_files, workers):
+        if n_files == 1 and workers > 1:
+            raise NotImplementedError
+        specs = make_dataset(100000, columns=10, n_files=n_files)
+        self.project = Project(schema={'bench': specs})
+        self.workers = workers
+
+    def time_load_dataset(self, n_files, workers):
+        self.project.load_dataset("bench", workers=self.workers)
+
+    def peakmem_load_dataset(self, n_files, workers):
+        self.project.load_dataset("bench", workers=self.workers)
@@ -0,0 +1,62 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Benchmarks of reading schema files and building projects.
+
+Creating a project does not build the schema validators of its datasets, so
+its cost should not grow with the number of datasets. Accessing a dataset
+builds only the validator of that dataset.
+"""
+
+import os.path as op
+
+from pysemantic import Project
+from pysemantic.specfile import read_specfile, write_specfile, \
+    invalidate_specfile
+
+from benchmarks.datasets import DATA_DIR, make_dataset
+
+
+def make_schema(n_datasets, specs):
+    """Get a schema of `n_datasets` datasets, all with the same specs."""
+    schema = {}
+    for i in xrange(n_datasets):
+        schema["dataset_{0}".format(i)] = dict(specs)
+    return schema
+
+
+class SpecLoading(object):
+
+    """Parse a schema file, and build a project from a schema."""
+
+    params = [10, 100, 1000]
+    param_names = ["datasets"]
+
+    def setup(self, n_datasets):
+        specs = make_dataset(100, columns=3, rule_density=1.0)
+        self.schema = make_schema(n_datasets, specs)
+        self.specfile = op.join(DATA_DIR,
+                                "schema_{0}.yaml".format(n_datasets))
+        if not op.exists(self.specfile):
+            write_specfile(self.specfile, self.schema)
+
+    def time_read_specfile(self, n_datasets):
+        invalidate_specfile(self.specfile)
+        read_specfile(self.specfile)
+
+    def time_read_specfile_cached(self, n_datasets):
+        read_specfile(self.specfile)
+
+    def time_project_init(self, n_datasets):
+        Project(schema=self.schema)
+
+    def time_first_dataset_specs(self, n_datasets):
+        Project(schema=self.schema).get_dataset_specs("dataset_0")
+
+    def peakmem_project_init(self, n_datasets):
+        Project(schema=self.schema)
@@ -0,0 +1,134 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Synthetic datasets for the benchmarks.
+
+Datasets are generated from a few parameters: the number of rows and columns,
+the mix of dtypes of the columns, the fraction of columns carrying column
+rules, the number of files the rows are split into and the file format. The
+generated files are kept in a temporary directory for the lifetime of the
+run, keyed by these parameters, so that benchmarks sharing a dataset, and the
+processes measuring peak memory, generate it only once.
+"""
+
+import os
+import atexit
+import shutil
+import tempfile
+import os.path as op
+
+import numpy as np
+import pandas as pd
+
+FORMATS = {'csv': ",", 'tsv': "\t", 'xlsx': None}
+DTYPE_MIXES = {'float': [float], 'int': [int], 'str': [str],
+               'mixed': [float, int, str]}
+CATEGORIES = ["alpha", "beta", "gamma", "delta"]
+
+# The runner passes its data directory to the processes measuring peak
+# memory through this environment variable.
+DATA_DIR_VAR = "PYSEMANTIC_BENCH_DATA"
+DATA_DIR = os.environ.get(DATA_DIR_VAR)
+if DATA_DIR is None:
+    DATA_DIR = tempfile.mkdtemp(prefix="pysemantic_bench_")
+    _owner = os.getpid()
+
+    @atexit.register
+    def _cleanup():
+        if os.getpid() == _owner:
+            shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+def get_dtypes(columns, dtype_mix="mixed"):
+    """Get the names and dtypes of the columns of a synthetic dataset, cycling
+    through the dtypes of the mix."""
+    mix = DTYPE_MIXES[dtype_mix]
+    return [("col_{0}".format(i), mix[i % len(mix)])
+            for i in xrange(columns)]
+
+
+def make_dataframe(rows, columns, dtype_mix="mixed", seed=0):
+    """Generate a dataframe of random values.
+
+    :param rows: Number of rows.
+    :param columns: Number of columns.
+    :param dtype_mix: Dtypes of the columns, one of ``float``, ``int``, \
+            ``str`` or ``mixed``.
+    :param seed: Seed of the random number generator.
+    :rtype: pandas.DataFrame
+    """
+    state = np.random.RandomState(seed)
+    data = {}
+    names = []
+    for name, dtype in get_dtypes(columns, dtype_mix):
+        if dtype is float:
+            data[name] = state.random_sample(rows) * 100
+        elif dtype is int:
+            data[name] = state.randint(0, 1000, size=rows)
+        else:
+            data[name] = np.array(CATEGORIES)[state.randint(0, 4, size=rows)]
+        names.append(name)
+    return pd.DataFrame(data, columns=names)
+
+
+def make_column_rules(columns, dtype_mix="mixed", rule_density=0.5):
+    """Get column rules for a fraction `rule_density` of the columns of a
+    synthetic dataset. Numerical columns get bounds, which reject about a
+    tenth of the rows, and string columns get a regex and unique values."""
+    rules = {}
+    dtypes = get_dtypes(columns, dtype_mix)
+    n_rules = int(round(rule_density * len(dtypes)))
+    for name, dtype in dtypes[:n_rules]:
+        if dtype is float:
+            rules[name] = {'min': 5.0, 'max': 95.0}
+        elif dtype is int:
+            rules[name] = {'min': 50, 'max': 950}
+        else:
+            rules[name] = {'regex': "^[a-z]+$", 'unique_values': CATEGORIES}
+    return rules
+
+
+def make_dataset(rows=10000, columns=10, dtype_mix="mixed", rule_density=0.5,
+                 n_files=1, fmt="csv"):
+    """Write a synthetic dataset, and get its schema.
+
+    :param rows: Total number of rows.
+    :param columns: Number of columns.
+    :param dtype_mix: Dtypes of the columns, one of ``float``, ``int``, \
+            ``str`` or ``mixed``.
+    :param rule_density: Fraction of the columns which have column rules.
+    :param n_files: Number of files the rows are split into.
+    :param fmt: Format of the files, one of ``csv``, ``tsv`` or ``xlsx``.
+    :return: The schema of the dataset.
+    :rtype: dict
+    """
+    key = "{0}_{1}_{2}_{3}".format(rows, columns, dtype_mix, n_files)
+    paths = []
+    dframe = None
+    for i in xrange(n_files):
+        path = op.join(DATA_DIR, "{0}_{1}.{2}".format(key, i, fmt))
+        if not op.exists(path):
+            if dframe is None:
+                dframe = make_dataframe(rows, columns, dtype_mix)
+            part = dframe.iloc[i * rows // n_files:(i + 1) * rows // n_files]
+            if fmt == "xlsx":
+                part.to_excel(path, sheet_name="dataset", index=False)
+            else:
+                part.to_csv(path, sep=FORMATS[fmt], index=False)
+        paths.append(path)
+    specs = {'path': paths if n_files > 1 else paths[0],
+             'dtypes': dict(get_dtypes(columns, dtype_mix)),
+             'column_rules': make_column_rules(columns, dtype_mix,
+                                               rule_density)}
+    if fmt == "xlsx":
+        specs['sheetname'] = "dataset"
+    else:
+        specs['delimiter'] = FORMATS[fmt]
+    if n_files > 1:
+        specs['nrows'] = [rows // n_files + 1] * n_files
+    return specs
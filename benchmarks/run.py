@@ -0,0 +1,310 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Run the benchmarks of PySemantic, and compare the results of two runs.
+This is run as ``python -m benchmarks.run`` from the root of the repository.
+
+Usage:
+  run [--bench=<regex>] [--repeat=<n>] [--output=<path>]
+  run compare BASELINE CONTENDER [--factor=<ratio>]
+  run peakmem NAME PARAMS
+
+Options:
+  -h --help            Show this screen
+  -b --bench=<regex>   Only run the benchmarks whose names match the regex
+  -r --repeat=<n>      Number of times each timing is repeated [default: 3]
+  -o --output=<path>   Results file, by default results/<commit>.json in the
+                       benchmarks directory
+  -f --factor=<ratio>  Ratio above which a difference is reported
+                       [default: 1.1]
+
+Benchmarks are the ``time_*`` and ``peakmem_*`` methods of the classes in the
+``bench_*`` modules of this package, following the conventions of asv: a
+class may define ``params`` and ``param_names``, in which case every method
+is run for every combination of the parameters, and ``setup`` and
+``teardown`` methods, which receive the parameters too. A ``setup`` raising
+NotImplementedError skips that combination.
+
+Timings are the best of ``--repeat`` calls, in seconds. Peak memory is the
+maximum resident set size, in bytes, of a fresh interpreter running ``setup``
+and then the benchmark once, or of the largest of its child processes. The
+``peakmem`` command runs such a benchmark, and is only used by the runner.
+
+Comparing two results files prints the benchmarks whose results differ by
+more than ``--factor``, and exits with a non-zero status if any of them got
+worse.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import inspect
+import platform
+import resource
+import itertools
+import importlib
+import subprocess
+import os.path as op
+
+import numpy as np
+import pandas as pd
+from docopt import docopt
+
+from benchmarks.datasets import DATA_DIR, DATA_DIR_VAR
+
+BENCH_DIR = op.dirname(op.abspath(__file__))
+
+
+def get_commit():
+    """Get the commit of the working tree, or None outside of a git
+    repository."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"],
+                                       cwd=BENCH_DIR,
+                                       stderr=open(os.devnull, "w")).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def discover(pattern=None):
+    """Find the benchmarks of the ``bench_*`` modules.
+
+    :param pattern: Regex which the names of the benchmarks must match.
+    :return: List of tuples of the name, the class and the method name of \
+            each benchmark.
+    :rtype: list
+    """
+    benchmarks = []
+    for filename in sorted(os.listdir(BENCH_DIR)):
+        if not (filename.startswith("bench_") and filename.endswith(".py")):
+            continue
+        module = importlib.import_module("benchmarks." + filename[:-3])
+        for clsname, cls in sorted(inspect.getmembers(module,
+                                                      inspect.isclass)):
+            if cls.__module__ != module.__name__:
+                continue
+            for attr in sorted(dir(cls)):
+                if not attr.startswith(("time_", "peakmem_")):
+                    continue
+                name = "{0}.{1}.{2}".format(filename[:-3], clsname, attr)
+                if pattern is None or re.search(pattern, name):
+                    benchmarks.append((name, cls, attr))
+    return benchmarks
+
+
+def get_param_sets(cls):
+    """Get all combinations of the parameters of a benchmark class."""
+    params = getattr(cls, "params", [])
+    if len(params) == 0:
+        return [()]
+    if not isinstance(params[0], list):
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def _setup(cls, params):
+    bench = cls()
+    if hasattr(bench, "setup"):
+        bench.setup(*params)
+    return bench
+
+
+def _teardown(bench, params):
+    if hasattr(bench, "teardown"):
+        bench.teardown(*params)
+
+
+def time_benchmark(cls, attr, params, repeat=3):
+    """Get the best time, in seconds, of `repeat` calls of a benchmark, or
+    None if it is skipped for these parameters."""
+    try:
+        bench = _setup(cls, params)
+    except NotImplementedError:
+        return None
+    try:
+        method = getattr(bench, attr)
+        times = []
+        for _ in xrange(repeat):
+            start = time.time()
+            method(*params)
+            times.append(time.time() - start)
+        return min(times)
+    finally:
+        _teardown(bench, params)
+
+
+def _measure_peakmem(name, params):
+    """Run a peak memory benchmark in this process, and get the peak memory
+    of the process, in bytes."""
+    benchmarks = discover("^{0}$".format(re.escape(name)))
+    if len(benchmarks) != 1:
+        raise ValueError("Unknown benchmark {0}".format(name))
+    _, cls, attr = benchmarks[0]
+    bench = _setup(cls, params)
+    getattr(bench, attr)(*params)
+    _teardown(bench, params)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if sys.platform == "darwin":
+        # ru_maxrss is in bytes on OS X.
+        return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   children)
+    # On Linux, ru_maxrss is in kilobytes, and is inherited across exec
+    # from the runner, so the high water mark of this process is read from
+    # /proc instead.
+    with open("/proc/self/status", "r") as fid:
+        for line in fid:
+            if line.startswith("VmHWM:"):
+                return max(int(line.split()[1]), children) * 1024
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               children) * 1024
+
+
+def peakmem_benchmark(name, cls, params):
+    """Get the peak memory, in bytes, of a fresh process running a
+    benchmark, or None if it is skipped for these parameters."""
+    # Generate the data of the benchmark here, so that it is not accounted
+    # for in the peak memory.
+    try:
+        _teardown(_setup(cls, params), params)
+    except NotImplementedError:
+        return None
+    env = dict(os.environ)
+    env[DATA_DIR_VAR] = DATA_DIR
+    process = subprocess.Popen([sys.executable, "-m", "benchmarks.run",
+                                "peakmem", name, json.dumps(list(params))],
+                               cwd=op.dirname(BENCH_DIR), env=env,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    stdout, stderr = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(stderr.strip().splitlines()[-1] if stderr
+                           else "exit status {0}".format(process.returncode))
+    return int(stdout.strip().splitlines()[-1])
+
+
+def run(pattern=None, repeat=3):
+    """Run the benchmarks.
+
+    :param pattern: Regex which the names of the benchmarks must match.
+    :param repeat: Number of times each timing is repeated.
+    :return: The results, along with the commit and the environment they \
+            were obtained in.
+    :rtype: dict
+    """
+    results = {}
+    for name, cls, attr in discover(pattern):
+        is_time = attr.startswith("time_")
+        entries = []
+        for params in get_param_sets(cls):
+            entry = {'params': list(params), 'value': None, 'error': None}
+            try:
+                if is_time:
+                    entry['value'] = time_benchmark(cls, attr, params, repeat)
+                else:
+                    entry['value'] = peakmem_benchmark(name, cls, params)
+            except Exception as exc:
+                entry['error'] = "{0}: {1}".format(type(exc).__name__, exc)
+            entries.append(entry)
+            print "{0}{1}: {2}".format(name, list(params), _format(
+                entry['value'], is_time) if entry['error'] is None
+                else entry['error'])
+            sys.stdout.flush()
+        results[name] = {'param_names': getattr(cls, "param_names", []),
+                         'unit': "seconds" if is_time else "bytes",
+                         'results': entries}
+    return {'commit': get_commit(),
+            'date': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'machine': {'node': platform.node(),
+                        'processor': platform.processor(),
+                        'system': platform.platform(),
+                        'cpus': os.sysconf("SC_NPROCESSORS_ONLN")},
+            'versions': {'python': platform.python_version(),
+                         'numpy': np.__version__,
+                         'pandas': pd.__version__},
+            'benchmarks': results}
+
+
+def _format(value, is_time):
+    if value is None:
+        return "skipped"
+    if is_time:
+        return "{0:.2f} ms".format(value * 1000)
+    return "{0:.1f} MB".format(value / 2.0 ** 20)
+
+
+def _flatten(results):
+    flat = {}
+    for name, bench in results['benchmarks'].iteritems():
+        for entry in bench['results']:
+            if entry['value'] is not None:
+                key = (name, json.dumps(entry['params']))
+                flat[key] = entry['value'], bench['unit']
+    return flat
+
+
+def compare(baseline, contender, factor=1.1):
+    """Compare the results of two runs.
+
+    :param baseline: Results of the reference run.
+    :param contender: Results of the run to compare with the reference.
+    :param factor: Ratio of the results above which a benchmark is reported.
+    :return: List of tuples of the name and parameters of the benchmarks \
+            whose results differ by more than `factor`, the two results, \
+            and their ratio, worst first.
+    :rtype: list
+    """
+    before = _flatten(baseline)
+    after = _flatten(contender)
+    changes = []
+    for key in sorted(set(before) & set(after)):
+        old, new = before[key][0], after[key][0]
+        if old <= 0:
+            continue
+        ratio = new / float(old)
+        if ratio > factor or ratio < 1.0 / factor:
+            changes.append((key[0], json.loads(key[1]), old, new, ratio))
+    return sorted(changes, key=lambda change: -change[4])
+
+
+def main(arguments):
+    if arguments['peakmem']:
+        params = tuple(json.loads(arguments['PARAMS']))
+        print _measure_peakmem(arguments['NAME'], params)
+        return 0
+    if arguments['compare']:
+        with open(arguments['BASELINE'], "r") as fid:
+            baseline = json.load(fid)
+        with open(arguments['CONTENDER'], "r") as fid:
+            contender = json.load(fid)
+        factor = float(arguments['--factor'])
+        changes = compare(baseline, contender, factor)
+        for name, params, old, new, ratio in changes:
+            flag = "worse" if ratio > 1 else "better"
+            print "{0:>7} {1:>8.2f}x {2}{3}: {4:.4g} -> {5:.4g}".format(
+                flag, ratio, name, params, old, new)
+        if len(changes) == 0:
+            print "No benchmark changed by more than {0}x.".format(factor)
+        return int(any([change[4] > 1 for change in changes]))
+
+    results = run(arguments['--bench'], int(arguments['--repeat']))
+    outpath = arguments['--output']
+    if outpath is None:
+        outpath = op.join(BENCH_DIR, "results",
+                          "{0}.json".format(results['commit'] or "local"))
+    if not op.isdir(op.dirname(op.abspath(outpath))):
+        os.makedirs(op.dirname(op.abspath(outpath)))
+    with open(outpath, "w") as fid:
+        json.dump(results, fid, indent=2, sort_keys=True)
+    print "Results written to {0}".format(outpath)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(docopt(__doc__)))
@@ -0,0 +1,197 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Parquet and Feather files as datasets and export targets.
+
+Both formats store typed columns, so reading them involves no parsing of
+strings: only the selected columns are read from the file, numbers and
+timestamps are read as they were written, and categoricals are read back as
+categoricals. Files are read and written with the ``pyarrow`` package, which
+is only imported when such a file is used.
+
+The format of a file is identified by its extension: ``.parquet`` or ``.pq``
+for Parquet, and ``.feather`` for Feather.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+FORMATS = {'parquet': (".parquet", ".pq"), 'feather': (".feather",)}
+logger = logging.getLogger(__name__)
+
+
+def get_arrow_format(path):
+    """Get the format of a Parquet or Feather file from its extension.
+
+    :param path: Path to the file.
+    :return: ``"parquet"``, ``"feather"``, or None if the path refers to \
+            neither.
+    :rtype: str
+    """
+    if not isinstance(path, basestring):
+        return None
+    for fmt, extensions in FORMATS.iteritems():
+        if path.lower().endswith(extensions):
+            return fmt
+    return None
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.feather
+    except ImportError:
+        raise ImportError("Reading and writing Parquet and Feather files "
+                          "requires the pyarrow package.")
+    return pyarrow
+
+
+def _read_table(path, columns=None):
+    """Read the given columns of a Parquet or Feather file as an arrow
+    table."""
+    pa = _import_pyarrow()
+    if get_arrow_format(path) == "parquet":
+        return pa.parquet.read_table(path, columns=columns)
+    return pa.feather.read_table(path, columns=columns, memory_map=True)
+
+
+def arrow_colnames(path):
+    """Get the names of the columns of a Parquet or Feather file, without
+    reading the columns themselves.
+
+    :param path: Path to the file.
+    :type path: str
+    :rtype: list
+    """
+    pa = _import_pyarrow()
+    if get_arrow_format(path) == "parquet":
+        schema = pa.parquet.read_schema(path)
+    else:
+        # The file is memory-mapped, so only its metadata is paged in.
+        schema = pa.feather.read_table(path, memory_map=True).schema
+    return [name for name in schema.names if not name.startswith("__")]
+
+
+def _is_string_dtype(dtype):
+    return dtype in (str, unicode, object, "str", "object")
+
+
+def _cast(dataframe, dtype):
+    """Cast the columns of a dataframe to their declared dtypes where they
+    differ. Strings are never parsed, a column that cannot be cast is left
+    as it was read."""
+    for colname, coltype in dtype.iteritems():
+        if colname not in dataframe:
+            continue
+        series = dataframe[colname]
+        if coltype == "category":
+            if series.dtype.name != "category":
+                dataframe[colname] = series.astype("category")
+            continue
+        if _is_string_dtype(coltype):
+            # Strings are read as objects, or as categoricals if they were
+            # written as such, which is kept.
+            if series.dtype.name in ("object", "category"):
+                continue
+        elif series.dtype == np.dtype(coltype):
+            continue
+        try:
+            dataframe[colname] = series.astype(coltype)
+        except (TypeError, ValueError) as exc:
+            logger.warn("The column {0} could not be cast to {1}: "
+                        "{2}".format(colname, coltype, exc))
+    return dataframe
+
+
+def read_arrow(filepath_or_buffer, usecols=None, exclude_columns=None,
+               dtype=None, nrows=None, skiprows=None, **kwargs):
+    """Read a Parquet or Feather file into a dataframe. The arguments are
+    named after the ones of ``pandas.read_csv``, so that this can be used as
+    the parser of a dataset. Other parser arguments do not apply to typed
+    columns, and are ignored.
+
+    :param filepath_or_buffer: Path to the file.
+    :param usecols: Names of the columns to read. If None (default), all \
+            columns are read.
+    :param exclude_columns: Names of the columns not to read.
+    :param dtype: Dictionary mapping column names to their declared dtypes, \
+            to which the columns are cast if they were written with another \
+            dtype.
+    :param nrows: Number of rows to read. If None (default), all rows are \
+            read.
+    :param skiprows: Number of rows to skip at the beginning of the file.
+    :type filepath_or_buffer: str
+    :type usecols: list
+    :type exclude_columns: list
+    :type dtype: dict
+    :type nrows: int
+    :type skiprows: int
+    :return: The dataset.
+    :rtype: pandas.DataFrame
+    """
+    ignored = [key for key in kwargs if key not in ("error_bad_lines",)]
+    if len(ignored) > 0:
+        logger.info("Ignoring the parser arguments {0} for the file "
+                    "{1}".format(ignored, filepath_or_buffer))
+    columns = usecols
+    if exclude_columns:
+        if columns is None:
+            columns = arrow_colnames(filepath_or_buffer)
+        columns = [col for col in columns if col not in exclude_columns]
+    table = _read_table(filepath_or_buffer, columns=columns)
+    if skiprows or nrows is not None:
+        # Slicing the table is zero-copy, so only the selected rows are
+        # converted.
+        offset = skiprows or 0
+        length = table.num_rows - offset if nrows is None else nrows
+        table = table.slice(offset, length)
+    dataframe = table.to_pandas()
+    if columns is not None:
+        dataframe = dataframe[columns]
+    if dtype:
+        dataframe = _cast(dataframe, dtype)
+    return dataframe
+
+
+def write_arrow(dataframe, path):
+    """Write a dataframe to a Parquet or Feather file, depending on the
+    extension of `path`. The index of the dataframe is not written.
+
+    :param dataframe: The dataframe to write. For Parquet files, this can \
+            also be an iterable of dataframes with the same columns and \
+            dtypes, which are appended to the file one after the other.
+    :param path: Path to the file.
+    :type path: str
+    """
+    pa = _import_pyarrow()
+    if isinstance(dataframe, pd.DataFrame):
+        chunks = [dataframe]
+    else:
+        chunks = dataframe
+    if get_arrow_format(path) == "feather":
+        chunks = list(chunks)
+        if len(chunks) > 1:
+            dataframe = pd.concat(chunks, axis=0)
+        else:
+            dataframe = chunks[0]
+        table = pa.Table.from_pandas(dataframe, preserve_index=False)
+        pa.feather.write_feather(table, path)
+        return
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pa.parquet.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
@@ -0,0 +1,269 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Caches for cleaned datasets."""
+
+import os
+import os.path as op
+import glob
+import json
+import hashlib
+import logging
+import tempfile
+import warnings
+import threading
+from types import CodeType
+from collections import OrderedDict
+
+import pandas as pd
+
+from pysemantic.utils import TypeEncoder, get_hdf_format
+
+CACHE_DIR = op.join(op.expanduser("~"), ".pysemantic", "cache")
+logger = logging.getLogger(__name__)
+
+
+def get_files_fingerprint(paths):
+    """Get a fingerprint of the files containing a dataset, based on their
+    paths, sizes and modification times. The files are not read.
+
+    :param paths: Path or list of paths to the files.
+    :type paths: str or list
+    :return: List of (path, size, mtime) tuples.
+    :rtype: list
+    """
+    if not isinstance(paths, list):
+        paths = [paths]
+    fingerprint = []
+    for path in paths:
+        if isinstance(path, basestring) and op.exists(path):
+            stat = os.stat(path)
+            fingerprint.append((op.abspath(path), stat.st_size,
+                                stat.st_mtime))
+        else:
+            fingerprint.append((path, None, None))
+    return fingerprint
+
+
+def _get_code_hash(code):
+    """Get a SHA1 hex digest of the bytecode of a function, along with the
+    constants and the names it uses, including those of nested functions."""
+    parts = [code.co_code, repr(code.co_names)]
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            parts.append(_get_code_hash(const))
+        else:
+            parts.append(repr(const))
+    return hashlib.sha1("\0".join(parts)).hexdigest()
+
+
+class _KeyEncoder(TypeEncoder):
+
+    """JSON encoder of the objects making up a cache key. Functions are
+    identified by their code, default arguments and closures as well as by
+    their names, since e.g. all lambdas are named ``<lambda>``. Objects which
+    cannot be serialized are identified by their representation."""
+
+    def default(self, obj):
+        code = getattr(obj, "func_code", None)
+        if isinstance(code, CodeType):
+            closure = [cell.cell_contents for cell in obj.func_closure or []]
+            return {'name': TypeEncoder.default(self, obj),
+                    'code': _get_code_hash(code),
+                    'defaults': obj.func_defaults,
+                    'closure': [value for value in closure
+                                if value is not obj]}
+        try:
+            return TypeEncoder.default(self, obj)
+        except (TypeError, AttributeError):
+            return repr(obj)
+
+
+def get_hash(*objects):
+    """Get a SHA1 hex digest of JSON serializable objects. Types are
+    identified by their qualified names, and functions by their names and
+    their code.
+
+    :return: Hex digest of the objects.
+    :rtype: str
+    """
+    blob = json.dumps(objects, cls=_KeyEncoder, sort_keys=True)
+    return hashlib.sha1(blob).hexdigest()
+
+
+class DiskCache(object):
+
+    """Persistent cache of cleaned datasets, stored as HDF5 files.
+
+    Every entry is addressed by a prefix identifying the dataset, and a key
+    identifying the contents of the dataset, i.e. its source files and its
+    specifications. An entry for a changed file or specification is therefore
+    never found, and stale entries of a dataset can be removed by its prefix.
+    """
+
+    def __init__(self, cachedir=CACHE_DIR):
+        self.cachedir = cachedir
+
+    def _get_path(self, prefix, key):
+        return op.join(self.cachedir, "{0}_{1}.h5".format(prefix, key))
+
+    def get(self, prefix, key):
+        """Get a dataset from the cache.
+
+        :param prefix: Prefix identifying the dataset.
+        :param key: Key identifying the contents of the dataset.
+        :return: The cached dataframe, or None if it is not cached.
+        """
+        path = self._get_path(prefix, key)
+        if not op.isfile(path):
+            return None
+        try:
+            return pd.read_hdf(path, "data")
+        except Exception as exc:
+            logger.warn("Reading the cached dataset {0} failed: {1}".format(
+                                                                   path, exc))
+            return None
+
+    def set(self, prefix, key, dataframe):
+        """Write a dataset to the cache, replacing the older entries of the
+        dataset.
+
+        :param prefix: Prefix identifying the dataset.
+        :param key: Key identifying the contents of the dataset.
+        :param dataframe: The cleaned dataframe.
+        :return: True if the dataset was cached.
+        :rtype: bool
+        """
+        if not op.isdir(self.cachedir):
+            os.makedirs(self.cachedir)
+        fd, tmppath = tempfile.mkstemp(suffix=".part", dir=self.cachedir)
+        os.close(fd)
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                dataframe.to_hdf(tmppath, "data", mode="w",
+                                 format=get_hdf_format(dataframe))
+        except Exception as exc:
+            os.unlink(tmppath)
+            logger.warn("Caching the dataset failed: {0}".format(exc))
+            return False
+        self.invalidate(prefix)
+        os.rename(tmppath, self._get_path(prefix, key))
+        return True
+
+    def invalidate(self, prefix=None):
+        """Remove entries from the cache.
+
+        :param prefix: Prefix identifying the dataset whose entries are to be \
+                removed. If None (default), the whole cache is cleared.
+        """
+        pattern = "*.h5" if prefix is None else "{0}_*.h5".format(prefix)
+        for path in glob.glob(op.join(self.cachedir, pattern)):
+            os.unlink(path)
+
+
+class MemoryCache(object):
+
+    """In-memory LRU cache of cleaned datasets, bounded by the total memory
+    used by the cached dataframes.
+
+    Dataframes are copied both when they are cached and when they are
+    retrieved, so modifying a dataframe returned by the cache does not affect
+    the cached copy. A dataframe can be cached along with a version, like the
+    hash of the specifications it was cleaned with, so that it is not
+    returned for another version.
+    """
+
+    def __init__(self, max_size=0):
+        """Create an empty cache.
+
+        :param max_size: Maximum number of bytes that the cached dataframes \
+                may use. If 0 (default), nothing is cached.
+        """
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version=None):
+        """Get a dataframe from the cache, marking it as recently used.
+
+        :param key: Key of the dataframe.
+        :param version: Version of the dataframe. A dataframe cached with \
+                another version is removed from the cache.
+        :return: Copy of the cached dataframe, or None if it is not cached.
+        """
+        with self._lock:
+            if key in self._entries and self._entries[key][2] != version:
+                self._pop(key)
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry = self._entries.pop(key)
+            self._entries[key] = entry
+        return entry[0].copy()
+
+    def set(self, key, dataframe, version=None):
+        """Cache a copy of a dataframe, evicting the least recently used
+        dataframes until the cache fits in its size.
+
+        :param key: Key of the dataframe.
+        :param dataframe: The dataframe to cache.
+        :param version: Version of the dataframe.
+        :return: True if the dataframe was cached.
+        :rtype: bool
+        """
+        if self.max_size <= 0:
+            return False
+        nbytes = dataframe.memory_usage(deep=True).sum()
+        if nbytes > self.max_size:
+            logger.info("Not caching dataframe of {0} bytes in memory, since "
+                        "it exceeds the size of the cache.".format(nbytes))
+            return False
+        dataframe = dataframe.copy()
+        with self._lock:
+            self._pop(key)
+            while self.size + nbytes > self.max_size:
+                self._pop(next(iter(self._entries)))
+            self._entries[key] = dataframe, nbytes, version
+            self.size += nbytes
+        return True
+
+    def invalidate(self, key=None):
+        """Remove dataframes from the cache.
+
+        :param key: Key of the dataframe to remove. If None (default), the \
+                cache is cleared.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self.size = 0
+            else:
+                self._pop(key)
+
+    def info(self):
+        """Get the statistics of the cache.
+
+        :return: Dictionary containing the number of hits and misses, the \
+                current and maximum size in bytes and the cached keys, from \
+                the least to the most recently used.
+        :rtype: dict
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': self.size, 'max_size': self.max_size,
+                    'keys': self._entries.keys()}
+
+    def _pop(self, key):
+        if key in self._entries:
+            _, nbytes, _ = self._entries.pop(key)
+            self.size -= nbytes
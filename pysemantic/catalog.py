@@ -0,0 +1,294 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Persistent catalog of projects and datasets.
+
+The catalog is a SQLite database kept next to the pysemantic configuration
+file, named ``.<configuration file name>.catalog``. It indexes the projects
+registered in the configuration file, and the names, paths, file sizes and
+last known number of rows of their datasets, so that listing them does not
+require parsing every schema file.
+
+The catalog is refreshed incrementally whenever it is read: the configuration
+file is parsed again only if it has changed, and only the schema files that
+have changed since they were last indexed are parsed again. Both are
+identified by their modification time and size.
+"""
+
+import os
+import os.path as op
+import json
+import sqlite3
+import logging
+import threading
+from ConfigParser import RawConfigParser
+
+from pysemantic.specfile import read_specfile
+
+SCHEMA_VERSION = 1
+logger = logging.getLogger(__name__)
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+_TABLES = """
+CREATE TABLE IF NOT EXISTS configs (
+    path TEXT PRIMARY KEY, mtime REAL, size INTEGER);
+CREATE TABLE IF NOT EXISTS projects (
+    name TEXT PRIMARY KEY, specfile TEXT, position INTEGER, mtime REAL,
+    size INTEGER);
+CREATE TABLE IF NOT EXISTS datasets (
+    project TEXT, name TEXT, path TEXT, file_size INTEGER, nrows INTEGER,
+    PRIMARY KEY (project, name));
+"""
+
+
+def get_catalog_path(config_path):
+    """Get the path of the catalog of a configuration file.
+
+    :param config_path: Path to the pysemantic configuration file.
+    :type config_path: str
+    :rtype: str
+    """
+    dirname, basename = op.split(op.abspath(config_path))
+    return op.join(dirname, ".{0}.catalog".format(basename))
+
+
+def get_catalog(config_path):
+    """Get the catalog of a configuration file. Catalogs are opened once per
+    process, and opened again if their file has been removed.
+
+    :param config_path: Path to the pysemantic configuration file.
+    :type config_path: str
+    :rtype: Catalog
+    """
+    config_path = op.abspath(config_path)
+    with _catalogs_lock:
+        catalog = _catalogs.get(config_path)
+        if catalog is None or catalog.is_stale():
+            catalog = _catalogs[config_path] = Catalog(config_path)
+    return catalog
+
+
+def _stat(path):
+    """Get the (mtime, size) of a file, or (None, None) if it doesn't
+    exist."""
+    if not op.isfile(path):
+        return None, None
+    stat = os.stat(path)
+    return stat.st_mtime, stat.st_size
+
+
+def _get_inode(path):
+    return os.stat(path).st_ino if op.exists(path) else None
+
+
+def _to_str(value):
+    """Strings read from the catalog are unicode, convert them back to str
+    where possible."""
+    if isinstance(value, list):
+        return [_to_str(item) for item in value]
+    if isinstance(value, unicode):
+        try:
+            return value.encode("ascii")
+        except UnicodeEncodeError:
+            pass
+    return value
+
+
+def _get_files_size(paths):
+    """Get the total size of the existing files among `paths`."""
+    if not isinstance(paths, list):
+        paths = [paths]
+    return sum([os.stat(path).st_size for path in paths
+                if isinstance(path, basestring) and op.isfile(path)])
+
+
+class Catalog(object):
+
+    """SQLite catalog of the projects of a configuration file."""
+
+    def __init__(self, config_path):
+        """Open the catalog of a configuration file, creating it if needed.
+        If the catalog cannot be written next to the configuration file, it
+        is kept in memory for the lifetime of the process.
+
+        :param config_path: Path to the pysemantic configuration file.
+        :type config_path: str
+        """
+        self.config_path = config_path
+        self.path = get_catalog_path(config_path)
+        self._lock = threading.Lock()
+        try:
+            self._conn = self._connect(self.path)
+        except sqlite3.Error as exc:
+            logger.warn("Opening the catalog {0} failed: {1}. Keeping the "
+                        "catalog in memory.".format(self.path, exc))
+            self.path = ":memory:"
+            self._conn = self._connect(self.path)
+        self._inode = _get_inode(self.path)
+
+    def is_stale(self):
+        """Check if the file of the catalog has been removed or replaced since
+        it was opened."""
+        if self.path == ":memory:":
+            return False
+        return _get_inode(self.path) != self._inode
+
+    def _connect(self, path):
+        conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            conn.executescript("DROP TABLE IF EXISTS configs;"
+                               "DROP TABLE IF EXISTS projects;"
+                               "DROP TABLE IF EXISTS datasets;")
+            conn.execute("PRAGMA user_version = {0}".format(SCHEMA_VERSION))
+        conn.executescript(_TABLES)
+        conn.commit()
+        return conn
+
+
+    def refresh(self):
+        """Index the configuration file and the schema files that have
+        changed since they were last indexed."""
+        with self._lock:
+            try:
+                self._refresh()
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def _refresh(self):
+        stat = _stat(self.config_path)
+        row = self._conn.execute("SELECT mtime, size FROM configs WHERE "
+                                 "path = ?", (self.config_path,)).fetchone()
+        if row is None or tuple(row) != stat:
+            self._index_config(stat)
+        for project, specfile, mtime, size in self._conn.execute(
+                "SELECT name, specfile, mtime, size FROM projects").fetchall():
+            if (mtime, size) != _stat(specfile):
+                self._index_specfile(project, specfile)
+
+    def _index_config(self, stat):
+        """Index the projects in the configuration file. The datasets of the
+        projects whose schema file hasn't changed are kept."""
+        logger.info("Indexing projects in {0}".format(self.config_path))
+        known = {}
+        for name, specfile, mtime, size in self._conn.execute(
+                "SELECT name, specfile, mtime, size FROM projects"):
+            known[name] = specfile, mtime, size
+        parser = RawConfigParser()
+        parser.read(self.config_path)
+        projects = []
+        for i, name in enumerate(parser.sections()):
+            specfile = parser.get(name, "specfile")
+            mtime, size = None, None
+            if known.get(name, (None,))[0] == specfile:
+                mtime, size = known[name][1:]
+            projects.append((name, specfile, i, mtime, size))
+        self._conn.execute("DELETE FROM projects")
+        self._conn.executemany("INSERT INTO projects VALUES (?, ?, ?, ?, ?)",
+                               projects)
+        self._conn.execute("DELETE FROM datasets WHERE project NOT IN "
+                           "(SELECT name FROM projects)")
+        self._conn.execute("INSERT OR REPLACE INTO configs VALUES (?, ?, ?)",
+                           (self.config_path,) + stat)
+
+    def _index_specfile(self, project, specfile):
+        """Index the datasets of a project, keeping the known number of rows
+        of the datasets whose files haven't changed."""
+        logger.info("Indexing datasets of project {0} in {1}".format(project,
+                                                                   specfile))
+        known = {}
+        for name, path, size, nrows in self._conn.execute(
+                "SELECT name, path, file_size, nrows FROM datasets WHERE "
+                "project = ?", (project,)):
+            known[name] = path, size, nrows
+        stat = _stat(specfile)
+        if op.isfile(specfile):
+            specs = read_specfile(specfile)
+        else:
+            specs = {}
+        rows = []
+        for name, dataset_specs in specs.iteritems():
+            path = json.dumps(dataset_specs.get('path'))
+            size = _get_files_size(dataset_specs.get('path', []))
+            nrows = None
+            if known.get(name, (None, None, None))[:2] == (path, size):
+                nrows = known[name][2]
+            rows.append((project, name, path, size, nrows))
+        self._conn.execute("DELETE FROM datasets WHERE project = ?",
+                           (project,))
+        self._conn.executemany("INSERT INTO datasets VALUES (?, ?, ?, ?, ?)",
+                               rows)
+        self._conn.execute("UPDATE projects SET mtime = ?, size = ? WHERE "
+                           "name = ?", stat + (project,))
+
+    def get_projects(self):
+        """Get the projects in the configuration file, in the order in which
+        they appear.
+
+        :return: List of tuples, such that each tuple is (project_name, \
+                location_of_specfile)
+        :rtype: list
+        """
+        self.refresh()
+        with self._lock:
+            rows = self._conn.execute("SELECT name, specfile FROM projects "
+                                      "ORDER BY position").fetchall()
+        return [(_to_str(name), _to_str(specfile)) for name, specfile in rows]
+
+    def get_datasets(self, project_name):
+        """Get the datasets of a project.
+
+        :param project_name: Name of the project.
+        :type project_name: str
+        :return: List of dictionaries containing the name, the path, the \
+                total size of the files in bytes and the last known number \
+                of rows (None if unknown) of each dataset.
+        :rtype: list
+        """
+        self.refresh()
+        with self._lock:
+            rows = self._conn.execute("SELECT name, path, file_size, nrows "
+                                      "FROM datasets WHERE project = ? ORDER "
+                                      "BY name", (project_name,)).fetchall()
+        return [{'name': _to_str(name), 'path': _to_str(json.loads(path)),
+                 'size': size, 'nrows': nrows}
+                for name, path, size, nrows in rows]
+
+    def set_nrows(self, project_name, dataset_name, nrows, size=None):
+        """Record the number of rows of a dataset, when it has been loaded.
+
+        :param project_name: Name of the project.
+        :param dataset_name: Name of the dataset.
+        :param nrows: Number of rows in the dataset.
+        :param size: Total size of the files of the dataset in bytes. If \
+                None (default), the indexed size is kept.
+        :type project_name: str
+        :type dataset_name: str
+        :type nrows: int
+        :type size: int
+        """
+        args = (nrows, size, project_name, dataset_name)
+        # The catalog is only refreshed if the dataset hasn't been indexed
+        # yet, so that recording the size of a dataset doesn't check every
+        # schema file.
+        if not self._update_nrows(args):
+            self.refresh()
+            self._update_nrows(args)
+
+    def _update_nrows(self, args):
+        with self._lock:
+            cursor = self._conn.execute("UPDATE datasets SET nrows = ?, "
+                                        "file_size = coalesce(?, file_size) "
+                                        "WHERE project = ? AND name = ?",
+                                        args)
+            self._conn.commit()
+        return cursor.rowcount > 0
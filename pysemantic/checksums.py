@@ -0,0 +1,250 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Checksums of dataset files.
+
+Files are hashed in fixed size chunks, so that hashing a file never holds
+more than one chunk of it in memory. Besides the algorithms of ``hashlib``,
+the non-cryptographic ``crc32`` and ``adler32`` checksums of ``zlib`` are
+available, which are a lot faster to compute, as well as ``blake2b`` and
+``blake2s`` if the ``pyblake2`` package is installed, and ``xxh64`` if the
+``xxhash`` package is installed.
+
+Checksums are cached in a SQLite database, keyed by the path of the file and
+the algorithm, and stored along with the inode, size and modification time of
+the file. A file is only hashed again when any of these change.
+"""
+
+import os
+import os.path as op
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from multiprocessing.pool import ThreadPool
+
+BUFSIZE = 1 << 20
+CHECKSUM_DB = op.join(op.expanduser("~"), ".pysemantic", "checksums.db")
+logger = logging.getLogger(__name__)
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+class ZlibHash(object):
+
+    """Hash object computing a zlib checksum, with the interface of the
+    objects of ``hashlib``."""
+
+    def __init__(self, func):
+        self.func = func
+        self.value = func("")
+
+    def update(self, data):
+        self.value = self.func(data, self.value)
+
+    def hexdigest(self):
+        return "{0:08x}".format(self.value & 0xffffffff)
+
+
+def get_hasher(algorithm):
+    """Get a new hash object for an algorithm.
+
+    :param algorithm: Name of the algorithm, one of the algorithms of \
+            ``hashlib``, ``crc32``, ``adler32``, ``blake2b``, ``blake2s`` or \
+            ``xxh64``.
+    :type algorithm: str
+    :return: Object with the ``update`` and ``hexdigest`` methods.
+    """
+    algorithm = algorithm.lower()
+    if algorithm == "crc32":
+        return ZlibHash(zlib.crc32)
+    if algorithm == "adler32":
+        return ZlibHash(zlib.adler32)
+    if algorithm in ("blake2b", "blake2s"):
+        if hasattr(hashlib, algorithm):
+            return getattr(hashlib, algorithm)()
+        try:
+            import pyblake2
+        except ImportError:
+            raise ValueError("The {0} algorithm requires the pyblake2 "
+                             "package.".format(algorithm))
+        return getattr(pyblake2, algorithm)()
+    if algorithm == "xxh64":
+        try:
+            import xxhash
+        except ImportError:
+            raise ValueError("The xxh64 algorithm requires the xxhash "
+                             "package.")
+        return xxhash.xxh64()
+    try:
+        return hashlib.new(algorithm)
+    except ValueError:
+        raise ValueError("Unknown checksum algorithm {0}.".format(algorithm))
+
+
+def hash_file(filepath, algorithm="md5", bufsize=BUFSIZE):
+    """Compute the checksum of a file, reading it in chunks of `bufsize`
+    bytes. The cache is not used.
+
+    :param filepath: Path to the file.
+    :param algorithm: Name of the algorithm (see `get_hasher`).
+    :param bufsize: Number of bytes read at a time.
+    :type filepath: str
+    :type algorithm: str
+    :type bufsize: int
+    :return: Hex digest of the file.
+    :rtype: str
+    """
+    hasher = get_hasher(algorithm)
+    with open(filepath, "rb") as fid:
+        for chunk in iter(lambda: fid.read(bufsize), ""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _get_stamp(filepath):
+    """Get the (inode, size, mtime) of a file."""
+    stat = os.stat(filepath)
+    return stat.st_ino, stat.st_size, stat.st_mtime
+
+
+class ChecksumCache(object):
+
+    """Persistent cache of the checksums of files."""
+
+    def __init__(self, path=CHECKSUM_DB):
+        """Open a checksum cache, creating it if needed.
+
+        :param path: Path to the SQLite database of the cache.
+        :type path: str
+        """
+        self.path = path
+        if path != ":memory:" and not op.isdir(op.dirname(path)):
+            os.makedirs(op.dirname(path))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30,
+                                     check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS checksums (path TEXT, "
+                           "algorithm TEXT, inode INTEGER, size INTEGER, "
+                           "mtime REAL, checksum TEXT, PRIMARY KEY (path, "
+                           "algorithm))")
+        self._conn.commit()
+
+    def get(self, filepath, algorithm, stamp):
+        """Get the cached checksum of a file.
+
+        :param filepath: Absolute path to the file.
+        :param algorithm: Name of the algorithm.
+        :param stamp: (inode, size, mtime) of the file.
+        :return: The checksum, or None if the file has changed since it was \
+                cached.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT inode, size, mtime, checksum "
+                                     "FROM checksums WHERE path = ? AND "
+                                     "algorithm = ?",
+                                     (filepath, algorithm)).fetchone()
+        if row is None or tuple(row[:3]) != stamp:
+            return None
+        return str(row[3])
+
+    def set(self, filepath, algorithm, stamp, checksum):
+        """Cache the checksum of a file.
+
+        :param filepath: Absolute path to the file.
+        :param algorithm: Name of the algorithm.
+        :param stamp: (inode, size, mtime) of the file when it was hashed.
+        :param checksum: The checksum.
+        """
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO checksums VALUES "
+                               "(?, ?, ?, ?, ?, ?)",
+                               (filepath, algorithm) + stamp + (checksum,))
+            self._conn.commit()
+
+
+def _get_default_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            try:
+                _default_cache = ChecksumCache()
+            except (OSError, sqlite3.Error) as exc:
+                logger.warn("Opening the checksum cache {0} failed: {1}. "
+                            "Keeping checksums in memory.".format(
+                                                        CHECKSUM_DB, exc))
+                _default_cache = ChecksumCache(":memory:")
+    return _default_cache
+
+
+def get_checksum(filepath, algorithm="md5", cache=True):
+    """Get the checksum of a file, hashing it only if it has changed since
+    its checksum was cached.
+
+    :param filepath: Path to the file.
+    :param algorithm: Name of the algorithm (see `get_hasher`).
+    :param cache: Whether to use the cache, or a `ChecksumCache` to use \
+            instead of the default one.
+    :type filepath: str
+    :type algorithm: str
+    :return: Hex digest of the file.
+    :rtype: str
+    :Example:
+
+    >>> get_checksum('pysemantic/tests/testdata/iris.csv', 'crc32')
+    'd00dec44'
+    """
+    algorithm = algorithm.lower()
+    if cache is False:
+        return hash_file(filepath, algorithm)
+    if cache is True:
+        cache = _get_default_cache()
+    filepath = op.abspath(filepath)
+    stamp = _get_stamp(filepath)
+    checksum = cache.get(filepath, algorithm, stamp)
+    if checksum is None:
+        logger.info("Computing the {0} checksum of {1}".format(algorithm,
+                                                               filepath))
+        checksum = hash_file(filepath, algorithm)
+        # Only cache the checksum if the file didn't change while hashing it.
+        if _get_stamp(filepath) == stamp:
+            cache.set(filepath, algorithm, stamp, checksum)
+    return checksum
+
+
+def get_checksums(filepaths, algorithm="md5", workers=1, cache=True):
+    """Get the checksums of several files, hashing up to `workers` files at a
+    time in threads. Reading the files releases the GIL, and so does hashing
+    them with the algorithms of ``hashlib``, so these are computed
+    concurrently. The ``zlib`` checksums hold the GIL on Python 2, so with
+    ``crc32`` and ``adler32`` only the reads of the files overlap, which
+    helps on slow disks but gives no speedup on files that are cached.
+
+    :param filepaths: List of paths to the files.
+    :param algorithm: Name of the algorithm (see `get_hasher`).
+    :param workers: Number of files hashed concurrently.
+    :param cache: Whether to use the cache, or a `ChecksumCache` to use \
+            instead of the default one.
+    :type filepaths: list
+    :type algorithm: str
+    :type workers: int
+    :return: List of the hex digests of the files.
+    :rtype: list
+    """
+    def checksum(filepath):
+        return get_checksum(filepath, algorithm, cache)
+
+    if workers <= 1 or len(filepaths) <= 1:
+        return map(checksum, filepaths)
+    pool = ThreadPool(min(workers, len(filepaths)))
+    try:
+        return pool.map(checksum, filepaths, chunksize=1)
+    finally:
+        pool.terminate()
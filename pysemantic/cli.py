@@ -16,6 +16,7 @@ Usage:
   semantic set-specs PROJECT_NAME --dataset=<dname> [--path=<pth>] [--dlm=<sep>]
   semantic add-dataset DATASET_NAME --project=<pname> --path=<pth> --dlm=<sep>
   semantic export PROJECT_NAME [--dataset=<dname>] OUTPATH
+  semantic infer PATH [--dataset=<dname>] [--project=<pname>] [--dlm=<sep>] [--sample=<n>] [--workers=<n>] [--rules | --no-rules]
 
 Options:
   -h --help	        Show this screen
@@ -23,16 +24,34 @@ Options:
   --path=<pth>        Path to a dataset
   --dlm=<sep>         Declare the delimiter for a dataset
   -p --project=<pname>   Name of the project to modify
+  --sample=<n>        Number of rows sampled to infer a schema [default: 10000]
+  --workers=<n>       Number of threads inferring the columns [default: 1]
+  --rules             Infer column rules even from a sample of the file
+  --no-rules          Infer only the dtypes and missing values, no rules
   -v --version        Print the version of PySemantic
 
+The infer command prints the inferred specifications of the dataset in YAML,
+or adds them to the data dictionary of a project if one is given. The dataset
+is named after the file unless a name is given. The min, max and unique values
+rules of the columns are only inferred if the whole file fits in the sample,
+unless --rules is given, since rows outside of the sample may not satisfy
+them.
+
 """
 
 import os.path as op
 
+import yaml
 from docopt import docopt
 
 from pysemantic import project as pr
 from pysemantic.errors import MissingProject
+from pysemantic.inference import infer_schema
+
+try:
+    from yaml import CDumper as Dumper
+except ImportError:
+    from yaml import Dumper
 
 
 def cli(arguments):
@@ -91,6 +110,25 @@ def cli(arguments):
         project = pr.Project(arguments.get("PROJECT_NAME"))
         project.export_dataset(arguments.get("--dataset"),
                                outpath=arguments.get("OUTPATH"))
+    elif arguments.get("infer", False):
+        path = op.abspath(arguments.get("PATH"))
+        rules = None
+        if arguments.get("--rules"):
+            rules = True
+        elif arguments.get("--no-rules"):
+            rules = False
+        specs = infer_schema(path, delimiter=arguments.get("--dlm"),
+                             n_rows=int(arguments.get("--sample")),
+                             workers=int(arguments.get("--workers")),
+                             rules=rules)
+        dataset_name = arguments.get("--dataset")
+        if dataset_name is None:
+            dataset_name = op.splitext(op.basename(path))[0]
+        if arguments.get("--project") is None:
+            print yaml.dump({dataset_name: specs}, Dumper=Dumper,
+                            default_flow_style=False)
+        else:
+            pr.add_dataset(arguments.get("--project"), dataset_name, specs)
 
 
 def main():
@@ -0,0 +1,282 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Memory-mapped columnar store for cleaned datasets.
+
+A store is a directory, conventionally named ``<dataset_name>.pscol``, which
+holds the columns of a dataframe as uncompressed numpy arrays and a small
+``metadata.json`` file describing them. Columns of the same numerical or
+datetime dtype are stored together in one two-dimensional array, one row per
+column, which is the layout pandas uses internally, so that a dataframe can
+be built directly on top of the memory-mapped arrays without pandas copying
+them into a consolidated block. Strings and other object columns are
+dictionary-encoded: their integer codes are stored as an array and their
+distinct values separately, as strings, or pickled if they are not all
+strings.
+
+The arrays can only be used in place if the columns of each dtype are
+contiguous in the dataframe, since pandas copies them when the columns have
+to be reordered after the arrays of each dtype are put together.
+
+Opening a store only reads the metadata and maps the arrays, the data itself
+is paged in by the OS when it is accessed. Processes which open the same store
+therefore share its pages in the page cache. The arrays are mapped
+copy-on-write, so modifying a loaded dataframe never modifies the store.
+"""
+
+import os
+import os.path as op
+import json
+import shutil
+import logging
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+METADATA_FILE = "metadata.json"
+logger = logging.getLogger(__name__)
+
+
+def is_columnar_path(path):
+    """Check if a path refers to a columnar store, i.e. if it ends with
+    ``.pscol``, with or without a trailing slash.
+
+    :param path: The path to check.
+    :rtype: bool
+    """
+    return isinstance(path, basestring) and \
+        path.rstrip("/").endswith(".pscol")
+
+
+def write_columnar(dataframe, path):
+    """Write a dataframe to a columnar store. An existing store at the same
+    path is replaced once the new one has been written completely.
+
+    :param dataframe: The dataframe to write.
+    :param path: Path to the directory of the store.
+    :type dataframe: pandas.DataFrame
+    :type path: str
+    :Example:
+
+    >>> iris = demo_project.load_dataset('iris')
+    >>> write_columnar(iris, '/tmp/iris.pscol')
+    >>> read_columnar('/tmp/iris.pscol').shape
+    (150, 5)
+    """
+    if isinstance(dataframe.columns, pd.MultiIndex):
+        raise ValueError("Dataframes with hierarchical columns cannot be "
+                         "written to a columnar store.")
+    path = op.abspath(path.rstrip("/"))
+    parent = op.dirname(path)
+    if not op.isdir(parent):
+        os.makedirs(parent)
+    tmpdir = tempfile.mkdtemp(suffix=".part", dir=parent)
+    try:
+        metadata = _write_columns(dataframe, tmpdir)
+        with open(op.join(tmpdir, METADATA_FILE), "w") as fid:
+            json.dump(metadata, fid, indent=2)
+        if op.isdir(path):
+            shutil.rmtree(path)
+        os.rename(tmpdir, path)
+    except Exception:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        raise
+    logger.info("Dataframe of shape {0} written to the columnar store "
+                "{1}.".format(dataframe.shape, path))
+
+
+def read_columnar(path, columns=None, exclude_columns=None, nrows=None):
+    """Open a columnar store as a dataframe backed by memory-mapped arrays.
+
+    :param path: Path to the directory of the store.
+    :param columns: Names of the columns to read. If None (default), all \
+            columns are read.
+    :param exclude_columns: Names of the columns not to read.
+    :param nrows: Number of rows to read from the beginning of the store. If \
+            None (default), all rows are read.
+    :type path: str
+    :type columns: list
+    :type exclude_columns: list
+    :type nrows: int
+    :return: The dataframe contained in the store.
+    :rtype: pandas.DataFrame
+    """
+    with open(op.join(path, METADATA_FILE), "r") as fid:
+        metadata = json.load(fid)
+    if metadata['version'] > FORMAT_VERSION:
+        raise ValueError("The columnar store {0} has format version {1}, "
+                         "which is newer than the supported version "
+                         "{2}.".format(path, metadata['version'],
+                                       FORMAT_VERSION))
+    names = [_decode_name(name) for name in metadata['columns']]
+    if columns is None:
+        selected = range(len(names))
+    else:
+        missing = [col for col in columns if col not in names]
+        if len(missing) > 0:
+            raise KeyError("Columns {0} not found in the columnar store "
+                           "{1}.".format(missing, path))
+        selected = [names.index(col) for col in columns]
+    if exclude_columns is not None:
+        selected = [pos for pos in selected
+                    if names[pos] not in exclude_columns]
+    rows = slice(None, nrows)
+    n_rows = metadata['nrows'] if nrows is None else min(nrows,
+                                                          metadata['nrows'])
+    if metadata['index'] is None:
+        index = pd.RangeIndex(n_rows)
+    else:
+        levels = [_load_index_level(path, entry, rows)
+                  for entry in metadata['index']]
+        index_names = [_decode_name(entry['name'])
+                       for entry in metadata['index']]
+        if len(levels) == 1:
+            index = pd.Index(levels[0], name=index_names[0])
+        else:
+            index = pd.MultiIndex.from_arrays(levels, names=index_names)
+
+    # One dataframe is built on every array, in the order of their first
+    # columns, so that pandas doesn't consolidate them again.
+    frames = []
+    for block in metadata['blocks']:
+        positions = [pos for pos in block['columns'] if pos in selected]
+        if len(positions) == 0:
+            continue
+        values = _load_array(path, block['file'])
+        if len(positions) < len(block['columns']):
+            # Only this selection of the block is copied into memory.
+            values = values[[block['columns'].index(pos)
+                             for pos in positions]]
+        frames.append((positions[0], pd.DataFrame(
+            values[:, rows].T, index=index, copy=False,
+            columns=[names[pos] for pos in positions])))
+    for entry in metadata['dictionaries']:
+        pos = entry['column']
+        if pos in selected:
+            values = _load_dictionary(path, entry, rows)
+            frames.append((pos, pd.DataFrame(pd.Series(values, index=index,
+                                                        name=names[pos]))))
+    if len(frames) == 0:
+        return pd.DataFrame(index=index)
+    frames = [frame for _, frame in sorted(frames, key=lambda x: x[0])]
+    dataframe = pd.concat(frames, axis=1, copy=False)
+    columns = [names[pos] for pos in selected]
+    if dataframe.columns.tolist() != columns:
+        dataframe = dataframe.reindex(columns=columns, copy=False)
+    return dataframe
+
+
+def _write_columns(dataframe, dirpath):
+    """Write the columns and the index of a dataframe as arrays in a
+    directory, and return the metadata describing them."""
+    metadata = {'version': FORMAT_VERSION, 'nrows': dataframe.shape[0],
+                'columns': list(dataframe.columns), 'blocks': [],
+                'dictionaries': [], 'index': None}
+    groups = {}
+    for pos, dtype in enumerate(dataframe.dtypes):
+        if _is_plain_dtype(dtype):
+            groups.setdefault(dtype.str, []).append(pos)
+        else:
+            entry = _write_dictionary(dataframe.iloc[:, pos], dirpath,
+                                      "column_{0}".format(pos))
+            entry['column'] = pos
+            metadata['dictionaries'].append(entry)
+    groups = sorted(groups.iteritems(), key=lambda x: x[1][0])
+    for i, (dtype, positions) in enumerate(groups):
+        fname = "block_{0}.npy".format(i)
+        values = np.lib.format.open_memmap(op.join(dirpath, fname),
+                                           mode="w+", dtype=np.dtype(dtype),
+                                           shape=(len(positions),
+                                                  dataframe.shape[0]))
+        for row, pos in enumerate(positions):
+            values[row] = dataframe.iloc[:, pos].values
+        values.flush()
+        del values
+        metadata['blocks'].append({'file': fname, 'dtype': dtype,
+                                   'columns': positions})
+
+    index = dataframe.index
+    if not index.equals(pd.RangeIndex(dataframe.shape[0])):
+        metadata['index'] = []
+        for i in range(index.nlevels):
+            level = pd.Series(index.get_level_values(i))
+            name = "index_{0}".format(i)
+            if _is_plain_dtype(level.dtype):
+                fname = name + ".npy"
+                np.save(op.join(dirpath, fname), level.values)
+                entry = {'file': fname}
+            else:
+                entry = _write_dictionary(level, dirpath, name)
+            entry['name'] = index.names[i]
+            metadata['index'].append(entry)
+    return metadata
+
+
+def _write_dictionary(series, dirpath, name):
+    """Write a dictionary-encoded series as an array of codes and an array of
+    its distinct values. Distinct values which are not all strings are
+    pickled, so that they are read back unchanged."""
+    if series.dtype.name != "category":
+        series = series.astype("category")
+    categories = np.asarray(series.cat.categories)
+    pickled = False
+    if categories.dtype == object:
+        if all([isinstance(value, str) for value in categories]):
+            categories = categories.astype(str)
+        elif all([isinstance(value, basestring) for value in categories]):
+            try:
+                categories = categories.astype(unicode)
+            except UnicodeDecodeError:
+                pickled = True
+        else:
+            pickled = True
+    codes_file = name + ".codes.npy"
+    categories_file = name + ".categories.npy"
+    np.save(op.join(dirpath, codes_file), series.cat.codes.values)
+    np.save(op.join(dirpath, categories_file), categories,
+            allow_pickle=pickled)
+    return {'codes': codes_file, 'categories': categories_file,
+            'ordered': bool(series.cat.ordered), 'pickled': pickled}
+
+
+def _load_array(dirpath, fname):
+    return np.load(op.join(dirpath, fname), mmap_mode="c")
+
+
+def _load_dictionary(dirpath, entry, rows):
+    codes = _load_array(dirpath, entry['codes'])[rows]
+    categories = np.load(op.join(dirpath, entry['categories']),
+                         allow_pickle=entry.get('pickled', False))
+    # The fastpath keeps the memory-mapped codes instead of copying them.
+    return pd.Categorical(codes, categories=pd.Index(categories),
+                          ordered=entry['ordered'], fastpath=True)
+
+
+def _load_index_level(dirpath, entry, rows):
+    if "file" in entry:
+        return _load_array(dirpath, entry['file'])[rows]
+    # Unlike columns, index levels are decoded back to their values.
+    return np.asarray(_load_dictionary(dirpath, entry, rows))
+
+
+def _is_plain_dtype(dtype):
+    """Check if a column of the given dtype can be stored as a plain array."""
+    return isinstance(dtype, np.dtype) and dtype.kind in "biufcmM"
+
+
+def _decode_name(name):
+    """Column names read from the metadata are unicode, convert them back to
+    str where possible."""
+    if isinstance(name, unicode):
+        try:
+            return name.encode("ascii")
+        except UnicodeEncodeError:
+            pass
+    return name
@@ -10,9 +10,11 @@
 
 import os.path as op
 
-from traits.api import Dict, TraitError, BaseInt, File, List
+from traits.api import Dict, TraitError, BaseInt, File, List, BaseDirectory
 from traits.trait_handlers import TraitDictObject
 
+from pysemantic.partitions import is_partitioned_path
+
 
 class ValidTraitList(List):
 
@@ -41,6 +43,38 @@ class AbsFile(File):
         self.error(obj, name, value)
 
 
+class ColumnarStore(BaseDirectory):
+
+    """A Directory trait whose value must be an absolute path to an existing
+    columnar store, i.e. a directory whose name ends with ``.pscol``.
+    """
+
+    def validate(self, obj, name, value):
+        validated_value = super(ColumnarStore, self).validate(obj, name,
+                                                              value)
+        if op.isabs(validated_value) and op.isdir(value) and \
+                validated_value.rstrip("/").endswith(".pscol"):
+            return validated_value
+
+        self.error(obj, name, value)
+
+
+class PartitionedDirectory(BaseDirectory):
+
+    """A Directory trait whose value must be an absolute path to an existing
+    partitioned dataset, i.e. a directory containing ``<column>=<value>``
+    subdirectories.
+    """
+
+    def validate(self, obj, name, value):
+        validated_value = super(PartitionedDirectory, self).validate(obj, name,
+                                                                     value)
+        if op.isabs(validated_value) and is_partitioned_path(validated_value):
+            return validated_value
+
+        self.error(obj, name, value)
+
+
 class NaturalNumber(BaseInt):
 
     """An integer trait whose value is a natural number."""
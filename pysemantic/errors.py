@@ -17,3 +17,12 @@ class MissingProject(Exception):
 class MissingConfigError(Exception):
 
     """Error raised when the pysemantic configuration file is not found."""
+
+
+class DatasetFileError(Exception):
+
+    """Error raised when a file belonging to a dataset cannot be loaded."""
+
+    def __init__(self, message, filepath):
+        super(DatasetFileError, self).__init__(message)
+        self.filepath = filepath
@@ -10,6 +10,24 @@
 Exporters from PySemantic to databases or other data sinks.
 """
 
+import os
+import os.path as op
+import time
+import shutil
+import logging
+import tempfile
+import threading
+from multiprocessing.pool import ThreadPool
+
+import pandas as pd
+
+from pysemantic.loggers import log_json
+from pysemantic.partitions import (FORMATS, split_partitions,
+                                   is_partitioned_path, _write_partition)
+
+DEFAULT_BATCH_SIZE = 1000
+logger = logging.getLogger(__name__)
+
 
 class AbstractExporter(object):
     """Abstract exporter for dataframes that have been cleaned."""
@@ -22,24 +40,252 @@ class AbstractExporter(object):
 
 
 class AerospikeExporter(AbstractExporter):
-    """Example class for exporting to an aerospike database."""
+    """Exporter of a dataframe to an aerospike set, one record per row, keyed
+    by the index of the dataframe.
 
-    def __init__(self, config, dataframe):
+    Rows are converted to records a batch at a time, and batches are written
+    concurrently by a pool of writers sharing the client. Writes which time
+    out are retried with an exponential backoff. The number of records
+    written, retried and failed, and the throughput, are kept in `stats`.
+
+    The dataframe can also be given as an iterable of chunks, which are then
+    exported one after the other over the same client and pool of writers, so
+    that only one chunk needs to be held in memory at a time.
+    """
+
+    def __init__(self, config, dataframe, client=None, retry_on=None):
+        """Configure the exporter.
+
+        :param config: Dictionary containing the ``namespace``, ``set``, \
+                ``hostname`` and ``port`` to export to, and optionally the \
+                number of rows written per batch (``batch_size``, default \
+                1000), the number of concurrent writers (``workers``, \
+                default 1), the number of times a write is retried \
+                (``retries``, default 3), the initial backoff in seconds \
+                between retries (``backoff``, default 0.1) and the client \
+                timeout in milliseconds (``timeout``, default 60000).
+        :param dataframe: The dataframe to export, or an iterable of \
+                dataframes exported one after the other.
+        :param client: A connected client to use instead of connecting to \
+                the configured host. It is not closed after the export.
+        :param retry_on: Exception classes on which a write is retried. If \
+                None (default), the timeout error of the aerospike client.
+        :type config: dict
+        :type dataframe: pandas.DataFrame or iterable
+        :type retry_on: tuple
+        """
         self.dataframe = dataframe
         self.namespace = config['namespace']
         self.set_name = config['set']
-        self.port = config['port']
-        self.hostname = config['hostname']
+        self.port = config.get('port')
+        self.hostname = config.get('hostname')
+        self.batch_size = config.get('batch_size', DEFAULT_BATCH_SIZE)
+        self.workers = config.get('workers', 1)
+        self.retries = config.get('retries', 3)
+        self.backoff = config.get('backoff', 0.1)
+        self.timeout = config.get('timeout', 60000)
+        self.client = client
+        self.retry_on = retry_on
+        self.stats = {}
+        self._lock = threading.Lock()
 
     def set(self, key_tuple, bins):
-        self.client.put(key_tuple, bins)
+        """Write a record, retrying it if it times out.
+
+        :param key_tuple: Tuple of the namespace, set and key of the record.
+        :param bins: Dictionary of the bins of the record.
+        """
+        for attempt in xrange(self.retries + 1):
+            try:
+                self.client.put(key_tuple, bins)
+                return
+            except self.retry_on:
+                if attempt == self.retries:
+                    self._count('failed')
+                    raise
+                self._count('retries')
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def run(self):
+        """Export the dataframe.
+
+        :return: The statistics of the export, containing the number of \
+                records written, the number of retried writes, the number of \
+                records which could not be written, the number of batches, \
+                the time taken in seconds and the number of records written \
+                per second.
+        :rtype: dict
+        """
+        close = False
+        if self.client is None:
+            import aerospike
+            self.client = aerospike.client({'hosts': [(self.hostname,
+                                                       self.port)],
+                                            'policies': {'timeout':
+                                                         self.timeout}})
+            self.client.connect()
+            close = True
+            if self.retry_on is None:
+                self.retry_on = (aerospike.exception.TimeoutError,)
+        if self.retry_on is None:
+            self.retry_on = _get_timeout_errors()
+        if isinstance(self.dataframe, pd.DataFrame):
+            chunks = [self.dataframe]
+        else:
+            chunks = self.dataframe
+        self.stats = {'written': 0, 'retries': 0, 'failed': 0, 'batches': 0}
+        start_time = time.time()
+        pool = None
+        if self.workers > 1:
+            pool = ThreadPool(self.workers)
+        try:
+            for chunk in chunks:
+                batches = [(chunk, start) for start in
+                           xrange(0, chunk.shape[0], self.batch_size)]
+                self.stats['batches'] += len(batches)
+                if pool is not None and len(batches) > 1:
+                    pool.map(self._write_batch, batches, chunksize=1)
+                else:
+                    map(self._write_batch, batches)
+        finally:
+            if pool is not None:
+                pool.terminate()
+            elapsed = time.time() - start_time
+            self.stats['time'] = elapsed
+            self.stats['records_per_second'] = \
+                self.stats['written'] / elapsed if elapsed > 0 else 0.0
+            logger.info("Exported to aerospike set {0}.{1}:".format(
+                                                self.namespace, self.set_name))
+            log_json(logger, self.stats)
+            if close:
+                self.client.close()
+                self.client = None
+        return self.stats
+
+    def _write_batch(self, batch):
+        """Convert the rows of a batch, given as a tuple of a dataframe and
+        the position of its first row, to records and write them."""
+        dataframe, start = batch
+        batch = dataframe.iloc[start:start + self.batch_size]
+        columns = batch.columns.tolist()
+        # Converting whole columns to lists is a lot faster than indexing
+        # rows, and yields python scalars as the client expects.
+        values = [batch.iloc[:, i].tolist() for i in xrange(len(columns))]
+        keys = batch.index.tolist()
+        for i, row in enumerate(zip(*values)):
+            self.set((self.namespace, self.set_name, keys[i]),
+                     dict(zip(columns, row)))
+        self._count('written', len(keys))
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.stats[name] += n
+
+
+class PartitionedExporter(AbstractExporter):
+    """Exporter of a dataframe to a directory partitioned hive-style by the
+    values of some of its columns (see `pysemantic.partitions`).
+
+    The dataframe, or each of its chunks, is split by the partition columns,
+    and the partitions are encoded and written concurrently by a pool of
+    worker threads, one file per partition and chunk. Parquet and Feather
+    files are encoded without holding the GIL, so they are written in
+    parallel, while CSV files mostly overlap their writes to disk. Threads
+    are used rather than processes since the exporter runs alongside other
+    threads, like the one reading the next chunk, and forking a process
+    while they run is unsafe. The directory is written next to its final
+    location, and only replaces it once every chunk has been written. An
+    existing path is only replaced if it is a partitioned dataset or an
+    empty directory.
+    """
+
+    def __init__(self, config, dataframe):
+        """Configure the exporter.
+
+        :param config: Dictionary containing the ``path`` of the directory \
+                to export to, the partition column or columns (``by``), and \
+                optionally the format of the files (``format``, one of \
+                ``csv`` (default), ``parquet`` or ``feather``) and the \
+                number of worker threads (``workers``, default 1).
+        :param dataframe: The dataframe to export, or an iterable of \
+                dataframes exported one after the other.
+        :type config: dict
+        :type dataframe: pandas.DataFrame or iterable
+        """
+        self.dataframe = dataframe
+        self.path = config['path'].rstrip("/")
+        self.by = config['by']
+        if isinstance(self.by, basestring):
+            self.by = [self.by]
+        self.format = config.get('format', "csv")
+        if self.format not in FORMATS:
+            raise ValueError("Unknown partition format {0}, expected one "
+                             "of {1}.".format(self.format, FORMATS))
+        self.workers = config.get('workers', 1)
+        self.files = []
 
     def run(self):
+        """Export the dataframe.
+
+        :return: List of the paths of the files written.
+        :rtype: list
+        """
+        if isinstance(self.dataframe, pd.DataFrame):
+            chunks = [self.dataframe]
+        else:
+            chunks = self.dataframe
+        if op.lexists(self.path) and not (is_partitioned_path(self.path) or
+                                          _is_empty_dir(self.path)):
+            raise ValueError("{0} exists and is not a partitioned dataset, "
+                             "refusing to replace it.".format(self.path))
+        parent = op.dirname(op.abspath(self.path))
+        if not op.isdir(parent):
+            os.makedirs(parent)
+        tempdir = tempfile.mkdtemp(dir=parent,
+                                   prefix="." + op.basename(self.path))
+        # mkdtemp makes the directory private to the user.
+        os.chmod(tempdir, 0o755)
+        self.files = []
+        pool = None
+        if self.workers > 1:
+            pool = ThreadPool(self.workers)
+        try:
+            for i, chunk in enumerate(chunks):
+                filename = "part-{0:05d}.{1}".format(i, self.format)
+                tasks = [(group, op.join(tempdir, dirname, filename),
+                          self.format)
+                         for dirname, group in split_partitions(chunk,
+                                                                self.by)]
+                if pool is not None and len(tasks) > 1:
+                    written = pool.map(_write_partition, tasks, chunksize=1)
+                else:
+                    written = map(_write_partition, tasks)
+                self.files.extend([op.join(self.path,
+                                           op.relpath(filepath, tempdir))
+                                   for filepath in written])
+            if op.isdir(self.path):
+                shutil.rmtree(self.path)
+            os.rename(tempdir, self.path)
+        except Exception:
+            shutil.rmtree(tempdir, ignore_errors=True)
+            raise
+        finally:
+            if pool is not None:
+                pool.terminate()
+        logger.info("Exported {0} files to the partitioned dataset "
+                    "{1}".format(len(self.files), self.path))
+        return self.files
+
+
+def _is_empty_dir(path):
+    return op.isdir(path) and not op.islink(path) and \
+        len(os.listdir(path)) == 0
+
+
+def _get_timeout_errors():
+    """Get the timeout error of the aerospike client, if it is installed."""
+    try:
         import aerospike
-        self.client = aerospike.client({'hosts': [(self.hostname,
-                                                   self.port)],
-                                        'policies':{'timeout': 60000}}).connect()
-        for ix in self.dataframe.index:
-            self.set((self.namespace, self.set_name, ix),
-                     self.dataframe.ix[ix].to_dict())
-        self.client.close()
+    except ImportError:
+        return ()
+    return (aerospike.exception.TimeoutError,)
@@ -0,0 +1,245 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Inference of the schema of a dataset from a sample of its rows.
+
+Instead of reading the whole file, a bounded number of lines is read from
+several places in it: the lines following the header, and blocks of lines
+starting at random offsets within equal slices of the rest of the file, so
+that files much larger than the memory are profiled in about the same time
+as small ones. Files small enough to fit in the sample are read whole.
+
+From the sample, the columns are profiled in parallel to infer their dtypes
+(integers, floats, dates or strings), the tokens they use for missing values,
+and column rules: the minimum and maximum of numerical columns, and the
+unique values of string columns with few of them. Tokens for missing values
+are declared as the ``na_values`` of their columns, so that they don't apply
+to the other columns.
+
+The rules are enforced when the dataset is loaded, and rules inferred from a
+sample would drop every row of the file outside of the sampled range or
+values. So by default they are only inferred when the sample covers the
+whole file, and they have to be asked for explicitly otherwise.
+"""
+
+import csv
+import datetime
+import os.path as op
+from cStringIO import StringIO
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+import pandas as pd
+
+SAMPLE_ROWS = 10000
+SAMPLE_BLOCKS = 20
+
+# Maximum number of unique values for which a string column gets a
+# unique_values rule, and the minimum number of times each of these values
+# must be found in the sample.
+MAX_UNIQUE = 20
+MIN_UNIQUE_COUNT = 5
+
+# Strings read as missing values by the pandas parsers.
+DEFAULT_NA_VALUES = set(['', '#N/A', '#N/A N/A', '#NA', '-1.#IND',
+                         '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                         'N/A', 'NA', 'NULL', 'NaN', 'nan'])
+
+# Other strings which are taken as missing values when they are found in a
+# column of numbers or dates.
+NA_CANDIDATES = set(['-', '?', '.', 'n/a', 'na', 'null', 'Null', 'None',
+                     'none', 'NONE', 'missing', 'MISSING'])
+
+DELIMITERS = ",\t;|"
+
+
+def _read_lines(fid, count):
+    lines = []
+    while len(lines) < count:
+        line = fid.readline()
+        if not line:
+            break
+        if line.strip():
+            lines.append(line if line.endswith("\n") else line + "\n")
+    return lines
+
+
+def sample_lines(path, n_rows=SAMPLE_ROWS, n_blocks=SAMPLE_BLOCKS,
+                 random_state=0):
+    """Read the header and a sample of the lines of a text file.
+
+    :param path: Path to the file.
+    :param n_rows: Maximum number of lines in the sample.
+    :param n_blocks: Number of places from which lines are read.
+    :param random_state: Seed of the offsets of the blocks.
+    :type path: str
+    :type n_rows: int
+    :type n_blocks: int
+    :return: Tuple of the header, the list of sampled lines, and whether \
+            the sample contains all the lines of the file.
+    :rtype: tuple
+    """
+    size = op.getsize(path)
+    per_block = max(1, n_rows // n_blocks)
+    with open(path, "rb") as fid:
+        header = fid.readline()
+        start = fid.tell()
+        lines = _read_lines(fid, per_block)
+        end = fid.tell()
+        if end >= size:
+            return header, lines, True
+        line_size = (end - start) / float(max(len(lines), 1))
+        if (size - start) <= line_size * n_rows:
+            lines.extend(_read_lines(fid, n_rows - len(lines)))
+            return header, lines, fid.tell() >= size
+        rng = np.random.RandomState(random_state)
+        strata = np.linspace(end, size, n_blocks)
+        for low, high in zip(strata[:-1], strata[1:]):
+            fid.seek(int(low) + rng.randint(max(int(high - low), 1)))
+            # Skip the partial line at the offset.
+            fid.readline()
+            lines.extend(_read_lines(fid, per_block))
+    return header, lines, False
+
+
+def get_delimiter(path, header):
+    """Guess the delimiter of a file from its extension or its header."""
+    if path.endswith(".tsv"):
+        return "\t"
+    try:
+        return csv.Sniffer().sniff(header, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        return ","
+
+
+def _python_scalar(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def infer_column(values, complete=False, rules=True):
+    """Infer the dtype, the missing value tokens and the rules of a column.
+
+    :param values: The values of the column, as strings.
+    :param complete: Whether the values are all the values of the column, \
+            and not a sample of them.
+    :param rules: Whether to infer column rules.
+    :type values: pandas.Series
+    :return: Dictionary containing the ``dtype``, the list of ``na_values`` \
+            not read as missing by default, and the inferred \
+            ``column_rules``.
+    :rtype: dict
+    """
+    is_na = values.isin(DEFAULT_NA_VALUES).values
+    present = values[~is_na]
+    inferred = {'dtype': str, 'na_values': [], 'column_rules': {}}
+    if present.shape[0] == 0:
+        return inferred
+
+    numbers = pd.to_numeric(present, errors="coerce")
+    parsed = numbers.notnull().values
+    dates = None
+    if not parsed.any() and present.str.contains(r"\d").all() and \
+            not present.str.match(r"^\d+$").any():
+        dates = pd.to_datetime(present, errors="coerce",
+                               infer_datetime_format=True)
+        parsed = dates.notnull().values
+    others = present[~parsed]
+    if parsed.any() and others.isin(NA_CANDIDATES).all():
+        inferred['na_values'] = sorted(others.unique())
+        has_na = is_na.any() or others.shape[0] > 0
+        if dates is not None:
+            inferred['dtype'] = datetime.date
+        else:
+            numbers = numbers[parsed]
+            decimal = present[parsed].str.contains(r"[.eE]").any()
+            if decimal or has_na or not (numbers == np.round(numbers)).all():
+                inferred['dtype'] = float
+            else:
+                inferred['dtype'] = int
+            if rules:
+                kind = inferred['dtype']
+                inferred['column_rules'] = {
+                    'min': kind(_python_scalar(numbers.min())),
+                    'max': kind(_python_scalar(numbers.max()))}
+    elif rules:
+        counts = present.value_counts()
+        if len(counts) <= MAX_UNIQUE and len(counts) < present.shape[0] / 2 \
+                and (complete or counts.min() >= MIN_UNIQUE_COUNT):
+            inferred['column_rules'] = {
+                'unique_values': sorted(counts.index.tolist())}
+    return inferred
+
+
+def infer_schema(path, delimiter=None, n_rows=SAMPLE_ROWS,
+                 n_blocks=SAMPLE_BLOCKS, workers=1, rules=None,
+                 random_state=0):
+    """Infer the schema of a delimited text file from a sample of its rows.
+
+    :param path: Path to the file.
+    :param delimiter: Delimiter of the file. If None (default), it is \
+            guessed from the extension or the header of the file.
+    :param n_rows: Maximum number of rows sampled.
+    :param n_blocks: Number of places in the file from which rows are read.
+    :param workers: Number of threads profiling the columns.
+    :param rules: Whether to infer the ``min``, ``max`` and \
+            ``unique_values`` rules of the columns. If None (default), they \
+            are only inferred if the whole file fits in the sample. If True, \
+            they describe the sampled rows, and rows outside of them will be \
+            dropped when the dataset is loaded.
+    :param random_state: Seed of the sample.
+    :type path: str
+    :type n_rows: int
+    :type workers: int
+    :type rules: bool or None
+    :return: The specifications of the dataset, as found under its name in \
+            a data dictionary.
+    :rtype: dict
+    :Example:
+
+    >>> infer_schema('/data/iris.csv')
+    {'path': '/data/iris.csv', 'delimiter': ',',
+     'dtypes': {'Petal Length': float, ..., 'Species': str},
+     'column_rules': {'Petal Length': {'min': 1.0, 'max': 6.9}, ...,
+                      'Species': {'unique_values': ['setosa', 'versicolor',
+                                                    'virginica']}}}
+    """
+    path = op.abspath(path)
+    header, lines, complete = sample_lines(path, n_rows, n_blocks,
+                                           random_state)
+    if delimiter is None:
+        delimiter = get_delimiter(path, header)
+    if rules is None:
+        rules = complete
+    sample = pd.read_csv(StringIO(header + "".join(lines)), sep=delimiter,
+                         dtype=str, na_filter=False, error_bad_lines=False,
+                         warn_bad_lines=False)
+    columns = sample.columns.tolist()
+    profile = lambda col: infer_column(sample[col], complete, rules)
+    if workers > 1:
+        pool = ThreadPool(min(workers, len(columns)))
+        try:
+            inferred = pool.map(profile, columns)
+        finally:
+            pool.terminate()
+    else:
+        inferred = map(profile, columns)
+
+    specs = {'path': path, 'delimiter': delimiter, 'dtypes': {}}
+    column_rules = {}
+    for col, column in zip(columns, inferred):
+        specs['dtypes'][col] = column['dtype']
+        col_rules = column['column_rules']
+        if len(column['na_values']) > 0:
+            col_rules['na_values'] = column['na_values']
+        if len(col_rules) > 0:
+            column_rules[col] = col_rules
+    if len(column_rules) > 0:
+        specs['column_rules'] = column_rules
+    return specs
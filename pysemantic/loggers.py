@@ -6,21 +6,186 @@
 #
 # Distributed under terms of the BSD 3-clause license.
 
-"""Loggers"""
+"""Loggers
+
+The records of the ``pysemantic`` loggers are put on a queue by the thread
+logging them, and written to the log files by a background thread, so that
+loading a dataset doesn't wait on the disk. A process logs to a single file,
+``~/.pysemantic/<project_name>.log``, named after the first project created
+in it, so that every record is written once. The records of the projects
+created later go to the same file, following the line announcing their
+start. The file is rotated when it grows beyond `MAX_BYTES`.
+
+Messages which are expensive to build, like the JSON dumps of the schema and
+the rows dropped from a dataset, are only built if their level is enabled.
+Set the level of the ``pysemantic`` logger to skip them, e.g.
+
+>>> logging.getLogger("pysemantic").setLevel(logging.WARNING)
+"""
 
 import os
-import os.path as op
+import json
+import atexit
 import logging
-import time
+import threading
+import os.path as op
+from Queue import Queue
+from logging.handlers import RotatingFileHandler
+
+from pysemantic.utils import TypeEncoder
 
 
 LOGDIR = op.join(op.expanduser("~"), ".pysemantic")
 if not op.exists(LOGDIR):
     os.mkdir(LOGDIR)
 
+# Size of a log file beyond which it is rotated, and number of rotated files
+# kept.
+MAX_BYTES = 10 * 2 ** 20
+BACKUP_COUNT = 5
+
+# Number of dropped rows listed in the logs.
+SAMPLE_SIZE = 10
+
+LOG_FORMAT = "%(asctime)s %(name)s %(levelname)s: %(message)s"
+
+_listener = None
+_logfile = None
+_setup_lock = threading.Lock()
+
+
+class QueueHandler(logging.Handler):
+
+    """Handler putting log records on a queue, from which a `QueueListener`
+    writes them."""
+
+    def __init__(self, queue):
+        """
+        :param queue: The queue on which records are put.
+        :type queue: Queue.Queue
+        """
+        logging.Handler.__init__(self)
+        self.queue = queue
+
+    def prepare(self, record):
+        """Merge the message and its arguments, and the traceback if any,
+        into the record, so that it no longer refers to objects which may
+        change before it is written."""
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                                                              record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+
+class QueueListener(object):
+
+    """Background thread writing the records of a queue to handlers."""
+
+    def __init__(self, queue):
+        """
+        :param queue: The queue from which records are read.
+        :type queue: Queue.Queue
+        """
+        self.queue = queue
+        self.handlers = []
+        self._thread = None
+
+    def add_handler(self, handler):
+        """Add a handler to which the records are written."""
+        self.handlers = self.handlers + [handler]
+
+    def start(self):
+        """Start writing records in a background thread."""
+        self._thread = threading.Thread(target=self._monitor)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _monitor(self):
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+    def stop(self):
+        """Write the records left on the queue, and stop the thread."""
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+        for handler in self.handlers:
+            handler.close()
+
+
+def setup_logging(project_name, level=logging.INFO):
+    """Log the records of the ``pysemantic`` loggers to a file. The file is
+    opened once per process, and named after the first project, later calls
+    only announce the start of their project in it.
+
+    :param project_name: Name of the project.
+    :param level: Level of the ``pysemantic`` logger, if it is not already \
+            set.
+    :type project_name: str
+    :type level: int
+    """
+    global _listener, _logfile
+    logger = logging.getLogger("pysemantic")
+    with _setup_lock:
+        if _listener is None:
+            _logfile = op.join(LOGDIR, "{0}.log".format(project_name))
+            handler = RotatingFileHandler(_logfile, maxBytes=MAX_BYTES,
+                                          backupCount=BACKUP_COUNT,
+                                          delay=True)
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            _listener = QueueListener(Queue())
+            _listener.add_handler(handler)
+            _listener.start()
+            atexit.register(_listener.stop)
+            logger.addHandler(QueueHandler(_listener.queue))
+            if logger.level == logging.NOTSET:
+                logger.setLevel(level)
+    logger.info("Project {0} started.".format(project_name))
+
+
+def log_json(logger, obj, level=logging.INFO):
+    """Log an object as JSON. The object is serialized only if the level is
+    enabled for the logger.
+
+    :param logger: The logger.
+    :param obj: The object to log.
+    :param level: The level of the message.
+    :type logger: logging.Logger
+    :type level: int
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, json.dumps(obj, cls=TypeEncoder))
+
+
+def summarize_rows(rows, sample_size=SAMPLE_SIZE):
+    """Describe a set of rows by their number and the first few of them,
+    instead of listing all of them.
+
+    :param rows: The labels of the rows.
+    :param sample_size: Number of rows listed.
+    :type rows: pandas.Index
+    :rtype: str
+    :Example:
 
-def setup_logging(project_name):
-    logfile = "{0}_{1}.log".format(project_name, time.time())
-    logging.basicConfig(filename=op.join(LOGDIR, logfile),
-                        level=logging.INFO)
-    logging.info("Project {0} started.".format(project_name))
+    >>> summarize_rows(pd.Index(range(1000)), 3)
+    '1000 rows, starting with [0, 1, 2]'
+    """
+    sample = json.dumps(rows[:sample_size].tolist(), cls=TypeEncoder)
+    if len(rows) <= sample_size:
+        return "{0} rows: {1}".format(len(rows), sample)
+    return "{0} rows, starting with {1}".format(len(rows), sample)
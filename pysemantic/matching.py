@@ -0,0 +1,121 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Regular expression matching for the regex rules of columns."""
+
+import re
+import logging
+import operator
+import threading
+
+import numpy as np
+import pandas as pd
+
+METACHARACTERS = set(".^$*+?{}[]\\|()")
+logger = logging.getLogger(__name__)
+
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+
+def get_matcher(regex):
+    """Get the matcher for a regular expression. Matchers are cached, so that
+    every regex is compiled only once per process.
+
+    :param regex: The regular expression.
+    :type regex: str
+    :rtype: RegexMatcher
+    """
+    with _matchers_lock:
+        matcher = _matchers.get(regex)
+        if matcher is None:
+            matcher = _matchers[regex] = RegexMatcher(regex)
+    return matcher
+
+
+def _is_literal(regex):
+    return len(METACHARACTERS.intersection(regex)) == 0
+
+
+class RegexMatcher(object):
+
+    """Matcher of the elements of a series against a regular expression.
+
+    An element matches if the regex can be found anywhere in it, as with
+    ``re.search``. Literal patterns, optionally anchored at the beginning or
+    the end, are matched with plain string operations instead of the regex
+    engine. Missing and non-string elements always match, they are left for
+    the NA rules to deal with.
+    """
+
+    def __init__(self, regex):
+        """Compile a regular expression.
+
+        :param regex: The regular expression.
+        :type regex: str
+        """
+        self.regex = regex
+        self.pattern = re.compile(regex)
+        self.kind = "regex"
+        self._match = self.pattern.search
+        body = regex
+        head = body.startswith("^")
+        if head:
+            body = body[1:]
+        tail = body.endswith("$") and not body.endswith("\\$")
+        if tail:
+            body = body[:-1]
+        if _is_literal(body):
+            if head and tail:
+                self.kind = "equal"
+                self._match = lambda x: x == body
+            elif head:
+                self.kind = "prefix"
+                self._match = operator.methodcaller("startswith", body)
+            elif tail:
+                self.kind = "suffix"
+                self._match = operator.methodcaller("endswith", body)
+            else:
+                self.kind = "literal"
+                self._match = lambda x: body in x
+        elif head:
+            self.kind = "anchored"
+            self._match = self.pattern.match
+
+    def match_values(self, values):
+        """Match a sequence of values.
+
+        :param values: Sequence of values.
+        :return: Boolean array which is True for the matching values.
+        :rtype: numpy.ndarray
+        """
+        match = self._match
+        return np.fromiter((not isinstance(x, basestring) or
+                            bool(match(x)) for x in values),
+                           dtype=bool, count=len(values))
+
+    def match(self, series):
+        """Match the elements of a series.
+
+        Every distinct value of the series is matched only once: categorical
+        series are matched by their categories, and other series are
+        factorized first, so columns with repeated values are matched in a
+        fraction of the time taken by their length.
+
+        :param series: The series to match.
+        :type series: pandas.Series
+        :return: Boolean array which is True for the matching elements.
+        :rtype: numpy.ndarray
+        """
+        if series.dtype.name == "category":
+            matched = self.match_values(series.cat.categories.values)
+            return np.append(matched, True)[series.cat.codes.values]
+        codes, uniques = pd.factorize(series.values)
+        matched = self.match_values(uniques)
+        # Missing values are coded as -1, and always match.
+        return np.append(matched, True)[codes]
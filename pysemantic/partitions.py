@@ -0,0 +1,211 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Datasets partitioned into hive-style directories.
+
+A partitioned dataset is a directory in which the rows are split by the values
+of one or more partition columns, one level of subdirectories per column,
+named ``<column>=<value>``, e.g.::
+
+    sales/
+        region=north/
+            date=2015-01-01/
+                part-00000.csv
+            date=2015-01-02/
+                part-00000.csv
+        region=south/
+            ...
+
+The partition columns are not stored in the files themselves, their values
+are taken from the names of the directories. Values are percent-encoded, and
+missing values are stored under ``__HIVE_DEFAULT_PARTITION__``. Values are
+read back as strings, and converted to the dtypes of their columns if these
+are declared in the schema, so that a string like ``007`` is not mistaken for
+a number.
+
+When a partitioned dataset is read with a filter on the partition columns,
+only the directories matching the filter are listed, so the files of the
+other partitions are never opened.
+"""
+
+import os
+import os.path as op
+import urllib
+import logging
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from pysemantic.arrowio import write_arrow
+
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+FORMATS = ("csv", "parquet", "feather")
+logger = logging.getLogger(__name__)
+
+
+def encode_value(value):
+    """Encode a partition value as the name of a directory."""
+    if value is None or (isinstance(value, float) and value != value):
+        return NULL_PARTITION
+    if isinstance(value, unicode):
+        value = value.encode("utf-8")
+    return urllib.quote(str(value), safe=" ")
+
+
+def decode_value(name):
+    """Decode the name of a partition directory into a value. Values are
+    returned as strings, and missing values as None."""
+    if name == NULL_PARTITION:
+        return None
+    return urllib.unquote(name)
+
+
+def cast_value(value, dtype=None):
+    """Convert a decoded partition value to the declared dtype of its
+    column. Values of columns without a declared dtype are kept as strings.
+
+    :param value: The decoded value.
+    :param dtype: The declared dtype of the column.
+    :return: The converted value, NaN if it is missing.
+    """
+    if value is None:
+        return np.nan
+    if dtype is None or dtype in (str, unicode, object, "category"):
+        return value
+    if dtype is datetime.date:
+        return pd.Timestamp(value)
+    return np.dtype(dtype).type(value)
+
+
+def is_partitioned_path(path):
+    """Check if a path refers to a partitioned dataset, i.e. a directory
+    containing ``<column>=<value>`` subdirectories.
+
+    :param path: The path to check.
+    :rtype: bool
+    """
+    if not (isinstance(path, basestring) and op.isdir(path)):
+        return False
+    return any([op.isdir(op.join(path, name)) and "=" in name
+                for name in os.listdir(path)])
+
+
+def _matches(filters, column, value):
+    if column not in filters:
+        return True
+    allowed = filters[column]
+    if not isinstance(allowed, list):
+        allowed = [allowed]
+    return value in [decode_value(encode_value(item)) for item in allowed]
+
+
+def find_partitions(path, filters=None):
+    """List the files of a partitioned dataset, along with the values of
+    their partition columns. Directories which don't match the filters are
+    not traversed.
+
+    :param path: Path to the directory of the dataset.
+    :param filters: Dictionary mapping partition columns to a value or a \
+            list of values to keep. Partitions are kept if they match all \
+            of the filters.
+    :type path: str
+    :type filters: dict
+    :return: List of tuples of the path to a file and a dictionary of the \
+            values of its partition columns, sorted by path.
+    :rtype: list
+    :Example:
+
+    >>> find_partitions('/data/sales', {'region': 'north'})
+    [('/data/sales/region=north/part-00000.csv', {'region': 'north'})]
+    """
+    if filters is None:
+        filters = {}
+    partitions = []
+    pruned = 0
+    stack = [(path, {})]
+    while len(stack) > 0:
+        dirpath, values = stack.pop()
+        for name in sorted(os.listdir(dirpath)):
+            fullpath = op.join(dirpath, name)
+            if name.startswith((".", "_")):
+                continue
+            if op.isdir(fullpath):
+                if "=" not in name:
+                    continue
+                column, encoded = name.split("=", 1)
+                value = decode_value(encoded)
+                if not _matches(filters, column, value):
+                    pruned += 1
+                    continue
+                subvalues = dict(values)
+                subvalues[column] = value
+                stack.append((fullpath, subvalues))
+            elif len(values) > 0:
+                partitions.append((fullpath, values))
+    if pruned > 0:
+        logger.info("Pruned {0} partitions of {1}".format(pruned, path))
+    return sorted(partitions)
+
+
+def add_partition_columns(dataframe, values, dtypes=None):
+    """Add the partition columns of a file to the dataframe read from it.
+
+    :param dataframe: The dataframe read from the file.
+    :param values: Dictionary of the decoded values of the partition columns.
+    :param dtypes: Dictionary of the declared dtypes of the partition \
+            columns.
+    :return: The dataframe with the partition columns.
+    """
+    if dtypes is None:
+        dtypes = {}
+    for column, value in sorted(values.iteritems()):
+        dataframe[column] = cast_value(value, dtypes.get(column))
+    return dataframe
+
+
+def _write_partition(args):
+    """Write the rows of one partition. This runs in a worker thread."""
+    dataframe, filepath, fmt = args
+    dirname = op.dirname(filepath)
+    if not op.isdir(dirname):
+        try:
+            os.makedirs(dirname)
+        except OSError:
+            # Another worker created it in the meantime.
+            if not op.isdir(dirname):
+                raise
+    if fmt == "csv":
+        dataframe.to_csv(filepath, index=False)
+    else:
+        write_arrow(dataframe, filepath)
+    return filepath
+
+
+def split_partitions(dataframe, by):
+    """Split a dataframe by the values of the partition columns.
+
+    :param dataframe: The dataframe to split.
+    :param by: Names of the partition columns.
+    :type dataframe: pandas.DataFrame
+    :type by: list
+    :return: List of tuples of the relative path of the partition directory \
+            and the rows of the partition, without the partition columns.
+    :rtype: list
+    """
+    # Rows with missing keys would be dropped by groupby.
+    keys = [dataframe[col].astype(object).where(dataframe[col].notnull(),
+                                                NULL_PARTITION) for col in by]
+    parts = []
+    for values, group in dataframe.groupby(keys, sort=True):
+        if len(by) == 1:
+            values = (values,)
+        dirname = op.join(*["{0}={1}".format(col, encode_value(value))
+                            for col, value in zip(by, values)])
+        parts.append((dirname, group.drop(by, axis=1)))
+    return parts
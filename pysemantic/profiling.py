@@ -0,0 +1,185 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Profiles of the stages of loading a dataset.
+
+Every ``Project.load_dataset`` records a `LoadProfile`: the wall time, the
+number of rows going in and out and the change in resident memory of each
+stage of the load (verifying checksums, reading headers, parsing each file,
+retrying a failed parse, and each dataframe rule), the time and the rows
+dropped by each column rule, the number of bytes of the files parsed, and the
+peak resident memory sampled at the end of each stage.
+
+The profile being recorded is kept in a thread-local variable, so that the
+validators and parsers can add to it without it being passed around. When no
+profile is being recorded, the functions of this module do nothing. Recording
+a stage costs a couple of clock reads and a read of ``/proc/self/statm``, so
+profiles are always recorded.
+"""
+
+import os
+import time
+import resource
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+_PAGESIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def get_rss():
+    """Get the resident memory of the process in bytes. Where ``/proc`` is
+    not available, the peak resident memory is returned instead."""
+    try:
+        with open("/proc/self/statm", "r") as fid:
+            return int(fid.read().split()[1]) * _PAGESIZE
+    except (IOError, OSError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LoadProfile(object):
+
+    """Profile of the load of a dataset."""
+
+    def __init__(self, dataset_name):
+        """
+        :param dataset_name: Name of the dataset being loaded.
+        :type dataset_name: str
+        """
+        self.dataset_name = dataset_name
+        self.stages = []
+        self.rules = []
+        self.bytes_read = 0
+        self.rows = None
+        self.time = None
+        self.start_memory = get_rss()
+        self.peak_memory = self.start_memory
+        self._start = time.time()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, rows_in=None, **info):
+        """Time a stage of the load. The stage is recorded even if it raises
+        an exception.
+
+        :param name: Name of the stage.
+        :param rows_in: Number of rows going into the stage.
+        :param info: Other information about the stage, e.g. the file it \
+                reads.
+        :return: Context manager yielding the record of the stage, in which \
+                ``rows_out`` can be set.
+        """
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None}
+        record.update(info)
+        memory = get_rss()
+        start = time.time()
+        try:
+            yield record
+        except Exception as exc:
+            record['error'] = "{0}: {1}".format(type(exc).__name__, exc)
+            raise
+        finally:
+            record['time'] = time.time() - start
+            end_memory = get_rss()
+            record['memory'] = end_memory - memory
+            with self._lock:
+                self.peak_memory = max(self.peak_memory, end_memory)
+                self.stages.append(record)
+
+    def add_rule(self, column, rule, elapsed, rows_in, rows_out):
+        """Record the enforcement of a column rule."""
+        with self._lock:
+            self.rules.append({'column': column, 'rule': rule,
+                               'time': elapsed, 'rows_in': rows_in,
+                               'rows_out': rows_out})
+
+    def add_bytes(self, nbytes):
+        """Record the number of bytes of a file read."""
+        with self._lock:
+            self.bytes_read += nbytes
+
+    def finish(self, dataframe=None):
+        """Stop the profile, after the dataset has been loaded."""
+        self.time = time.time() - self._start
+        self.peak_memory = max(self.peak_memory, get_rss())
+        if dataframe is not None:
+            self.rows = dataframe.shape[0]
+
+    def to_dict(self):
+        """Get the profile as a dictionary, e.g. to serialize it."""
+        return {'dataset': self.dataset_name, 'time': self.time,
+                'rows': self.rows, 'bytes_read': self.bytes_read,
+                'start_memory': self.start_memory,
+                'peak_memory': self.peak_memory,
+                'stages': [dict(record) for record in self.stages],
+                'rules': [dict(record) for record in self.rules]}
+
+    def __repr__(self):
+        lines = ["Load profile of {0}: {1:.3f}s, {2} rows, {3} bytes read, "
+                 "peak memory {4:.1f} MB".format(
+                     self.dataset_name, self.time or 0.0, self.rows,
+                     self.bytes_read, self.peak_memory / 2.0 ** 20)]
+        for record in self.stages:
+            lines.append("  {0:<24} {1:>8.3f}s {2:>10} -> {3}".format(
+                record['stage'], record['time'], record['rows_in'],
+                record['rows_out']))
+        for record in self.rules:
+            lines.append("  {0:<24} {1:>8.3f}s {2:>10} -> {3}".format(
+                "{0}[{1}]".format(record['rule'], record['column']),
+                record['time'], record['rows_in'], record['rows_out']))
+        return "\n".join(lines)
+
+
+@contextmanager
+def activate(profile):
+    """Make a profile the one recorded by the current thread. Worker threads
+    loading the files of a dataset activate the profile of the load.
+
+    :param profile: The profile, or None to stop recording.
+    :type profile: LoadProfile
+    """
+    previous = getattr(_local, "profile", None)
+    _local.profile = profile
+    try:
+        yield profile
+    finally:
+        _local.profile = previous
+
+
+def current_profile():
+    """Get the profile recorded by the current thread, if any."""
+    return getattr(_local, "profile", None)
+
+
+@contextmanager
+def stage(name, rows_in=None, **info):
+    """Time a stage of the load being profiled by the current thread. See
+    `LoadProfile.stage`. If no load is being profiled, the yielded record is
+    discarded."""
+    profile = current_profile()
+    if profile is None:
+        yield {}
+    else:
+        with profile.stage(name, rows_in, **info) as record:
+            yield record
+
+
+def record_rule(column, rule, elapsed, rows_in, rows_out):
+    """Record the enforcement of a column rule in the load being profiled by
+    the current thread, if any."""
+    profile = current_profile()
+    if profile is not None:
+        profile.add_rule(column, rule, elapsed, rows_in, rows_out)
+
+
+def record_bytes(nbytes):
+    """Record the number of bytes of a file read by the load being profiled
+    by the current thread, if any."""
+    profile = current_profile()
+    if profile is not None:
+        profile.add_bytes(nbytes)
@@ -9,33 +9,47 @@
 """The Project class."""
 
 import os
+import sys
+import copy
+import time
 import warnings
 import textwrap
 import pprint
 import logging
-import json
+import weakref
+import threading
+from Queue import Queue, Full
+from collections import Mapping
 from ConfigParser import RawConfigParser
 import os.path as op
+from multiprocessing.pool import ThreadPool
 
-import yaml
 import pandas as pd
 import numpy as np
 from pandas.parser import CParserError
+from pandas._hash import hash_object_array
 
 from pysemantic.validator import SchemaValidator, DataFrameValidator
-from pysemantic.errors import MissingProject, MissingConfigError
-from pysemantic.loggers import setup_logging
-from pysemantic.utils import TypeEncoder, colnames
-from pysemantic.exporters import AerospikeExporter
-
-try:
-    from yaml import CDumper as Dumper
-    from yaml import CLoader as Loader
-except ImportError:
-    from yaml import Dumper
-    from yaml import Loader
+from pysemantic.errors import (MissingProject, MissingConfigError,
+                               DatasetFileError)
+from pysemantic.loggers import setup_logging, log_json
+from pysemantic.utils import colnames, get_hdf_format, append_hdf
+from pysemantic.exporters import AerospikeExporter, PartitionedExporter
+from pysemantic.partitions import add_partition_columns
+from pysemantic.columnar import read_columnar, write_columnar
+from pysemantic.arrowio import get_arrow_format, read_arrow, write_arrow
+from pysemantic.specfile import read_specfile, write_specfile
+from pysemantic.catalog import get_catalog
+from pysemantic.rejections import Rejections
+from pysemantic.profiling import (LoadProfile, activate, current_profile,
+                                  stage, record_bytes)
+from pysemantic.cache import (DiskCache, MemoryCache, get_hash,
+                              get_files_fingerprint)
 
 CONF_FILE_NAME = os.environ.get("PYSEMANTIC_CONFIG", "pysemantic.conf")
+DEFAULT_CHUNKSIZE = 100000
+# Keys of the two 64 bit halves of the hashes of strings in rows.
+_ROW_HASH_KEYS = ("pysemantic.rows1", "pysemantic.rows2")
 logger = logging.getLogger(__name__)
 
 
@@ -110,11 +124,9 @@ def add_dataset(project_name, dataset_name, dataset_specs):
     :return: None
     """
     data_dict = get_default_specfile(project_name)
-    with open(data_dict, "r") as f:
-        spec = yaml.load(f, Loader=Loader)
+    spec = read_specfile(data_dict)
     spec[dataset_name] = dataset_specs
-    with open(data_dict, "w") as f:
-        yaml.dump(spec, f, Dumper=Dumper, default_flow_style=False)
+    write_specfile(data_dict, spec)
 
 
 def remove_dataset(project_name, dataset_name):
@@ -127,15 +139,15 @@ def remove_dataset(project_name, dataset_name):
     :return: None
     """
     data_dict = get_default_specfile(project_name)
-    with open(data_dict, "r") as f:
-        spec = yaml.load(f, Loader=Loader)
+    spec = read_specfile(data_dict)
     del spec[dataset_name]
-    with open(data_dict, "w") as f:
-        yaml.dump(spec, f, Dumper=Dumper, default_flow_style=False)
+    write_specfile(data_dict, spec)
 
 
 def get_datasets(project_name=None):
     """Get names of all datasets registered under the project `project_name`.
+    The names are read from the catalog of the configuration file, which only
+    parses the schema files that have changed since they were last listed.
 
     :param project_name: name of the projects to list the datasets from. If \
             `None` (default), datasets under all projects are returned.
@@ -152,14 +164,18 @@ def get_datasets(project_name=None):
     {'skynet': ['sarah_connor', 'john_connor', 'kyle_reese'],
      'south park': ['stan', 'kyle', 'cartman', 'kenny']}
     """
+    catalog = get_catalog(locate_config_file())
     if project_name is not None:
-        specs = get_schema_specs(project_name)
-        return specs.keys()
+        if project_name not in dict(catalog.get_projects()):
+            raise MissingProject("Project {0} not found in the "
+                                 "configuration.".format(project_name))
+        return [info['name'] for info in catalog.get_datasets(project_name)]
     else:
         dataset_names = {}
-        projects = get_projects()
+        projects = catalog.get_projects()
         for project_name, _ in projects:
-            dataset_names[project_name] = get_datasets(project_name)
+            dataset_names[project_name] = [info['name'] for info in
+                                           catalog.get_datasets(project_name)]
         return dataset_names
 
 
@@ -193,7 +209,7 @@ def set_schema_fpath(project_name, schema_fpath):
 
 def get_projects():
     """Get the list of projects currently registered with pysemantic as a
-    list.
+    list. The projects are read from the catalog of the configuration file.
 
     :return: List of tuples, such that each tuple is (project_name, \
             location_of_specfile)
@@ -203,15 +219,7 @@ def get_projects():
     >>> get_projects()
     ['skynet', 'south park']
     """
-    path = locate_config_file()
-    parser = RawConfigParser()
-    parser.read(path)
-    projects = []
-    for section in parser.sections():
-        project_name = section
-        specfile = parser.get(section, "specfile")
-        projects.append((project_name, specfile))
-    return projects
+    return get_catalog(locate_config_file()).get_projects()
 
 
 def get_schema_specs(project_name, dataset_name=None):
@@ -236,8 +244,7 @@ def get_schema_specs(project_name, dataset_name=None):
      }
     """
     schema_file = get_default_specfile(project_name)
-    with open(schema_file, "r") as f:
-        specs = yaml.load(f, Loader=Loader)
+    specs = read_specfile(schema_file)
     if dataset_name is not None:
         return specs[dataset_name]
     return specs
@@ -258,12 +265,10 @@ def set_schema_specs(project_name, dataset_name, **kwargs):
                          path='/path/to/new/file.csv', delimiter=new_delimiter)
     """
     schema_file = get_default_specfile(project_name)
-    with open(schema_file, "r") as f:
-        specs = yaml.load(f, Loader=Loader)
+    specs = read_specfile(schema_file)
     for key, value in kwargs.iteritems():
         specs[dataset_name][key] = value
-    with open(schema_file, "w") as f:
-        yaml.dump(specs, f, Dumper=Dumper, default_flow_style=False)
+    write_specfile(schema_file, specs)
 
 
 def view_projects():
@@ -315,11 +320,331 @@ def remove_project(project_name):
     return result
 
 
+def _is_numeric_dtype(dtype):
+    """Check if a dtype declared in a schema is numerical."""
+    try:
+        return np.dtype(dtype).kind in "iuf"
+    except TypeError:
+        return False
+
+
+def _get_paths(parser_args):
+    """Get the paths of the files read with the given parser arguments."""
+    if isinstance(parser_args, dict):
+        parser_args = [parser_args]
+    return [argset.get('filepath_or_buffer', argset.get('io'))
+            for argset in parser_args]
+
+
+def _split_rows(dataframe, chunksize):
+    """Split a dataframe into consecutive slices of `chunksize` rows. An empty
+    dataframe is yielded as a single empty slice, so that its columns are
+    known."""
+    if dataframe.shape[0] == 0:
+        yield dataframe.copy()
+    for start in xrange(0, dataframe.shape[0], chunksize):
+        yield dataframe.iloc[start:start + chunksize].copy()
+
+
+def _skip_empty(chunks):
+    """Drop the empty dataframes of a sequence of chunks. If all of them are
+    empty, the last one is yielded, so that the columns are known."""
+    is_empty, last = True, None
+    for chunk in chunks:
+        if chunk.shape[0] > 0:
+            is_empty = False
+            yield chunk
+        else:
+            last = chunk
+    if is_empty and last is not None:
+        yield last
+
+
+def _prefetch(chunks):
+    """Read the next chunk of a sequence of chunks in a background thread
+    while the current one is being consumed, so that reading and writing a
+    dataset overlap. At most one chunk is read ahead. When the consumer stops,
+    the thread is joined and the sequence is closed, along with the file it
+    reads. Errors raised while reading are raised again in the consumer with
+    their original traceback."""
+    queue = Queue(maxsize=1)
+    stop = threading.Event()
+
+    def put(item):
+        """Queue an item, unless the consumer stops first. Returns whether
+        the item was queued."""
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if not put((chunk, None)):
+                    return
+            put((None, None))
+        except Exception:
+            put((None, sys.exc_info()))
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            chunk, exc_info = queue.get()
+            if exc_info is not None:
+                raise exc_info[0], exc_info[1], exc_info[2]
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        stop.set()
+        thread.join()
+        # The producer has stopped, so the sequence can be closed from here.
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def _head_rows(chunks, nrows=None):
+    """Truncate a sequence of chunks after the first `nrows` rows."""
+    for chunk in chunks:
+        if nrows is not None:
+            if nrows <= 0:
+                break
+            chunk = chunk.iloc[:nrows].copy()
+            nrows -= chunk.shape[0]
+        yield chunk
+
+
+def _sample_rows(chunks, count=None):
+    """Draw a random sample of `count` rows from a sequence of chunks.
+
+    Every row is assigned a random key, and only the rows with the `count`
+    smallest keys are retained while iterating, so at most `count` rows and a
+    chunk are held in memory at a time. The sample is returned in the order of
+    the keys, i.e. shuffled. If `count` is None, all rows are shuffled.
+    """
+    if count is None:
+        logger.warn("Random row selection without a count requires the whole "
+                    "dataset to be held in memory.")
+    sample = None
+    keys = np.array([])
+    for chunk in chunks:
+        chunk_keys = np.random.random(chunk.shape[0])
+        if sample is not None:
+            chunk = pd.concat([sample, chunk], axis=0)
+            chunk_keys = np.r_[keys, chunk_keys]
+        order = np.argsort(chunk_keys, kind="mergesort")[:count]
+        sample = chunk.iloc[order]
+        keys = chunk_keys[order]
+    return sample
+
+
+def _select_rows(chunks, nrows, chunksize):
+    """Apply the `nrows` dataframe rule over a sequence of chunks."""
+    if isinstance(nrows, dict):
+        if len(nrows) > 0:
+            if nrows.get('random', False):
+                sample = _sample_rows(chunks, nrows.get('count'))
+                if sample is None:
+                    return iter([])
+                return _split_rows(sample, chunksize)
+            return _head_rows(chunks, nrows.get('count'))
+    elif callable(nrows):
+        return (chunk.ix[chunk.index[nrows(chunk.index)]] for chunk in chunks)
+    return chunks
+
+
+def _mix(hashes):
+    """Scramble an array of 64 bit hashes in place with the finalizer of
+    splitmix64."""
+    hashes ^= hashes >> np.uint64(30)
+    hashes *= np.uint64(0xbf58476d1ce4e5b9)
+    hashes ^= hashes >> np.uint64(27)
+    hashes *= np.uint64(0x94d049bb133111eb)
+    hashes ^= hashes >> np.uint64(31)
+    return hashes
+
+
+def _column_hashes(values):
+    """Hash the values of a column.
+
+    Numbers are hashed by their bits, with integral floats hashed as integers,
+    so that a column parsed as integers in one chunk and as floats in another
+    hashes the same. Other values are hashed by their string representation,
+    with the keys of `_ROW_HASH_KEYS`. Every value is also tagged with its
+    kind, so that e.g. the string "1" and the number 1 differ, and missing
+    values all hash the same.
+
+    :return: List of two arrays of 64 bit hashes of the values, one per key.
+    """
+    kind = values.dtype.kind
+    tags = np.zeros(values.shape[0], dtype=np.uint64)
+    missing = np.asarray(pd.isnull(values))
+    if kind in "biu":
+        bits = [values.astype(np.int64).view(np.uint64)] * 2
+        tags[:] = 1
+    elif kind == "f":
+        values = values.astype(np.float64)
+        with np.errstate(invalid="ignore"):
+            integral = (values == np.floor(values)) & \
+                (np.abs(values) < 2.0 ** 63)
+        bits = values.view(np.uint64).copy()
+        bits[integral] = values[integral].astype(np.int64).view(np.uint64)
+        bits = [bits] * 2
+        tags[:] = 2
+        tags[integral] = 1
+    elif kind in "mM":
+        bits = [values.view(np.int64).view(np.uint64)] * 2
+        tags[:] = 3 if kind == "M" else 4
+    else:
+        codes, uniques = pd.factorize(values)
+        strings = np.empty(len(uniques), dtype=object)
+        unique_tags = np.empty(len(uniques), dtype=np.uint64)
+        for i, value in enumerate(uniques):
+            if isinstance(value, basestring):
+                strings[i] = value
+                unique_tags[i] = 5
+            else:
+                strings[i] = repr(value)
+                unique_tags[i] = 6
+        found = codes != -1
+        bits = []
+        for key in _ROW_HASH_KEYS:
+            hashes = np.zeros(values.shape[0], dtype=np.uint64)
+            if len(uniques) > 0:
+                unique_hashes = hash_object_array(strings, key, "utf8")
+                hashes[found] = unique_hashes[codes[found]]
+            bits.append(hashes)
+        tags[found] = unique_tags[codes[found]]
+    result = []
+    for salt, hashes in zip((0x9e3779b97f4a7c15, 0xc2b2ae3d27d4eb4f), bits):
+        hashes = _mix(_mix(hashes ^ np.uint64(salt)) + tags)
+        hashes[missing] = salt
+        result.append(hashes)
+    return result
+
+
+def _row_hashes(chunk):
+    """Get 128 bit hashes of the rows of a dataframe, as Python integers.
+    Missing values hash the same, so that they compare equal across rows."""
+    first = np.zeros(chunk.shape[0], dtype=np.uint64)
+    second = np.zeros(chunk.shape[0], dtype=np.uint64)
+    for colname in chunk:
+        values = np.asarray(chunk[colname])
+        col_first, col_second = _column_hashes(values)
+        first = _mix(first ^ col_first)
+        second = _mix(second ^ col_second)
+    return [(x << 64) | y for x, y in zip(first.tolist(), second.tolist())]
+
+
+def _get_partition_rules(validator, df_rules):
+    """Get the dataframe rules enforced on each file of a multifile dataset.
+    The files of a partitioned dataset are parts of the same dataset, so its
+    dataframe rules apply to each of them, except for the selection of rows,
+    which is ignored with a warning. The files of other multifile datasets are
+    cleaned with the default rules, i.e. None is returned."""
+    if not validator.is_partitioned:
+        return None
+    if validator.specification.get('nrows') is not None or \
+            df_rules.get('nrows'):
+        msg = "The nrows of the partitioned dataset {0} cannot be applied " + \
+              "to its files, ignoring it."
+        msg = msg.format(validator.name)
+        logger.warn(msg)
+        warnings.warn(msg, UserWarning)
+    return dict([(key, value) for key, value in df_rules.iteritems()
+                 if key != "nrows"])
+
+
+def _drop_seen_rows(chunk, seen):
+    """Drop rows from a chunk which are duplicates of rows either within the
+    chunk, or of rows that have been seen previously.
+
+    Rows are compared by a 128 bit hash of their values (see `_row_hashes`),
+    so the set of seen rows holds an integer of fixed size for every unique
+    row, whatever the number of its columns or the size of its values.
+
+    :param chunk: The dataframe to deduplicate.
+    :param seen: Set of the hashes of the rows seen previously. It is updated \
+            with the rows of the chunk.
+    :type seen: set
+    :return: The deduplicated chunk.
+    """
+    keys = _row_hashes(chunk)
+    is_dup = pd.Series(keys, dtype=object).duplicated().values
+    if len(seen) > 0:
+        is_dup |= np.fromiter((key in seen for key in keys), dtype=bool,
+                              count=len(keys))
+    seen.update(keys)
+    return chunk[~is_dup]
+
+
+class SchemaValidators(Mapping):
+
+    """Read-only mapping of dataset names to their schema validators.
+
+    The names are the keys of the specifications, but the validator of a
+    dataset is only built when it is first accessed, so that projects with
+    many datasets are cheap to create when only some of them are used.
+    """
+
+    def __init__(self, specifications, specfile=None):
+        """Create the mapping without building any validator.
+
+        :param specifications: Dictionary mapping dataset names to their \
+                schema.
+        :param specfile: Path to the schema file, if any.
+        :type specifications: dict
+        :type specfile: str
+        """
+        self.specifications = specifications
+        self.specfile = specfile
+        self._validators = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self._lock:
+            validator = self._validators.get(name)
+            if validator is None:
+                validator = self._validators[name] = self._build(name)
+        return validator
+
+    def __iter__(self):
+        return iter(self.specifications)
+
+    def __len__(self):
+        return len(self.specifications)
+
+    def __contains__(self, name):
+        return name in self.specifications
+
+    def _build(self, name):
+        specs = self.specifications[name]
+        logger.info("Schema for dataset {0}:".format(name))
+        log_json(logger, specs)
+        kwargs = dict(specification=specs, name=name,
+                      is_pickled=specs.get('pickle', False))
+        if self.specfile is not None:
+            kwargs['specfile'] = self.specfile
+        return SchemaValidator(**kwargs)
+
+    @property
+    def built(self):
+        """Names of the datasets whose validators have been built."""
+        return self._validators.keys()
+
+
 class Project(object):
 
     """The Project class, the entry point for most things in this module."""
 
-    def __init__(self, project_name=None, parser=None, schema=None):
+    def __init__(self, project_name=None, parser=None, schema=None,
+                 cache_size=0):
         """The Project class.
 
         :param project_name: Name of the project as specified in the \
@@ -332,6 +657,10 @@ class Project(object):
         this argument is supplied (not ``None``), the ``project_name`` is
         ignored, no specfile is read, and all the specifications for the data
         are inferred from this dictionary.
+        :param cache_size: Maximum number of bytes used by loaded datasets \
+                that are kept in memory, so that loading them again returns \
+                a copy instead of reading the file. If 0 (default), loaded \
+                datasets are not kept.
         """
         if project_name is not None:
             setup_logging(project_name)
@@ -341,85 +670,190 @@ class Project(object):
                                                                     self.specfile))
         else:
             setup_logging("no_name")
+            self.project_name = None
             logger.info("Schema defined by user at runtime. Not reading any "
                     "specfile.")
             self.specfile = None
-        self.validators = {}
+        self._disk_cache = DiskCache()
+        self._memory_cache = MemoryCache(cache_size)
         if parser is not None:
             self.user_specified_parser = True
         else:
             self.user_specified_parser = False
         self.parser = parser
         if self.specfile is not None:
-            with open(self.specfile, 'r') as f:
-                specifications = yaml.load(f, Loader=Loader)
+            specifications = read_specfile(self.specfile)
         else:
             specifications = schema
         self.column_rules = {}
         self.df_rules = {}
+        self._dtype_reports = {}
+        self._regex_reports = {}
+        self._rejections = {}
+        self._cached_rejections = {}
+        self._rejected_frames = {}
+        self._recorded_nrows = {}
+        self._load_profiles = {}
+        self._load_hooks = []
+        self.validators = SchemaValidators(specifications, self.specfile)
         for name, specs in specifications.iteritems():
-            logger.info("Schema for dataset {0}:".format(name))
-            logger.info(json.dumps(specs, cls=TypeEncoder))
-            is_pickled = specs.get('pickle', False)
-            if self.specfile is not None:
-                self.validators[name] = SchemaValidator(specification=specs,
-                                                        specfile=self.specfile,
-                                                        name=name,
-                                                        is_pickled=is_pickled)
-            else:
-                self.validators[name] = SchemaValidator(specification=specs,
-                                                        name=name,
-                                                        is_pickled=is_pickled)
             self.column_rules[name] = specs.get('column_rules', {})
             self.df_rules[name] = specs.get('dataframe_rules', {})
         self.specifications = specifications
 
-    def export_dataset(self, dataset_name, dataframe=None, outpath=None):
+    def export_dataset(self, dataset_name, dataframe=None, outpath=None,
+                       chunksize=None, save_rejections=False):
         """Export a dataset to an exporter defined in the schema. If nothing is
         specified in the schema, simply export to a CSV file such named
-        <dataset_name>.csv
+        <dataset_name>.csv. If `outpath` ends with ``.pscol``, the dataset is
+        exported to a memory-mapped columnar store, which can be loaded by
+        setting it as the path of a dataset. Likewise, if it ends with
+        ``.parquet``, ``.pq`` or ``.feather``, the dataset is exported to a
+        Parquet or Feather file. If the exporter of the dataset is
+        ``partitioned``, the dataset is exported to a directory partitioned
+        by the values of some of its columns, at `outpath` if given.
+
+        If `chunksize` is given, the dataset is streamed to the exporter in
+        cleaned chunks (see `iter_dataset`) instead of being loaded whole:
+        chunks are appended to CSV files and to HDF tables, and written to
+        aerospike in batches, while the next chunk is read in the background.
+        Parquet files are written a row group per chunk. Columnar stores and
+        Feather files cannot be appended to, so the chunks are concatenated
+        before being written.
+
+        If `save_rejections` is True, the rows rejected while cleaning the
+        dataset (see `rejections`) are written next to the exported file or
+        directory, to ``<outpath>.rejections.npz``. They can be read with
+        `pysemantic.rejections.Rejections.load`. Rejections are only
+        recorded when the dataset is loaded whole, and only written if the
+        exported dataframe is the one returned by that load.
 
         :param dataset_name: Name of the dataset to exporter.
         :param dataframe: Pandas dataframe to export. If None (default), this \
                 dataframe is loaded using the `load_dataset` method.
+        :param outpath: Path to the exported file. If None (default), this is \
+                <dataset_name>.csv
+        :param chunksize: Number of rows exported at a time. If None \
+                (default), the dataset is exported at once.
+        :param save_rejections: Whether to write the rejected rows to a \
+                sidecar file.
         :type dataset_name: Str
+        :type chunksize: int
+        :type save_rejections: bool
+        :Example:
+
+        >>> demo_project = Project('pysemantic_demo')
+        >>> demo_project.export_dataset('iris', outpath='/tmp/iris.pscol')
+        >>> demo_project.export_dataset('iris', outpath='/tmp/iris.h5',
+        ...                             chunksize=50)
         """
-        if dataframe is None:
-            dataframe = self.load_dataset(dataset_name)
+        if chunksize is None:
+            if dataframe is None:
+                dataframe = self.load_dataset(dataset_name)
+            chunks = [dataframe]
+        elif dataframe is None:
+            chunks = _prefetch(self.iter_dataset(dataset_name, chunksize))
+        else:
+            chunks = _split_rows(dataframe, chunksize)
         config = self.specifications[dataset_name].get('exporter')
-        if outpath is None:
-            outpath = dataset_name + ".csv"
         if config is not None:
             if config['kind'] == "aerospike":
                 config['namespace'] = self.project_name
                 config['set'] = dataset_name
-                exporter = AerospikeExporter(config, dataframe)
+                exporter = AerospikeExporter(config, chunks)
+                exporter.run()
+            elif config['kind'] == "partitioned":
+                config = dict(config)
+                if outpath is not None or 'path' not in config:
+                    config['path'] = outpath or dataset_name
+                outpath = config['path']
+                exporter = PartitionedExporter(config, chunks)
                 exporter.run()
         else:
-            suffix = outpath.split('.')[-1]
+            if outpath is None:
+                outpath = dataset_name + ".csv"
+            suffix = outpath.rstrip('/').split('.')[-1]
             if suffix in ("h5", "hdf"):
                 group = r'/{0}/{1}'.format(self.project_name, dataset_name)
-                dataframe.to_hdf(outpath, group)
+                if chunksize is None:
+                    dataframe.to_hdf(outpath, group,
+                                     format=get_hdf_format(dataframe))
+                else:
+                    categories = {}
+                    column_rules = self.column_rules.get(dataset_name, {})
+                    for col, rules in column_rules.iteritems():
+                        if "unique_values" in rules:
+                            categories[col] = rules['unique_values']
+                    append_hdf(outpath, group, chunks, categories)
             elif suffix == "csv":
-                dataframe.to_csv(outpath, index=False)
+                mode, header = "w", True
+                for chunk in chunks:
+                    chunk.to_csv(outpath, index=False, mode=mode,
+                                 header=header)
+                    mode, header = "a", False
+            elif get_arrow_format(outpath) == "parquet":
+                write_arrow(chunks, outpath)
+            elif suffix in ("pscol", "feather"):
+                if chunksize is not None:
+                    msg = "{0} files cannot be appended to, the dataset " + \
+                          "{1} is exported at once."
+                    msg = msg.format(suffix, dataset_name)
+                    logger.warn(msg)
+                    warnings.warn(msg, UserWarning)
+                    dataframe = pd.concat(list(chunks), axis=0)
+                if suffix == "pscol":
+                    write_columnar(dataframe, outpath)
+                else:
+                    write_arrow(dataframe, outpath)
+        if save_rejections:
+            self._save_rejections(dataset_name, outpath, chunksize, dataframe)
+
+    def _save_rejections(self, dataset_name, outpath, chunksize=None,
+                         dataframe=None):
+        """Write the rejections of a dataset next to its exported file. They
+        are only written if the exported dataframe is the one returned by the
+        load which recorded them.
+
+        :param dataset_name: Name of the dataset
+        :param outpath: Path to the exported file or directory.
+        :param chunksize: Number of rows exported at a time.
+        :param dataframe: The exported dataframe.
+        :return: Path to the written file, or None if the rejections are not \
+                available.
+        """
+        rejections = self._rejections.get(dataset_name)
+        loaded = self._rejected_frames.get(dataset_name)
+        if outpath is None or chunksize is not None or rejections is None or \
+                loaded is None or loaded() is not dataframe:
+            msg = "The rejections of the dataset {0} are only recorded " + \
+                  "when it is read whole from its files or from memory, " + \
+                  "and only written along with the dataframe returned by " + \
+                  "that load, they are not written."
+            msg = msg.format(dataset_name)
+            logger.warn(msg)
+            warnings.warn(msg, UserWarning)
+            return None
+        path = outpath.rstrip("/") + ".rejections.npz"
+        rejections.save(path)
+        logger.info("Rejections of the dataset {0} written to {1}".format(
+                                                           dataset_name, path))
+        return path
 
     def reload_data_dict(self):
         """Reload the data dictionary and re-populate the schema."""
 
-        with open(self.specfile, "r") as f:
-            specifications = yaml.load(f, Loader=Loader)
-        self.validators = {}
+        specifications = read_specfile(self.specfile)
+        self.validators = SchemaValidators(specifications, self.specfile)
         self.column_rules = {}
         self.df_rules = {}
+        self._dtype_reports = {}
+        self._regex_reports = {}
+        self._rejections = {}
+        self._cached_rejections = {}
+        self._rejected_frames = {}
+        self._memory_cache.invalidate()
         logger.info("Reloading project information.")
         for name, specs in specifications.iteritems():
-            logger.info("Schema for dataset {0}:".format(name))
-            logger.info(json.dumps(specs, cls=TypeEncoder))
-            is_pickled = specs.get('pickle', False)
-            self.validators[name] = SchemaValidator(specification=specs,
-                                                    specfile=self.specfile,
-                                                    name=name,
-                                                    is_pickled=is_pickled)
             self.column_rules[name] = specs.get('column_rules', {})
             self.df_rules[name] = specs.get('dataframe_rules', {})
         self.specifications = specifications
@@ -434,10 +868,119 @@ class Project(object):
         >>> project.datasets
         ['sarah connor', 'john connor', 'kyle reese']
         """
-        return self.validators.keys()
+        return self.specifications.keys()
+
+    def dtype_report(self, dataset_name):
+        """Get the columns whose declared dtypes had to be coerced when the
+        dataset was last loaded. This is only populated for datasets with
+        ``coerce_dtypes`` enabled in the schema.
+
+        :param dataset_name: Name of the dataset
+        :type dataset_name: str
+        :return: List of dictionaries, each containing the column name, the \
+                declared dtype, the dtype it was loaded as, the reason and \
+                the number of offending values.
+        :rtype: list
+        :Example:
+
+        >>> project = Project('skynet')
+        >>> df = project.load_dataset('kyle reese')
+        >>> project.dtype_report('kyle reese')
+        [{'column': 'age', 'count': 3, 'declared': 'int64',
+          'dtype': 'float64', 'file': '/path/to/kyle_reese.tsv',
+          'reason': 'missing values'}]
+        """
+        return self._dtype_reports.get(dataset_name, [])
+
+    def regex_report(self, dataset_name):
+        """Get the number of values matched and rejected by the regex rules of
+        the columns of a dataset, when it was last read from its files.
+
+        :param dataset_name: Name of the dataset
+        :type dataset_name: str
+        :return: Dictionary mapping the name of each column which has a regex \
+                rule to the number of its matched and rejected values.
+        :rtype: dict
+        :Example:
+
+        >>> project = Project('pysemantic_demo')
+        >>> df = project.load_dataset('person_activity')
+        >>> project.regex_report('person_activity')
+        {'sequence_name': {'matched': 100, 'rejected': 0},
+         'tag': {'matched': 98, 'rejected': 2}}
+        """
+        return self._regex_reports.get(dataset_name, {})
+
+    def rejections(self, dataset_name):
+        """Get the rows rejected by each rule of a dataset, when it was last
+        loaded by `load_dataset`. If the dataset was then read from the
+        memory cache, these are the rejections of the load which filled the
+        cache, and if it was read from the disk cache or from a columnar
+        store, they are not available. Rows are numbered by their
+        position in the dataset as parsed, before any rule is enforced, and
+        the rows of the files of a multifile dataset are numbered in the
+        order of the files. A row may be rejected by several rules.
+
+        :param dataset_name: Name of the dataset
+        :type dataset_name: str
+        :return: The rejections, or None if they are not available.
+        :rtype: pysemantic.rejections.Rejections
+        :Example:
+
+        >>> project = Project('pysemantic_demo')
+        >>> df = project.load_dataset('person_activity')
+        >>> rejections = project.rejections('person_activity')
+        >>> rejections.counts()
+        {('tag', 'regex'): 2}
+        >>> rejections['tag', 'regex']
+        array([17, 51])
+        """
+        return self._rejections.get(dataset_name)
+
+    def cache_info(self):
+        """Get the statistics of the in-memory cache of loaded datasets.
+
+        :return: Dictionary containing the number of hits and misses, the \
+                current and maximum size of the cache in bytes and the names \
+                of the cached datasets, from the least to the most recently \
+                used.
+        :rtype: dict
+        :Example:
+
+        >>> project = Project('pysemantic_demo', cache_size=2 ** 30)
+        >>> iris = project.load_dataset('iris')
+        >>> iris = project.load_dataset('iris')
+        >>> project.cache_info()
+        {'hits': 1, 'keys': ['iris'], 'max_size': 1073741824, 'misses': 1,
+         'size': 15900}
+        """
+        return self._memory_cache.info()
+
+    def invalidate_cache(self, dataset_name=None):
+        """Remove cached copies of datasets from the in-memory and on-disk
+        caches.
+
+        :param dataset_name: Name of the dataset to remove. If None \
+                (default), all datasets of the project are removed.
+        :type dataset_name: str
+        """
+        if dataset_name is None:
+            names = self.specifications.keys()
+        else:
+            names = [dataset_name]
+        for name in names:
+            logger.info("Invalidating cache for dataset {0}".format(name))
+            self._memory_cache.invalidate(name)
+            self._disk_cache.invalidate(self._get_cache_prefix(name))
+
+    def _get_cache_prefix(self, dataset_name):
+        """Get the prefix identifying a dataset in the on-disk cache."""
+        return get_hash(self.project_name, dataset_name)
 
     def get_dataset_specs(self, dataset_name):
         """Returns the specifications for the specified dataset in the project.
+        These are derived from the schema alone, the dataset files are not
+        read. Use `verify_dataset` to check the files against the schema.
 
         :param dataset_name: Name of the dataset
         :type dataset_name: str
@@ -467,6 +1010,30 @@ class Project(object):
         specs = self.get_dataset_specs(dataset_name)
         pprint.pprint(specs)
 
+    def verify_dataset(self, dataset_name, workers=None):
+        """Check the files of a dataset against its schema, without loading
+        it. The checksums of the files are compared with the ones declared in
+        the schema, and the columns named in the schema are looked up in the
+        headers of the files. Files which fail a check are also reported as
+        warnings.
+
+        :param dataset_name: Name of the dataset
+        :param workers: Number of files checked concurrently. If None \
+                (default), the ``parallel`` setting of the dataset is used.
+        :type dataset_name: str
+        :type workers: int
+        :return: Dictionary containing whether the checksums match (None if \
+                no checksum is declared), the columns missing from each file, \
+                and whether the dataset passed all checks.
+        :rtype: dict
+        :Example:
+
+        >>> project = Project('pysemantic_demo')
+        >>> project.verify_dataset('iris')
+        {'checksum': True, 'missing_columns': {}, 'valid': True}
+        """
+        return self.validators[dataset_name].verify(workers)
+
     def set_dataset_specs(self, dataset_name, specs, write_to_file=False):
         """Sets the specifications to the dataset. Using this is not
         recommended. All specifications for datasets should be handled through
@@ -486,13 +1053,15 @@ class Project(object):
         :return: None
         """
         validator = self.validators[dataset_name]
+        self._memory_cache.invalidate(dataset_name)
         logger.info("Attempting to set parser args for dataset {} to:".format(
                                                                  dataset_name))
-        logger.info(json.dumps(specs, cls=TypeEncoder))
+        log_json(logger, specs)
         return validator.set_parser_args(specs, write_to_file)
 
     def update_dataset(self, dataset_name, dataframe, path=None, **kwargs):
         """This is tricky."""
+        self._memory_cache.invalidate(dataset_name)
         org_specs = self.get_dataset_specs(dataset_name)
         if path is None:
             path = org_specs['filepath_or_buffer']
@@ -502,7 +1071,7 @@ class Project(object):
         dtypes = {}
         for col in dataframe:
             dtype = dataframe[col].dtype
-            if dtype == np.dtype('O'):
+            if dtype.name == "category" or dtype == np.dtype('O'):
                 dtypes[col] = str
             elif dtype == np.dtype('float'):
                 dtypes[col] = float
@@ -511,8 +1080,7 @@ class Project(object):
             else:
                 dtypes[col] = dtype
         new_specs = {'path': path, 'delimiter': sep, 'dtypes': dtypes}
-        with open(self.specfile, "r") as fid:
-            specs = yaml.load(fid, Loader=Loader)
+        specs = read_specfile(self.specfile)
         dataset_specs = specs[dataset_name]
         dataset_specs.update(new_specs)
         if "column_rules" in dataset_specs:
@@ -525,16 +1093,18 @@ class Project(object):
                 del col_rules[colname]
         logger.info("Attempting to update schema for dataset {0} to:".format(
                                                                  dataset_name))
-        logger.info(json.dumps(dataset_specs, cls=TypeEncoder))
-        with open(self.specfile, "w") as fid:
-            yaml.dump(specs, fid, Dumper=Dumper,
-                      default_flow_style=False)
+        log_json(logger, dataset_specs)
+        write_specfile(self.specfile, specs)
 
-    def load_dataset(self, dataset_name):
+    def load_dataset(self, dataset_name, workers=None):
         """Load and return a dataset.
 
         :param dataset_name: Name of the dataset
+        :param workers: Number of threads used to load the files of a \
+                dataset that spans multiple files. If None (default), the \
+                ``parallel`` parameter of the schema is used.
         :type dataset_name: str
+        :type workers: int
         :return: A pandas DataFrame containing the dataset.
         :rtype: pandas.DataFrame
         :Example:
@@ -544,16 +1114,178 @@ class Project(object):
         >>> type(iris)
         pandas.core.DataFrame
         """
+        profile = LoadProfile(dataset_name)
+        with activate(profile):
+            df = self._get_dataset(dataset_name, workers)
+        self._rejected_frames[dataset_name] = weakref.ref(df)
+        profile.finish(df)
+        self._load_profiles[dataset_name] = profile
+        for callback in list(self._load_hooks):
+            try:
+                callback(profile)
+            except Exception as exc:
+                logger.warn("The load hook {0} failed on the dataset {1}: "
+                            "{2}".format(callback, dataset_name, exc))
+        return df
+
+    def last_load_profile(self, dataset_name):
+        """Get the profile of the last load of a dataset: the wall time, the
+        rows going in and out and the change in memory of each stage of the
+        load, the time and rows dropped by each column rule, the number of
+        bytes read and the peak memory.
+
+        :param dataset_name: Name of the dataset
+        :type dataset_name: str
+        :return: The profile, or None if the dataset hasn't been loaded.
+        :rtype: pysemantic.profiling.LoadProfile
+        :Example:
+
+        >>> iris = demo_project.load_dataset('iris')
+        >>> profile = demo_project.last_load_profile('iris')
+        >>> profile.stages[0]['stage'], profile.stages[0]['rows_out']
+        ('parse', 150)
+        """
+        return self._load_profiles.get(dataset_name)
+
+    def add_load_hook(self, callback):
+        """Register a function to be called with the profile of every dataset
+        loaded by the project, e.g. to send it to a monitoring system. Errors
+        raised by the function are logged and ignored.
+
+        :param callback: Function taking a \
+                `pysemantic.profiling.LoadProfile`.
+        :type callback: callable
+        """
+        self._load_hooks.append(callback)
+
+    def remove_load_hook(self, callback):
+        """Unregister a function registered with `add_load_hook`.
+
+        :param callback: The function to unregister.
+        :type callback: callable
+        """
+        self._load_hooks.remove(callback)
+
+    def _get_dataset(self, dataset_name, workers=None):
+        """Load a dataset, from the caches if possible. See `load_dataset`."""
         validator = self.validators[dataset_name]
+        if validator.is_columnar:
+            self._rejections.pop(dataset_name, None)
+            return self._load_columnar(dataset_name, validator)
         column_rules = self.column_rules.get(dataset_name, {})
         df_rules = self.df_rules.get(dataset_name, {})
         parser_args = validator.get_parser_args()
         df_rules.update(validator.df_rules)
+        nrows = df_rules.get('nrows', {})
+        if isinstance(nrows, dict) and nrows.get('random', False):
+            # A random selection of rows should be drawn afresh every time.
+            return self._load_dataset(dataset_name, validator, df_rules,
+                                      column_rules, workers)
+
+        # Key of the contents of the dataset, so that a cached dataframe is
+        # not used after its files or specifications change.
+        key = get_hash(get_files_fingerprint(_get_paths(parser_args)),
+                       validator.specification, parser_args, df_rules,
+                       column_rules)
+        df = self._memory_cache.get(dataset_name, key)
+        if df is not None:
+            logger.info("Dataset {0} loaded from memory.".format(dataset_name))
+            # The rejections recorded when the cached dataframe was loaded.
+            self._rejections[dataset_name] = \
+                self._cached_rejections.get(dataset_name)
+            return df
+        if validator.cache:
+            prefix = self._get_cache_prefix(dataset_name)
+            with stage("read_cache") as record:
+                df = self._disk_cache.get(prefix, key)
+                record['hit'] = df is not None
+            if df is not None:
+                logger.info("Dataset {0} loaded from cache.".format(
+                                                                dataset_name))
+                # The rejections are not kept in the disk cache.
+                self._rejections.pop(dataset_name, None)
+            else:
+                df = self._load_dataset(dataset_name, validator, df_rules,
+                                        column_rules, workers)
+                with stage("write_cache", df.shape[0]):
+                    self._disk_cache.set(prefix, key, df)
+        else:
+            df = self._load_dataset(dataset_name, validator, df_rules,
+                                    column_rules, workers)
+        self._memory_cache.set(dataset_name, df, key)
+        self._cached_rejections[dataset_name] = \
+            self._rejections.get(dataset_name)
+        self._record_nrows(dataset_name, df)
+        return df
+
+    def _record_nrows(self, dataset_name, dataframe):
+        """Record the number of rows of a loaded dataset in the catalog. The
+        catalog is only written when the number of rows or the size of the
+        files of the dataset differ from what this project last recorded."""
+        if self.project_name is None:
+            return
+        recorded = (dataframe.shape[0], self._get_dataset_size(dataset_name))
+        if self._recorded_nrows.get(dataset_name) == recorded:
+            return
+        try:
+            catalog = get_catalog(locate_config_file())
+            catalog.set_nrows(self.project_name, dataset_name, *recorded)
+        except Exception as exc:
+            logger.warn("Recording the size of the dataset {0} in the "
+                        "catalog failed: {1}".format(dataset_name, exc))
+        else:
+            self._recorded_nrows[dataset_name] = recorded
+
+    def _load_columnar(self, dataset_name, validator):
+        """Open a dataset contained in a columnar store. The store holds a
+        dataset that has already been cleaned, so only the columns and the
+        number of rows to read are taken from the schema. The dataset is
+        neither parsed nor kept in the caches, since its arrays are only
+        mapped into memory.
+
+        :param dataset_name: Name of the dataset
+        :param validator: The SchemaValidator of the dataset.
+        :return: Dataframe backed by the memory-mapped columns of the store.
+        """
+        nrows = validator.specification.get('nrows')
+        if nrows is not None and not isinstance(nrows, int):
+            msg = "Only an integer nrows can be applied to the columnar " + \
+                  "store of the dataset {0}, ignoring it.".format(dataset_name)
+            logger.warn(msg)
+            warnings.warn(msg, UserWarning)
+            nrows = None
+        columns = validator.colnames or None
+        logger.info("Opening dataset {0} from the columnar store {1}".format(
+                                              dataset_name, validator.filepath))
+        with stage("open_columnar", file=validator.filepath) as record:
+            df = read_columnar(validator.filepath, columns=columns,
+                               exclude_columns=validator.exclude_columns,
+                               nrows=nrows)
+            record['rows_out'] = df.shape[0]
+        return df
+
+    def _load_dataset(self, dataset_name, validator, df_rules, column_rules,
+                      workers=None):
+        """Read and clean a dataset.
+
+        :param dataset_name: Name of the dataset
+        :param validator: The SchemaValidator of the dataset.
+        :param df_rules: Dataframe rules of the dataset.
+        :param column_rules: Column rules of the dataset.
+        :param workers: Number of threads used to load the files of a \
+                multifile dataset.
+        :return: The cleaned dataframe.
+        """
+        parser_args = validator.get_load_args()
         logger.info("Attempting to load dataset {} with args:".format(
                                                                  dataset_name))
-        logger.info(json.dumps(parser_args, cls=TypeEncoder))
+        log_json(logger, parser_args)
         if isinstance(parser_args, dict):
-            df = self._load(parser_args)
+            if validator.coerce_dtypes:
+                df, report = self._load_tolerant(parser_args)
+                self._dtype_reports[dataset_name] = report
+            else:
+                df = self._load(parser_args)
             if validator.is_spreadsheet and isinstance(validator.sheetname,
                                                        list):
                 df = pd.concat(df.itervalues(), axis=0)
@@ -562,63 +1294,363 @@ class Project(object):
                                              column_rules=column_rules)
             logger.info("Commence cleaning dataset:")
             logger.info("DataFrame rules:")
-            logger.info(json.dumps(df_rules, cls=TypeEncoder))
+            log_json(logger, df_rules)
             logger.info("Column rules:")
-            logger.info(json.dumps(column_rules, cls=TypeEncoder))
-            return df_validator.clean()
+            log_json(logger, column_rules)
+            df = df_validator.clean()
+            self._regex_reports[dataset_name] = df_validator.regex_counts
+            self._rejections[dataset_name] = df_validator.rejections
+            return df
         else:
+            if workers is None:
+                workers = validator.parallel
+            profile = current_profile()
+            file_rules = _get_partition_rules(validator, df_rules)
+
+            def load_file(argset):
+                with activate(profile):
+                    return self._load_file(argset, column_rules,
+                                           validator.coerce_dtypes,
+                                           file_rules)
+            if workers > 1:
+                logger.info("Loading {0} files with {1} workers.".format(
+                                                  len(parser_args), workers))
+                pool = ThreadPool(min(workers, len(parser_args)))
+                try:
+                    results = pool.map(load_file, parser_args)
+                finally:
+                    pool.terminate()
+            else:
+                results = map(load_file, parser_args)
             dfs = []
-            for argset in parser_args:
-                self._update_parser(argset)
-                _df = self.parser(**argset)
-                df_validator = DataFrameValidator(data=_df,
-                                                  column_rules=column_rules)
-                dfs.append(df_validator.clean())
-            df = pd.concat(dfs, axis=0)
-            return df.set_index(np.arange(df.shape[0]))
-
-    def load_datasets(self):
+            report = []
+            regex_report = {}
+            rejections = []
+            for _df, file_report, regex_counts, file_rejections in results:
+                dfs.append(_df)
+                report.extend(file_report)
+                rejections.append(file_rejections)
+                for col, counts in regex_counts.iteritems():
+                    total = regex_report.setdefault(col, {'matched': 0,
+                                                          'rejected': 0})
+                    total['matched'] += counts['matched']
+                    total['rejected'] += counts['rejected']
+            self._regex_reports[dataset_name] = regex_report
+            self._rejections[dataset_name] = Rejections.concatenate(rejections)
+            if validator.coerce_dtypes:
+                self._dtype_reports[dataset_name] = report
+            with stage("concat", sum([_df.shape[0] for _df in dfs])) as record:
+                df = pd.concat(dfs, axis=0)
+                df = df.set_index(np.arange(df.shape[0]))
+                record['rows_out'] = df.shape[0]
+            return df
+
+    def load_datasets(self, workers=1, return_summary=False):
         """Load and return all datasets.
 
-        :return: dictionary like {dataset_name: dataframe}
-        :rtype: dict
+        Datasets are scheduled in decreasing order of the size of their files,
+        so that the largest ones are started first. A dataset that fails to
+        load is reported and left out of the result, without affecting the
+        others.
+
+        :param workers: Number of datasets to load concurrently.
+        :param return_summary: Whether to also return a summary of the time \
+                taken to load each dataset and the error it raised, if any.
+        :type workers: int
+        :type return_summary: bool
+        :return: dictionary like {dataset_name: dataframe}, and if \
+                `return_summary` is True, a dictionary like \
+                {dataset_name: {'size': bytes, 'time': seconds, \
+                'error': message or None}}
+        :rtype: dict or tuple
+        :Example:
+
+        >>> demo_project = Project('pysemantic_demo')
+        >>> datasets, summary = demo_project.load_datasets(workers=4,
+        ...                                                return_summary=True)
+        >>> summary['iris']
+        {'error': None, 'size': 4551, 'time': 0.0132}
         """
+        sizes = {}
+        for name in self.specifications.iterkeys():
+            sizes[name] = self._get_dataset_size(name)
+        names = sorted(sizes, key=sizes.get, reverse=True)
+        if workers > 1:
+            pool = ThreadPool(min(workers, len(names)))
+            try:
+                results = pool.map(self._try_load_dataset, names, chunksize=1)
+            finally:
+                pool.terminate()
+        else:
+            results = map(self._try_load_dataset, names)
         datasets = {}
-        for name in self.validators.iterkeys():
-            datasets[name] = self.load_dataset(name)
+        summary = {}
+        for name, dataframe, elapsed, error in results:
+            if error is None:
+                datasets[name] = dataframe
+            summary[name] = {'size': sizes[name], 'time': elapsed,
+                             'error': error}
+        if return_summary:
+            return datasets, summary
         return datasets
 
-    def _update_parser(self, argdict):
-        """Update the pandas parser based on the delimiter.
+    def _try_load_dataset(self, dataset_name):
+        """Load a dataset, timing it and catching any error it raises.
+
+        :param dataset_name: Name of the dataset
+        :return: Tuple of the dataset name, the dataframe (None if loading \
+                failed), the time taken in seconds and the error message \
+                (None if loading succeeded).
+        """
+        start = time.time()
+        try:
+            dataframe = self.load_dataset(dataset_name)
+            error = None
+        except Exception as exc:
+            dataframe = None
+            error = "{0}: {1}".format(type(exc).__name__, exc)
+            msg = "Loading the dataset {0} failed with {1}".format(
+                                                           dataset_name, error)
+            logger.error(msg)
+            warnings.warn(msg, UserWarning)
+        return dataset_name, dataframe, time.time() - start, error
+
+    def _get_dataset_size(self, dataset_name):
+        """Get the total size in bytes of the files containing a dataset,
+        without reading them.
+
+        :param dataset_name: Name of the dataset
+        :return: Size of the dataset files, 0 if they cannot be found.
+        :rtype: int
+        """
+        paths = self.specifications[dataset_name].get('path', [])
+        if not isinstance(paths, list):
+            paths = [paths]
+        return sum([op.getsize(path) for path in paths if op.isfile(path)])
+
+    def iter_dataset(self, dataset_name, chunksize=DEFAULT_CHUNKSIZE):
+        """Iterate over a dataset in cleaned chunks.
+
+        The file is read `chunksize` rows at a time, and the dataframe and
+        column rules are enforced on every chunk before it is yielded, so that
+        the whole dataset never has to be held in memory. Rules that span the
+        whole dataset are carried across chunks: duplicate rows are tracked by
+        their hashes, and random row selection is done by keeping a bounded
+        random sample of ``count`` rows. Spreadsheets cannot be read in
+        chunks, they are loaded whole and then yielded in slices, as are
+        columnar stores and Parquet and Feather files.
+
+        :param dataset_name: Name of the dataset
+        :param chunksize: Maximum number of rows read from the file at a time.
+        :type dataset_name: str
+        :type chunksize: int
+        :return: A generator of cleaned pandas DataFrames. If no rows of the \
+                dataset are left, a single empty dataframe is yielded, so \
+                that its columns are known.
+        :Example:
+
+        >>> demo_project = Project('pysemantic_demo')
+        >>> for chunk in demo_project.iter_dataset('iris', chunksize=50):
+        ...     print chunk.shape
+        (50, 5)
+        (50, 5)
+        (50, 5)
+        """
+        validator = self.validators[dataset_name]
+        if validator.is_columnar or validator.is_spreadsheet or \
+                validator.is_arrow:
+            dataframe = self.load_dataset(dataset_name)
+            for chunk in _split_rows(dataframe, chunksize):
+                yield chunk
+            return
+        column_rules = self.column_rules.get(dataset_name, {})
+        df_rules = self.df_rules.get(dataset_name, {})
+        parser_args = validator.get_load_args()
+        df_rules.update(validator.df_rules)
+        logger.info("Attempting to iterate over dataset {0} in chunks of {1} "
+                    "rows with args:".format(dataset_name, chunksize))
+        log_json(logger, parser_args)
+        if isinstance(parser_args, dict):
+            chunks = self._read_chunks(parser_args, chunksize)
+            for chunk in _skip_empty(self._clean_chunks(
+                    chunks, df_rules, column_rules, chunksize)):
+                yield chunk
+        else:
+            file_rules = _get_partition_rules(validator, df_rules) or {}
+            for chunk in _skip_empty(self._iter_files(
+                    parser_args, file_rules, column_rules, chunksize)):
+                yield chunk
+
+    def _iter_files(self, parser_args, df_rules, column_rules, chunksize):
+        """Iterate over the files of a multifile dataset in cleaned chunks,
+        numbering their rows consecutively."""
+        n_rows = 0
+        for argset in parser_args:
+            chunks = self._read_chunks(argset, chunksize)
+            for chunk in self._clean_chunks(chunks, df_rules, column_rules,
+                                            chunksize):
+                chunk.index = np.arange(n_rows, n_rows + chunk.shape[0])
+                n_rows += chunk.shape[0]
+                yield chunk
+
+    def _read_chunks(self, parser_args, chunksize):
+        """Read a file in chunks of `chunksize` rows.
+
+        :param parser_args: Dictionary containing parser arguments.
+        :param chunksize: Maximum number of rows in a chunk.
+        """
+        parser_args = copy.deepcopy(parser_args)
+        # pandas doesn't allow nrows and chunksize together, so the file is
+        # truncated here instead.
+        nrows = parser_args.pop('nrows', None)
+        partition_values = parser_args.pop('partition_values', {})
+        partition_dtypes = parser_args.pop('partition_dtypes', {})
+        parser_args['chunksize'] = chunksize
+        reader = self._load(parser_args)
+        try:
+            for chunk in _head_rows(reader, nrows):
+                yield add_partition_columns(chunk, partition_values,
+                                            partition_dtypes)
+        finally:
+            reader.close()
+
+    def _clean_chunks(self, chunks, df_rules, column_rules, chunksize):
+        """Enforce the dataframe and column rules on a sequence of chunks.
+
+        :param chunks: Iterable of raw dataframes read from a dataset.
+        :param df_rules: Dataframe rules of the dataset.
+        :param column_rules: Column rules of the dataset.
+        :param chunksize: Maximum number of rows in a chunk.
+        :return: A generator of cleaned chunks, which may be empty.
+        """
+        rules = copy.copy(df_rules)
+        # Row selection, NAs and duplicates depend on the whole dataset, so
+        # they are enforced here, and not by the DataFrameValidator of each
+        # chunk.
+        nrows = rules.pop('nrows', {})
+        is_drop_na = rules.get('drop_na', True)
+        is_drop_duplicates = rules.get('drop_duplicates', True)
+        rules['drop_na'] = False
+        rules['drop_duplicates'] = False
+        seen_rows = set()
+        seen_values = {}
+        for colname, col_rules in column_rules.iteritems():
+            if col_rules.get('drop_duplicates', False):
+                seen_values[colname] = set()
+
+        for chunk in _select_rows(chunks, nrows, chunksize):
+            if is_drop_na:
+                chunk = chunk.dropna()
+            if is_drop_duplicates:
+                chunk = _drop_seen_rows(chunk, seen_rows)
+            for colname, values in seen_values.iteritems():
+                if colname in chunk:
+                    series = chunk[colname]
+                    chunk = chunk[~series.isin(values).values]
+                    values.update(series.dropna().unique())
+            df_validator = DataFrameValidator(data=chunk, rules=rules,
+                                              column_rules=column_rules)
+            yield df_validator.clean()
+
+    def _get_parser(self, argdict):
+        """Get the parser suitable for reading a file, based on the file type
+        and the delimiter.
 
         :param argdict: Dictionary containing parser arguments.
-        :return None:
+        :return: The parser function.
         """
+        if self.user_specified_parser:
+            return self.parser
         fpath = argdict.get('filepath_or_buffer', argdict.get('io'))
+        if get_arrow_format(fpath) is not None:
+            return read_arrow
         xls = fpath.endswith(".xlsx") or fpath.endswith("xls")
-        if not self.user_specified_parser:
-            if not xls:
-                sep = argdict.get('sep', ",")
-                if sep == ",":
-                    self.parser = pd.read_csv
-                else:
-                    self.parser = pd.read_table
+        if not xls:
+            sep = argdict.get('sep', ",")
+            if sep == ",":
+                return pd.read_csv
+            return pd.read_table
+        return self._load_excel_sheet
+
+    def _load_file(self, argset, column_rules, coerce_dtypes=False,
+                   df_rules=None):
+        """Load and clean one of the files of a multifile dataset. This does
+        not modify the state of the project, so that files can be loaded in
+        parallel.
+
+        :param argset: Dictionary containing parser arguments for the file.
+        :param column_rules: Column rules of the dataset.
+        :param coerce_dtypes: Whether to coerce the declared dtypes after \
+                parsing, instead of passing them to the parser.
+        :param df_rules: Dataframe rules enforced on the file. If None \
+                (default), the default rules are enforced.
+        :return: Tuple of the cleaned dataframe, the list of columns whose \
+                dtypes were coerced, the counts of values matched and \
+                rejected by the regex rules and the rows rejected by each \
+                rule.
+        """
+        fpath = argset.get('filepath_or_buffer', argset.get('io'))
+        argset = copy.copy(argset)
+        partition_values = argset.pop('partition_values', {})
+        partition_dtypes = argset.pop('partition_dtypes', {})
+        if df_rules is None:
+            df_rules = {}
+        parser = self._get_parser(argset)
+        try:
+            if coerce_dtypes:
+                _df, report = self._load_tolerant(argset, parser=parser)
             else:
-                self.parser = self._load_excel_sheet
+                _df, report = self._parse(parser, argset), []
+            _df = add_partition_columns(_df, partition_values,
+                                        partition_dtypes)
+            df_validator = DataFrameValidator(data=_df, rules=df_rules,
+                                              column_rules=column_rules)
+            return (df_validator.clean(), report, df_validator.regex_counts,
+                    df_validator.rejections)
+        except Exception as exc:
+            msg = "Loading the file {0} failed: {1}".format(fpath, exc)
+            logger.error(msg)
+            raise DatasetFileError(msg, fpath)
 
     def _load_excel_sheet(self, **parser_args):
         sheetname = parser_args.pop("sheetname")
         io = parser_args.pop('io')
         return pd.read_excel(io, sheetname=sheetname, **parser_args)
 
+    def _parse(self, parser, parser_args, retry=None):
+        """Call a parser, recording the parse in the profile of the load.
+
+        :param parser: The parser function.
+        :param parser_args: Dictionary containing parser arguments.
+        :param retry: If the file is parsed again after an error, the reason \
+                for parsing it again.
+        :return: The parsed dataframe.
+        """
+        fpath = parser_args.get('filepath_or_buffer', parser_args.get('io'))
+        info = {'file': fpath}
+        if retry is not None:
+            info['reason'] = retry
+        elif isinstance(fpath, basestring) and op.isfile(fpath):
+            record_bytes(op.getsize(fpath))
+        with stage("parse" if retry is None else "parse_retry",
+                   **info) as record:
+            df = parser(**parser_args)
+            if isinstance(df, dict):
+                record['rows_out'] = sum([sheet.shape[0]
+                                          for sheet in df.itervalues()])
+            elif isinstance(df, pd.DataFrame):
+                # Readers of chunks are not counted.
+                record['rows_out'] = df.shape[0]
+        return df
+
     def _load(self, parser_args):
         """The actual loader function that does the heavy lifting.
 
         :param parser_args: Dictionary containing parser arguments.
         """
-        self._update_parser(parser_args)
+        parser = self._get_parser(parser_args)
         try:
-            return self.parser(**parser_args)
+            return self._parse(parser, parser_args)
         except ValueError as e:
             if e.message.startswith("Falling back to the 'python' engine"):
                 del parser_args['dtype']
@@ -632,7 +1664,8 @@ class Project(object):
                 warnings.warn(msg, UserWarning)
                 if "error_bad_lines" in parser_args:
                     del parser_args['error_bad_lines']
-                return self.parser(**parser_args)
+                return self._parse(parser, parser_args,
+                                   retry="regex delimiter")
             elif e.message.startswith("cannot safely convert"):
                 bad_col = int(e.message.split(' ')[-1])
                 bad_col = parser_args['dtype'].keys()[bad_col]
@@ -646,7 +1679,8 @@ class Project(object):
                 logger.warn(msg)
                 logger.info("dtype for column {} removed.".format(bad_col))
                 warnings.warn(msg, UserWarning)
-                return self.parser(**parser_args)
+                return self._parse(parser, parser_args,
+                                   retry="dtype of {0}".format(bad_col))
             elif e.message.startswith('could not convert string to float'):
                 bad_cols = self._detect_mismatched_dtype_row(float, parser_args)
                 for col in bad_cols:
@@ -658,7 +1692,8 @@ class Project(object):
                                                               float))
                 logger.warn(msg)
                 logger.info("dtype removed for columns:".format(bad_cols))
-                return self.parser(**parser_args)
+                return self._parse(parser, parser_args,
+                                   retry="dtypes of {0}".format(bad_cols))
         except AttributeError as e:
             if e.message == "'NoneType' object has no attribute 'dtype'":
                 bad_rows = self._detect_mismatched_dtype_row(int, parser_args)
@@ -666,21 +1701,108 @@ class Project(object):
                     del parser_args['dtype'][col]
                 logger.warn(msg)
                 logger.info("dtype removed for columns:".format(bad_rows))
-                return self.parser(**parser_args)
+                return self._parse(parser, parser_args,
+                                   retry="dtypes of {0}".format(bad_rows))
         except CParserError as e:
             parser_args['error_bad_lines'] = False
             msg = 'Adding the "error_bad_lines=False" argument to the ' + \
                   'list of parser arguments.'
             logger.info(msg)
-            return self.parser(**parser_args)
+            return self._parse(parser, parser_args, retry="bad lines")
         except Exception as e:
             if "Integer column has NA values" in e.message:
                 bad_rows = self._detect_row_with_na(parser_args)
                 new_types = [(col, float) for col in bad_rows]
                 self._update_dtypes(parser_args['dtype'], new_types)
                 logger.info("Dtypes for following columns changed:")
-                logger.info(json.dumps(new_types, cls=TypeEncoder))
-            return self.parser(**parser_args)
+                log_json(logger, new_types)
+            return self._parse(parser, parser_args, retry="{0}: {1}".format(
+                                                      type(e).__name__, e))
+
+    def _load_tolerant(self, parser_args, parser=None):
+        """Parse a file in a single pass, without the declared numerical
+        dtypes, and then coerce the parsed columns to them where possible.
+
+        :param parser_args: Dictionary containing parser arguments.
+        :param parser: The parser to use. If None (default), the parser is \
+                inferred from the parser arguments, and parser errors are \
+                handled as in `_load`.
+        :return: Tuple of the dataframe and the list of columns whose dtypes \
+                were coerced.
+        """
+        parser_args = copy.copy(parser_args)
+        dtypes = parser_args.pop('dtype', None) or {}
+        numeric_dtypes = {}
+        other_dtypes = {}
+        for colname, dtype in dtypes.iteritems():
+            if _is_numeric_dtype(dtype):
+                numeric_dtypes[colname] = dtype
+            else:
+                other_dtypes[colname] = dtype
+        if len(other_dtypes) > 0:
+            parser_args['dtype'] = other_dtypes
+        if parser is None:
+            dataframe = self._load(parser_args)
+        else:
+            dataframe = self._parse(parser, parser_args)
+        fpath = parser_args.get('filepath_or_buffer', parser_args.get('io'))
+        with stage("coerce_dtypes", dataframe.shape[0], file=fpath):
+            report = self._coerce_dtypes(dataframe, numeric_dtypes)
+        for item in report:
+            item['file'] = fpath
+        return dataframe, report
+
+    def _coerce_dtypes(self, dataframe, dtypes):
+        """Cast the columns of a dataframe to the specified numerical dtypes.
+
+        Columns which cannot be cast are downgraded instead: integer columns
+        containing missing or fractional values are left as floats, and
+        columns containing non-numerical values are left as they were parsed.
+
+        :param dataframe: The dataframe, which is modified in place.
+        :param dtypes: Dictionary of column names and numerical dtypes.
+        :return: List of dictionaries describing the columns which could not \
+                be cast to the specified dtypes.
+        """
+        report = []
+        for colname, dtype in dtypes.iteritems():
+            if colname not in dataframe:
+                continue
+            series = dataframe[colname]
+            dtype = np.dtype(dtype)
+            if series.dtype == dtype:
+                continue
+            reason = None
+            if series.dtype.kind in "biuf":
+                if dtype.kind in "iu":
+                    n_missing = series.isnull().sum()
+                    if n_missing > 0:
+                        reason, count = "missing values", n_missing
+                    else:
+                        n_fractional = (series != np.floor(series)).sum()
+                        if n_fractional > 0:
+                            reason, count = "fractional values", n_fractional
+                if reason is None:
+                    dataframe[colname] = series.astype(dtype)
+            else:
+                numbers = pd.to_numeric(series, errors="coerce")
+                is_bad = numbers.isnull() & series.notnull()
+                reason, count = "non-numerical values", is_bad.sum()
+                msg = textwrap.dedent("""\
+                The specified dtype for the column '{0}' ({1}) seems to be
+                incorrect. This has been ignored for now.
+                Consider fixing this by editing the schema.""".format(colname,
+                                                                      dtype))
+                logger.warn(msg)
+                warnings.warn(msg, UserWarning)
+            if reason is not None:
+                report.append({'column': colname, 'declared': str(dtype),
+                               'dtype': str(dataframe[colname].dtype),
+                               'reason': reason, 'count': int(count)})
+        if len(report) > 0:
+            logger.info("Dtypes for following columns were coerced:")
+            log_json(logger, report)
+        return report
 
     def _update_dtypes(self, dtypes, typelist):
         """Update the dtypes parameter of the parser arguments.
@@ -699,11 +1821,11 @@ class Project(object):
         """
         dtypes = parser_args.get("dtype")
         usecols = parser_args.get("usecols")
-        if usecols is None:
-            usecols = colnames(parser_args['filepath_or_buffer'])
-        int_cols = [col for col in usecols if dtypes.get(col) is int]
         fpath = parser_args['filepath_or_buffer']
         sep = parser_args.get('sep', ',')
+        if usecols is None:
+            usecols = colnames(fpath, sep=sep)
+        int_cols = [col for col in usecols if dtypes.get(col) is int]
         nrows = parser_args.get('nrows')
         na_reps = {}
         if parser_args.get('na_values', False):
@@ -715,7 +1837,8 @@ class Project(object):
             for cname, cnv in parser_args.get('converters').iteritems():
                 if cname in int_cols:
                     converters[cname] = cnv
-        df = self.parser(fpath, sep=sep, usecols=int_cols, nrows=nrows,
+        parser = self._get_parser(parser_args)
+        df = parser(fpath, sep=sep, usecols=int_cols, nrows=nrows,
                          na_values=na_reps, converters=converters)
         bad_rows = []
         for col in df:
@@ -737,7 +1860,8 @@ class Project(object):
         fpath = parser_args['filepath_or_buffer']
         sep = parser_args.get('sep', ',')
         nrows = parser_args.get('nrows')
-        df = self.parser(fpath, sep=sep, usecols=to_read, nrows=nrows,
+        parser = self._get_parser(parser_args)
+        df = parser(fpath, sep=sep, usecols=to_read, nrows=nrows,
                 error_bad_lines=False)
         bad_cols = []
         for col in df:
@@ -0,0 +1,186 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""Reading and writing of schema files.
+
+Parsed schema files are cached in memory, keyed by their path, modification
+time and size, so that a schema file is parsed again only when it changes.
+Optionally, the parsed schema is also kept in a pickled sidecar file next to
+the schema file, named ``.<schema file name>.pickle``, so that other processes
+can skip parsing the YAML altogether. Sidecars are enabled by setting the
+``PYSEMANTIC_SPEC_SIDECAR`` environment variable to 1.
+
+Callers always get their own copy of the schema, which they are free to
+modify.
+"""
+
+import os
+import os.path as op
+import copy
+import logging
+import tempfile
+import threading
+import cPickle as pickle
+
+import yaml
+
+try:
+    from yaml import CDumper as Dumper
+    from yaml import CLoader as Loader
+except ImportError:
+    from yaml import Dumper
+    from yaml import Loader
+
+USE_SIDECAR = os.environ.get("PYSEMANTIC_SPEC_SIDECAR", "0") == "1"
+logger = logging.getLogger(__name__)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _get_key(path):
+    """Get the (mtime, size) of a file, which identify its contents."""
+    stat = os.stat(path)
+    return stat.st_mtime, stat.st_size
+
+
+def _get_sidecar_path(path):
+    dirname, basename = op.split(path)
+    return op.join(dirname, ".{0}.pickle".format(basename))
+
+
+def _read_sidecar(path, key):
+    """Read the pickled schema stored next to a schema file, if it is up to
+    date with the schema file."""
+    sidecar = _get_sidecar_path(path)
+    if not op.isfile(sidecar):
+        return None
+    try:
+        with open(sidecar, "rb") as fid:
+            sidecar_key, blob = pickle.load(fid)
+    except Exception as exc:
+        logger.warn("Reading the schema sidecar {0} failed: {1}".format(
+                                                             sidecar, exc))
+        return None
+    if sidecar_key != key:
+        return None
+    return blob
+
+
+def _write_sidecar(path, key, blob):
+    """Write a pickled schema next to its schema file, atomically."""
+    sidecar = _get_sidecar_path(path)
+    try:
+        fd, tmppath = tempfile.mkstemp(suffix=".part", dir=op.dirname(sidecar))
+        with os.fdopen(fd, "wb") as fid:
+            pickle.dump((key, blob), fid, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmppath, sidecar)
+    except Exception as exc:
+        logger.warn("Writing the schema sidecar {0} failed: {1}".format(
+                                                             sidecar, exc))
+
+
+def _cache_specs(path, key, specs, blob=None):
+    """Cache a parsed schema, along with its pickled form."""
+    if blob is None:
+        blob = pickle.dumps(specs, pickle.HIGHEST_PROTOCOL)
+    with _cache_lock:
+        _cache[path] = key, specs, blob
+    return blob
+
+
+def read_specfile(path, dataset_name=None, use_sidecar=None):
+    """Read a schema file, parsing it only if it has changed since it was
+    last read.
+
+    :param path: Path to the schema file.
+    :param dataset_name: Name of the dataset whose schema is to be read. If \
+            None (default), the schema of all datasets is read.
+    :param use_sidecar: Whether to read and write the pickled sidecar of the \
+            schema file. If None (default), the ``PYSEMANTIC_SPEC_SIDECAR`` \
+            environment variable decides.
+    :type path: str
+    :type dataset_name: str
+    :type use_sidecar: bool
+    :return: Copy of the schema of all datasets, or of the schema of \
+            `dataset_name`. An empty dictionary if the dataset is not in the \
+            schema file.
+    :rtype: dict
+    :Example:
+
+    >>> read_specfile('/path/to/skynet.yaml', 'kyle reese')
+    {'path': '/path/to/kyle_reese.tsv', 'delimiter': '\\t'}
+    """
+    if use_sidecar is None:
+        use_sidecar = USE_SIDECAR
+    path = op.abspath(path)
+    key = _get_key(path)
+    with _cache_lock:
+        entry = _cache.get(path)
+    if entry is not None and entry[0] == key:
+        _, specs, blob = entry
+    else:
+        blob = _read_sidecar(path, key) if use_sidecar else None
+        if blob is not None:
+            specs = pickle.loads(blob)
+        else:
+            logger.info("Parsing schema file {0}".format(path))
+            with open(path, "r") as fid:
+                specs = yaml.load(fid, Loader=Loader)
+            if specs is None:
+                specs = {}
+        blob = _cache_specs(path, key, specs, blob)
+        if use_sidecar:
+            _write_sidecar(path, key, blob)
+    if dataset_name is not None:
+        return copy.deepcopy(specs.get(dataset_name, {}))
+    # Unpickling is a lot faster than deep-copying the parsed schema.
+    return pickle.loads(blob)
+
+
+def write_specfile(path, specs, use_sidecar=None):
+    """Write a schema file, updating the cached schema.
+
+    :param path: Path to the schema file.
+    :param specs: The schema of all datasets.
+    :param use_sidecar: Whether to also update the pickled sidecar of the \
+            schema file. If None (default), the ``PYSEMANTIC_SPEC_SIDECAR`` \
+            environment variable decides.
+    :type path: str
+    :type specs: dict
+    :type use_sidecar: bool
+    """
+    if use_sidecar is None:
+        use_sidecar = USE_SIDECAR
+    path = op.abspath(path)
+    with open(path, "w") as fid:
+        yaml.dump(specs, fid, Dumper=Dumper, default_flow_style=False)
+    key = _get_key(path)
+    # Cache a copy, the caller may keep modifying its schema.
+    blob = pickle.dumps(specs, pickle.HIGHEST_PROTOCOL)
+    _cache_specs(path, key, pickle.loads(blob), blob)
+    if use_sidecar:
+        _write_sidecar(path, key, blob)
+
+
+def invalidate_specfile(path=None):
+    """Remove schema files from the cache, and delete their sidecars.
+
+    :param path: Path to the schema file to remove. If None (default), the \
+            whole cache is cleared, but no sidecar is deleted.
+    :type path: str
+    """
+    with _cache_lock:
+        if path is None:
+            _cache.clear()
+            return
+        path = op.abspath(path)
+        _cache.pop(path, None)
+    sidecar = _get_sidecar_path(path)
+    if op.isfile(sidecar):
+        os.unlink(sidecar)
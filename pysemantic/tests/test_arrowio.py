@@ -0,0 +1,113 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""
+Tests for the pysemantic.arrowio module.
+"""
+
+import shutil
+import tempfile
+import unittest
+import os.path as op
+
+import numpy as np
+import pandas as pd
+
+from pysemantic import project as pr
+from pysemantic.arrowio import (get_arrow_format, read_arrow, write_arrow,
+                                arrow_colnames, _cast)
+from pysemantic.validator import SchemaValidator
+
+try:
+    import pyarrow
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+class TestArrowIO(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.dframe = pd.DataFrame({'a': np.arange(10),
+                                    'b': np.random.random(10),
+                                    'c': pd.Categorical(list("xy") * 5)})
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_get_arrow_format(self):
+        self.assertEqual(get_arrow_format("/tmp/iris.parquet"), "parquet")
+        self.assertEqual(get_arrow_format("/tmp/iris.PQ"), "parquet")
+        self.assertEqual(get_arrow_format("/tmp/iris.feather"), "feather")
+        self.assertIsNone(get_arrow_format("/tmp/iris.csv"))
+        self.assertIsNone(get_arrow_format(["/tmp/iris.parquet"]))
+
+    def test_cast(self):
+        dframe = _cast(self.dframe.copy(), {'a': float, 'b': int, 'c': str,
+                                            'd': float})
+        self.assertEqual(dframe['a'].dtype, np.float)
+        self.assertEqual(dframe['b'].dtype, np.int)
+        self.assertEqual(dframe['c'].dtype.name, "category")
+        dframe = _cast(dframe, {'a': "category"})
+        self.assertEqual(dframe['a'].dtype.name, "category")
+
+    def test_validator_parser_args(self):
+        path = op.join(self.tempdir, "iris.parquet")
+        with open(path, "w") as fid:
+            fid.write("")
+        validator = SchemaValidator(specification={'path': path,
+                                                    'use_columns': ['a']})
+        self.assertTrue(validator.is_arrow)
+        args = validator.get_parser_args()
+        self.assertNotIn('error_bad_lines', args)
+        self.assertEqual(args['usecols'], ['a'])
+
+    @unittest.skipIf(not HAS_PYARROW, "pyarrow is not installed.")
+    def test_round_trip(self):
+        for ext in ("parquet", "feather"):
+            path = op.join(self.tempdir, "data." + ext)
+            write_arrow(self.dframe, path)
+            self.assertEqual(arrow_colnames(path), ['a', 'b', 'c'])
+            loaded = read_arrow(path)
+            self.assertEqual(loaded['c'].dtype.name, "category")
+            self.assertTrue((loaded == self.dframe).all().all())
+            loaded = read_arrow(path, usecols=['a', 'c'], nrows=4, skiprows=2)
+            self.assertEqual(loaded.columns.tolist(), ['a', 'c'])
+            self.assertEqual(loaded['a'].tolist(), [2, 3, 4, 5])
+            loaded = read_arrow(path, exclude_columns=['b'],
+                                dtype={'a': float})
+            self.assertEqual(loaded.columns.tolist(), ['a', 'c'])
+            self.assertEqual(loaded['a'].dtype, np.float)
+
+    @unittest.skipIf(not HAS_PYARROW, "pyarrow is not installed.")
+    def test_parquet_chunks(self):
+        path = op.join(self.tempdir, "data.parquet")
+        write_arrow((self.dframe.iloc[i:i + 3] for i in range(0, 10, 3)),
+                    path)
+        self.assertEqual(read_arrow(path)['a'].tolist(), range(10))
+
+    @unittest.skipIf(not HAS_PYARROW, "pyarrow is not installed.")
+    def test_project_export_load(self):
+        project = pr.Project("pysemantic")
+        ideal = project.load_dataset("iris")
+        for ext in ("parquet", "feather"):
+            path = op.join(self.tempdir, "iris." + ext)
+            project.export_dataset("iris", outpath=path)
+            specs = {'path': path, 'exclude_columns': ['Sepal Width'],
+                     'nrows': 100}
+            loaded = pr.Project(schema={'iris': specs}).load_dataset("iris")
+            ideal_subset = ideal.drop('Sepal Width', axis=1)[:100]
+            self.assertEqual(loaded.columns.tolist(),
+                             ideal_subset.columns.tolist())
+            self.assertEqual(loaded['Species'].dtype.name, "category")
+            self.assertTrue(np.allclose(loaded['Petal Length'],
+                                        ideal_subset['Petal Length']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,6 +19,7 @@ import numpy as np
 import pandas as pd
 
 from pysemantic import project as pr
+from pysemantic.catalog import get_catalog_path
 
 try:
     from yaml import CLoader as Loader
@@ -189,13 +190,16 @@ class BaseProjectTestCase(BaseTestCase):
         finally:
             os.unlink(cls.test_conf_file)
             os.unlink(cls.copied_iris_path)
+            catalog_path = get_catalog_path(cls.test_conf_file)
+            if op.exists(catalog_path):
+                os.unlink(catalog_path)
 
     def setUp(self):
         iris_specs = {'sep': ',', 'dtype': {'Petal Length': float,
                                             'Sepal Width': float,
                                             'Petal Width': float,
                                             'Sepal Length': float,
-                                            'Species': str},
+                                            'Species': "category"},
                       'nrows': 150,
                       'error_bad_lines': False,
                       'filepath_or_buffer': op.join(
@@ -299,7 +303,7 @@ def _get_iris_args():
                        'Petal Width': float,
                        'Sepal Length': float,
                        'Sepal Width': float,
-                       'Species': str})
+                       'Species': "category"})
 
 
 def _get_person_activity_args():
@@ -0,0 +1,131 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""
+Tests for the pysemantic.cache module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import os.path as op
+
+import numpy as np
+import pandas as pd
+
+from pysemantic.cache import MemoryCache, DiskCache, get_hash
+
+
+class TestMemoryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dframe = pd.DataFrame(np.random.random((100, 4)))
+        self.nbytes = self.dframe.memory_usage(deep=True).sum()
+
+    def test_lru_eviction(self):
+        cache = MemoryCache(max_size=2 * self.nbytes)
+        cache.set("a", self.dframe)
+        cache.set("b", self.dframe)
+        self.assertIsNotNone(cache.get("a"))
+        cache.set("c", self.dframe)
+        self.assertIsNone(cache.get("b"))
+        self.assertItemsEqual(cache.info()['keys'], ["a", "c"])
+        self.assertEqual(cache.size, 2 * self.nbytes)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_oversized_dataframe(self):
+        cache = MemoryCache(max_size=self.nbytes - 1)
+        self.assertFalse(cache.set("a", self.dframe))
+        self.assertIsNone(cache.get("a"))
+        self.assertFalse(MemoryCache().set("a", self.dframe))
+
+    def test_copy_on_get(self):
+        cache = MemoryCache(max_size=self.nbytes)
+        cache.set("a", self.dframe)
+        self.dframe.iloc[0, 0] = -1
+        loaded = cache.get("a")
+        self.assertNotEqual(loaded.iloc[0, 0], -1)
+        loaded.iloc[1, 1] = -1
+        self.assertNotEqual(cache.get("a").iloc[1, 1], -1)
+
+    def test_invalidate(self):
+        cache = MemoryCache(max_size=2 * self.nbytes)
+        cache.set("a", self.dframe)
+        cache.set("b", self.dframe)
+        cache.invalidate("a")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.size, self.nbytes)
+        cache.invalidate()
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.size, 0)
+
+
+    def test_version(self):
+        cache = MemoryCache(max_size=self.nbytes)
+        cache.set("a", self.dframe, "1")
+        self.assertIsNotNone(cache.get("a", "1"))
+        self.assertIsNone(cache.get("a", "2"))
+        self.assertIsNone(cache.get("a", "1"))
+        self.assertEqual(cache.size, 0)
+
+
+class TestGetHash(unittest.TestCase):
+
+    def test_functions(self):
+        """Test if functions are hashed by their code, and not only by their
+        names."""
+        rules = lambda funcs: {'postprocessors': funcs}
+        self.assertEqual(get_hash(rules([lambda x: x + 1])),
+                         get_hash(rules([lambda x: x + 1])))
+        self.assertNotEqual(get_hash(rules([lambda x: x + 1])),
+                            get_hash(rules([lambda x: x + 2])))
+        self.assertNotEqual(get_hash(rules([lambda x: x.abs()])),
+                            get_hash(rules([lambda x: x.round()])))
+        self.assertNotEqual(get_hash(lambda x, n=1: x + n),
+                            get_hash(lambda x, n=2: x + n))
+
+        def adder(n):
+            return lambda x: x + n
+        self.assertNotEqual(get_hash(adder(1)), get_hash(adder(2)))
+        self.assertEqual(get_hash(str, np.mean), get_hash(str, np.mean))
+
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.cache = DiskCache(self.cachedir)
+        self.dframe = pd.DataFrame(np.random.random((100, 4)),
+                                   columns=list("abcd"))
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir)
+
+    def test_get_set(self):
+        self.assertIsNone(self.cache.get("foo", "1"))
+        self.assertTrue(self.cache.set("foo", "1", self.dframe))
+        loaded = self.cache.get("foo", "1")
+        self.assertTrue(np.all(loaded.values == self.dframe.values))
+        self.assertIsNone(self.cache.get("foo", "2"))
+
+    def test_replace_entries(self):
+        self.cache.set("foo", "1", self.dframe)
+        self.cache.set("foo", "2", self.dframe)
+        self.cache.set("bar", "1", self.dframe)
+        self.assertIsNone(self.cache.get("foo", "1"))
+        self.assertEqual(len(os.listdir(self.cachedir)), 2)
+        self.cache.invalidate("foo")
+        self.assertEqual(os.listdir(self.cachedir),
+                         [op.basename(self.cache._get_path("bar", "1"))])
+        self.cache.invalidate()
+        self.assertEqual(len(os.listdir(self.cachedir)), 0)
+
+if __name__ == '__main__':
+    unittest.main()
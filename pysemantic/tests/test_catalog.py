@@ -0,0 +1,120 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""
+Tests for the pysemantic.catalog module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import os.path as op
+from ConfigParser import RawConfigParser
+
+import yaml
+
+from pysemantic.catalog import Catalog
+
+
+class TestCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.config_path = op.join(self.tempdir, "pysemantic.conf")
+        self.data_path = op.join(self.tempdir, "iris.csv")
+        with open(self.data_path, "w") as fid:
+            fid.write("a,b\n1,2\n")
+        self.specfiles = {}
+        for name in ("skynet", "south park"):
+            self.specfiles[name] = op.join(self.tempdir, name + ".yaml")
+        self.write_specfile("skynet", {'iris': {'path': self.data_path},
+                                       'kyle': {'path': [self.data_path,
+                                                         "/foo/bar.csv"]}})
+        self.write_specfile("south park", {'stan': {'path': "/foo/bar.csv"}})
+        self.write_config(["south park", "skynet"])
+        self.catalog = Catalog(self.config_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def write_config(self, projects):
+        parser = RawConfigParser()
+        for name in projects:
+            parser.add_section(name)
+            parser.set(name, "specfile", self.specfiles[name])
+        with open(self.config_path, "w") as fid:
+            parser.write(fid)
+        os.utime(self.config_path, (0, len(projects)))
+
+    def write_specfile(self, project, specs):
+        path = self.specfiles[project]
+        with open(path, "w") as fid:
+            yaml.dump(specs, fid)
+        # Make sure the modification time changes.
+        mtime = os.stat(path).st_mtime if op.exists(path) else 0
+        os.utime(path, (0, mtime + 1))
+
+    def get_names(self, project):
+        return [info['name'] for info in self.catalog.get_datasets(project)]
+
+    def test_catalog_path(self):
+        self.catalog.refresh()
+        self.assertEqual(self.catalog.path,
+                         op.join(self.tempdir, ".pysemantic.conf.catalog"))
+        self.assertTrue(op.isfile(self.catalog.path))
+
+    def test_projects(self):
+        self.assertEqual(self.catalog.get_projects(),
+                         [("south park", self.specfiles["south park"]),
+                          ("skynet", self.specfiles["skynet"])])
+        self.write_config(["skynet"])
+        self.assertEqual(self.catalog.get_projects(),
+                         [("skynet", self.specfiles["skynet"])])
+        self.assertEqual(self.catalog.get_datasets("south park"), [])
+
+    def test_datasets(self):
+        self.assertEqual(self.catalog.get_datasets("skynet"),
+                         [{'name': 'iris', 'path': self.data_path,
+                           'size': 8, 'nrows': None},
+                          {'name': 'kyle',
+                           'path': [self.data_path, "/foo/bar.csv"],
+                           'size': 8, 'nrows': None}])
+        self.assertEqual(self.get_names("south park"), ["stan"])
+        self.assertEqual(self.get_names("foo"), [])
+
+    def test_persistence(self):
+        self.catalog.set_nrows("skynet", "iris", 1)
+        catalog = Catalog(self.config_path)
+        self.assertEqual(catalog.get_datasets("skynet")[0]['nrows'], 1)
+
+    def test_incremental_refresh(self):
+        self.catalog.set_nrows("skynet", "iris", 1)
+        self.catalog.set_nrows("skynet", "kyle", 2, size=10)
+        self.write_specfile("skynet", {'iris': {'path': self.data_path},
+                                       'kyle': {'path': "/foo/bar.csv"},
+                                       'sarah': {'path': self.data_path}})
+        datasets = self.catalog.get_datasets("skynet")
+        self.assertEqual([info['name'] for info in datasets],
+                         ["iris", "kyle", "sarah"])
+        self.assertEqual([info['nrows'] for info in datasets], [1, None, None])
+        # Schema files whose modification time and size haven't changed are
+        # not parsed again.
+        path = self.specfiles["south park"]
+        os.utime(path, (0, 1))
+        self.assertEqual(self.get_names("south park"), ["stan"])
+        size = os.stat(path).st_size
+        with open(path, "w") as fid:
+            fid.write("x" * size)
+        os.utime(path, (0, 1))
+        self.assertEqual(self.get_names("south park"), ["stan"])
+        os.unlink(path)
+        self.assertEqual(self.get_names("south park"), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""
+Tests for the pysemantic.checksums module.
+"""
+
+import os
+import zlib
+import shutil
+import hashlib
+import tempfile
+import unittest
+import os.path as op
+
+from pysemantic.checksums import (ChecksumCache, hash_file, get_checksum,
+                                  get_checksums)
+
+
+class TestChecksums(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.paths = []
+        for i in range(4):
+            path = op.join(self.tempdir, "file_{0}.txt".format(i))
+            with open(path, "wb") as fid:
+                fid.write(os.urandom(1000 + i))
+            self.paths.append(path)
+        self.cache = ChecksumCache(":memory:")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_hash_file(self):
+        with open(self.paths[0], "rb") as fid:
+            data = fid.read()
+        self.assertEqual(hash_file(self.paths[0]),
+                         hashlib.md5(data).hexdigest())
+        self.assertEqual(hash_file(self.paths[0], "sha256", bufsize=7),
+                         hashlib.sha256(data).hexdigest())
+        self.assertEqual(hash_file(self.paths[0], "CRC32", bufsize=100),
+                         "{0:08x}".format(zlib.crc32(data) & 0xffffffff))
+        self.assertRaises(ValueError, hash_file, self.paths[0], "foo")
+
+    def test_cache(self):
+        path = self.paths[0]
+        os.utime(path, (0, 1))
+        checksum = get_checksum(path, "sha1", cache=self.cache)
+        # Same inode, size and modification time: the cached checksum is
+        # returned.
+        with open(path, "r+b") as fid:
+            first = fid.read(1)
+            fid.seek(0)
+            fid.write(chr((ord(first) + 1) % 256))
+        os.utime(path, (0, 1))
+        self.assertEqual(get_checksum(path, "sha1", cache=self.cache),
+                         checksum)
+        os.utime(path, (0, 2))
+        self.assertEqual(get_checksum(path, "sha1", cache=self.cache),
+                         hash_file(path, "sha1"))
+        self.assertNotEqual(get_checksum(path, "sha1", cache=self.cache),
+                            checksum)
+
+    def test_parallel(self):
+        ideal = [hash_file(path, "adler32") for path in self.paths]
+        self.assertEqual(get_checksums(self.paths, "adler32", workers=3,
+                                       cache=self.cache), ideal)
+        self.assertEqual(get_checksums(self.paths, "adler32", cache=False),
+                         ideal)
+
+if __name__ == '__main__':
+    unittest.main()
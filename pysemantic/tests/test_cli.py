@@ -24,6 +24,7 @@ import numpy as np
 from pysemantic.tests.test_base import (BaseTestCase, TEST_CONFIG_FILE_PATH,
                                         TEST_DATA_DICT)
 from pysemantic import project as pr
+from pysemantic.catalog import get_catalog_path
 
 try:
     from yaml import CLoader as Loader
@@ -69,6 +70,9 @@ class TestCLI(BaseTestCase):
     @classmethod
     def tearDownClass(cls):
         os.unlink(cls.test_config_path)
+        catalog_path = get_catalog_path(cls.test_config_path)
+        if op.exists(catalog_path):
+            os.unlink(catalog_path)
         # Rewrite the original specs back to the config dir
         with open(TEST_DATA_DICT, "w") as fileobj:
             yaml.dump(cls.org_specs, fileobj, Dumper=Dumper,
@@ -203,6 +207,30 @@ class TestCLI(BaseTestCase):
         finally:
             shutil.rmtree(tempdir)
 
+    def test_infer(self):
+        """Test if the infer subcommand prints the inferred schema of a file,
+        and adds it to a project."""
+        iris_path = op.join(op.abspath(op.dirname(__file__)), "testdata",
+                            "iris.csv")
+        cmd = ['semantic', 'infer', iris_path, '--dataset', 'flowers',
+               '--no-rules']
+        output = subprocess.check_output(cmd, env=self.testenv)
+        specs = yaml.load(output, Loader=Loader)
+        self.assertEqual(specs['flowers']['path'], iris_path)
+        self.assertEqual(specs['flowers']['dtypes']['Species'], str)
+        self.assertNotIn("column_rules", specs['flowers'])
+        org_specs = pr.get_schema_specs("pysemantic", "iris")
+        cmd = ['semantic', 'infer', iris_path, '--project', 'pysemantic',
+               '--workers', '2']
+        try:
+            subprocess.check_call(cmd, env=self.testenv)
+            specs = pr.get_schema_specs("pysemantic", "iris")
+            self.assertEqual(specs['dtypes']['Sepal Length'], float)
+            self.assertEqual(specs['column_rules']['Sepal Length'],
+                             {'min': 4.3, 'max': 7.9})
+        finally:
+            pr.add_dataset("pysemantic", "iris", org_specs)
+
     def test_set_schema_nonexistent_project(self):
         """Test if the set-schema prints proper warnings when trying to set
         schema file for nonexistent project.
@@ -0,0 +1,113 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""
+Tests for the pysemantic.columnar module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import os.path as op
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from pandas.util.testing import assert_frame_equal
+
+from pysemantic.columnar import read_columnar, write_columnar
+
+
+def _is_mapped(values):
+    """Check if an array is a view of a memory-mapped array."""
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = values.base
+    return False
+
+
+class TestColumnar(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = op.join(self.tempdir, "data.pscol")
+        self.dframe = pd.DataFrame({'a': np.random.random(10),
+                                    'b': np.arange(10),
+                                    'c': list("abcdeabcde"),
+                                    'd': pd.date_range("2015-01-01",
+                                                       periods=10),
+                                    'e': np.random.random(10)})
+        self.dframe.loc[3, 'c'] = np.nan
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def _as_objects(self, dframe):
+        dframe['c'] = dframe['c'].astype(object)
+        return dframe
+
+    def test_round_trip(self):
+        write_columnar(self.dframe, self.path)
+        loaded = read_columnar(self.path)
+        self.assertEqual(loaded['c'].dtype.name, "category")
+        assert_frame_equal(self._as_objects(loaded), self.dframe)
+
+    def test_memory_mapped(self):
+        # The columns of each dtype are contiguous, so they needn't be
+        # reordered.
+        dframe = self.dframe[['a', 'e', 'b', 'c', 'd']]
+        write_columnar(dframe, self.path)
+        loaded = read_columnar(self.path)
+        self.assertEqual(loaded.columns.tolist(), dframe.columns.tolist())
+        self.assertTrue(_is_mapped(loaded['a'].values))
+        self.assertTrue(_is_mapped(loaded['b'].values))
+        self.assertTrue(_is_mapped(loaded['c'].values.codes))
+        loaded.loc[0, 'a'] = -1
+        self.assertEqual(read_columnar(self.path).loc[0, 'a'],
+                         self.dframe.loc[0, 'a'])
+
+    def test_mixed_objects(self):
+        """Test if object columns which don't only hold strings are read back
+        unchanged."""
+        dframe = pd.DataFrame({'a': [1, "1", 2.5, Decimal("3.5"), None],
+                               'b': ["x", u"\xe9", "y", "x", u"\xe9"]})
+        write_columnar(dframe, self.path)
+        loaded = read_columnar(self.path)
+        self.assertEqual(loaded['a'].astype(object).tolist()[:4],
+                         dframe['a'].tolist()[:4])
+        self.assertEqual([type(x) for x in loaded['a'].astype(object)][:4],
+                         [int, str, float, Decimal])
+        self.assertTrue(pd.isnull(loaded['a'].iloc[4]))
+        self.assertEqual(loaded['b'].astype(object).tolist(),
+                         dframe['b'].tolist())
+
+    def test_index(self):
+        dframe = self.dframe.iloc[::2].set_index('c', append=True)
+        write_columnar(dframe, self.path)
+        loaded = read_columnar(self.path)
+        self.assertEqual(loaded.index.names, [None, 'c'])
+        assert_frame_equal(loaded, dframe)
+
+    def test_select_columns_rows(self):
+        write_columnar(self.dframe, self.path)
+        loaded = read_columnar(self.path, columns=['e', 'c', 'a'],
+                               exclude_columns=['c'], nrows=5)
+        assert_frame_equal(loaded, self.dframe[['e', 'a']][:5])
+        self.assertRaises(KeyError, read_columnar, self.path,
+                          columns=['x'])
+
+    def test_replace_store(self):
+        write_columnar(self.dframe, self.path)
+        write_columnar(self.dframe[['a']], self.path)
+        assert_frame_equal(read_columnar(self.path), self.dframe[['a']])
+        self.assertEqual(os.listdir(self.tempdir), ["data.pscol"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""
+Tests for the pysemantic.exporters module.
+"""
+
+import unittest
+import threading
+
+import numpy as np
+import pandas as pd
+
+from pysemantic.exporters import AerospikeExporter
+
+
+class FakeTimeout(Exception):
+    pass
+
+
+class FakeAerospikeClient(object):
+
+    """In-memory stand-in for an aerospike client, which times out on the
+    first `n_timeouts` writes of every key."""
+
+    def __init__(self, n_timeouts=0):
+        self.n_timeouts = n_timeouts
+        self.records = {}
+        self.attempts = {}
+        self.lock = threading.Lock()
+
+    def put(self, key, bins):
+        with self.lock:
+            attempts = self.attempts.get(key, 0)
+            self.attempts[key] = attempts + 1
+            if attempts < self.n_timeouts:
+                raise FakeTimeout(key)
+            self.records[key] = bins
+
+
+class TestAerospikeExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.dframe = pd.DataFrame({'a': np.arange(25),
+                                    'b': np.random.random(25),
+                                    'c': list("abcde") * 5},
+                                   index=np.arange(100, 125))
+        self.config = {'namespace': "skynet", 'set': "terminators",
+                       'batch_size': 4, 'workers': 3, 'backoff': 0}
+
+    def assertRecordsExported(self, client):
+        self.assertEqual(len(client.records), self.dframe.shape[0])
+        for ix, row in self.dframe.iterrows():
+            record = client.records[("skynet", "terminators", ix)]
+            self.assertEqual(record, {'a': row['a'], 'b': row['b'],
+                                      'c': row['c']})
+            self.assertIs(type(record['a']), int)
+
+    def test_export(self):
+        client = FakeAerospikeClient()
+        exporter = AerospikeExporter(self.config, self.dframe, client=client)
+        stats = exporter.run()
+        self.assertRecordsExported(client)
+        self.assertEqual(stats['written'], 25)
+        self.assertEqual(stats['batches'], 7)
+        self.assertEqual(stats['retries'], 0)
+        self.assertGreater(stats['records_per_second'], 0)
+
+    def test_export_chunks(self):
+        client = FakeAerospikeClient()
+        chunks = (self.dframe.iloc[i:i + 10] for i in range(0, 25, 10))
+        exporter = AerospikeExporter(self.config, chunks, client=client)
+        stats = exporter.run()
+        self.assertRecordsExported(client)
+        self.assertEqual(stats['written'], 25)
+        self.assertEqual(stats['batches'], 8)
+
+    def test_retries(self):
+        client = FakeAerospikeClient(n_timeouts=2)
+        exporter = AerospikeExporter(self.config, self.dframe, client=client,
+                                     retry_on=(FakeTimeout,))
+        stats = exporter.run()
+        self.assertRecordsExported(client)
+        self.assertEqual(stats['retries'], 50)
+        self.assertEqual(stats['failed'], 0)
+
+    def test_retries_exhausted(self):
+        client = FakeAerospikeClient(n_timeouts=2)
+        self.config['retries'] = 1
+        self.config['workers'] = 1
+        exporter = AerospikeExporter(self.config, self.dframe, client=client,
+                                     retry_on=(FakeTimeout,))
+        self.assertRaises(FakeTimeout, exporter.run)
+        self.assertEqual(exporter.stats['failed'], 1)
+        self.assertEqual(exporter.stats['written'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
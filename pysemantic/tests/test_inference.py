@@ -0,0 +1,120 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""
+Tests for the pysemantic.inference module.
+"""
+
+import shutil
+import datetime
+import tempfile
+import unittest
+import os.path as op
+
+import numpy as np
+import pandas as pd
+
+from pysemantic import project as pr
+from pysemantic.inference import (infer_schema, infer_column, sample_lines,
+                                  get_delimiter)
+
+TESTDATA = op.join(op.abspath(op.dirname(__file__)), "testdata")
+
+
+class TestInference(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tempdir = tempfile.mkdtemp()
+        cls.path = op.join(cls.tempdir, "events.csv")
+        n_rows = 20000
+        state = np.random.RandomState(0)
+        amount = state.randint(10, 100, size=n_rows).astype(str)
+        amount[::100] = "-"
+        cls.dframe = pd.DataFrame({
+            'id': np.arange(n_rows),
+            'amount': amount,
+            'score': state.random_sample(n_rows),
+            'kind': np.array(["click", "view", "buy"])[
+                state.randint(0, 3, size=n_rows)],
+            'comment': ["comment {0}".format(i) for i in xrange(n_rows)],
+            'date': pd.date_range("2015-01-01", periods=n_rows,
+                                  freq="min").strftime("%Y-%m-%d %H:%M")},
+            columns=["id", "amount", "score", "kind", "comment", "date"])
+        cls.dframe.to_csv(cls.path, index=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tempdir)
+
+    def test_sample_lines(self):
+        header, lines, complete = sample_lines(self.path, n_rows=1000,
+                                               n_blocks=10)
+        self.assertFalse(complete)
+        self.assertEqual(header.strip(), ",".join(self.dframe.columns))
+        self.assertLessEqual(len(lines), 1000)
+        ids = [int(line.split(",")[0]) for line in lines]
+        # Lines are read from the whole file, not only its head.
+        self.assertGreater(max(ids), 15000)
+        self.assertEqual(len(set(ids)), len(ids))
+        _, lines, complete = sample_lines(op.join(TESTDATA, "iris.csv"))
+        self.assertTrue(complete)
+        self.assertEqual(len(lines), 150)
+
+    def test_infer_column(self):
+        inferred = infer_column(pd.Series(["1", "2", "?", ""]))
+        self.assertEqual(inferred['dtype'], float)
+        self.assertEqual(inferred['na_values'], ["?"])
+        self.assertEqual(inferred['column_rules'], {'min': 1.0, 'max': 2.0})
+        inferred = infer_column(pd.Series(["a", "?", "b"]), rules=False)
+        self.assertEqual(inferred['dtype'], str)
+        self.assertEqual(inferred['na_values'], [])
+        self.assertEqual(inferred['column_rules'], {})
+        inferred = infer_column(pd.Series(["a", "b"] * 3), complete=True)
+        self.assertEqual(inferred['column_rules'],
+                         {'unique_values': ["a", "b"]})
+        inferred = infer_column(pd.Series(["a", "b"] * 3))
+        self.assertEqual(inferred['column_rules'], {})
+
+    def test_get_delimiter(self):
+        self.assertEqual(get_delimiter("a.tsv", "a,b\n"), "\t")
+        self.assertEqual(get_delimiter("a.txt", "a|b|c\n"), "|")
+        self.assertEqual(get_delimiter("a.txt", "a\n"), ",")
+
+    def test_infer_schema(self):
+        # Rules are not inferred from a sample unless asked for.
+        specs = infer_schema(self.path, n_rows=2000)
+        self.assertEqual(specs['column_rules'],
+                         {'amount': {'na_values': ["-"]}})
+        specs = infer_schema(self.path, n_rows=2000, workers=2, rules=True)
+        self.assertEqual(specs['path'], self.path)
+        self.assertEqual(specs['delimiter'], ",")
+        self.assertEqual(specs['dtypes'], {'id': int, 'amount': float,
+                                           'score': float, 'kind': str,
+                                           'comment': str,
+                                           'date': datetime.date})
+        rules = specs['column_rules']
+        self.assertEqual(rules['kind'],
+                         {'unique_values': ["buy", "click", "view"]})
+        self.assertEqual(rules['amount']['na_values'], ["-"])
+        self.assertGreaterEqual(rules['amount']['min'], 10)
+        self.assertLessEqual(rules['amount']['max'], 99)
+        self.assertNotIn("comment", rules)
+        self.assertNotIn("date", rules)
+
+    def test_load_inferred(self):
+        """Test if a dataset can be loaded with its inferred schema."""
+        specs = infer_schema(op.join(TESTDATA, "iris.csv"))
+        iris = pd.read_csv(op.join(TESTDATA, "iris.csv"))
+        loaded = pr.Project(schema={'iris': specs}).load_dataset("iris")
+        self.assertEqual(loaded.shape[0], iris.drop_duplicates().shape[0])
+        self.assertEqual(loaded['Species'].dtype.name, "category")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""
+Tests for the pysemantic.loggers module.
+"""
+
+import shutil
+import logging
+import tempfile
+import unittest
+import os.path as op
+from Queue import Queue
+
+import numpy as np
+import pandas as pd
+
+from pysemantic import loggers
+from pysemantic.loggers import (QueueHandler, QueueListener, log_json,
+                                setup_logging, summarize_rows)
+from pysemantic.validator import SeriesValidator
+
+
+class Unserializable(object):
+
+    """Object which fails the test if it is serialized."""
+
+    def __repr__(self):
+        raise AssertionError("Serialized a disabled message.")
+
+
+class TestLoggers(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("pysemantic.tests.loggers")
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.logger.setLevel(logging.NOTSET)
+        shutil.rmtree(self.tempdir)
+
+    def test_log_json_disabled(self):
+        self.logger.setLevel(logging.WARNING)
+        log_json(self.logger, Unserializable())
+        self.logger.setLevel(logging.INFO)
+        self.assertRaises(AssertionError, log_json, self.logger,
+                          Unserializable())
+
+    def test_summarize_rows(self):
+        self.assertEqual(summarize_rows(pd.Index(np.arange(1000)), 3),
+                         "1000 rows, starting with [0, 1, 2]")
+        self.assertEqual(summarize_rows(pd.Index(["a", "b"]), 3),
+                         '2 rows: ["a", "b"]')
+
+    def test_drop_na_disabled(self):
+        """Test if NAs and duplicates are dropped with INFO logs disabled."""
+        series = pd.Series([1.0, np.nan, 2.0, 2.0])
+        validator = SeriesValidator(data=series,
+                                    rules={'drop_na': True,
+                                           'drop_duplicates': True})
+        logger = logging.getLogger("pysemantic.validator")
+        logger.setLevel(logging.WARNING)
+        try:
+            validator.do_drop_na()
+            validator.do_drop_duplicates()
+        finally:
+            logger.setLevel(logging.NOTSET)
+        self.assertEqual(validator.data.tolist(), [1.0, 2.0])
+
+    def test_queue_listener(self):
+        logfile = op.join(self.tempdir, "test.log")
+        listener = QueueListener(Queue())
+        listener.add_handler(logging.FileHandler(logfile))
+        handler = QueueHandler(listener.queue)
+        self.logger.addHandler(handler)
+        self.logger.setLevel(logging.INFO)
+        try:
+            listener.start()
+            values = {'rows': 1}
+            self.logger.info("Loaded %s", values)
+            values['rows'] = 2
+            try:
+                raise ValueError("bad file")
+            except ValueError:
+                self.logger.exception("Loading failed")
+        finally:
+            self.logger.removeHandler(handler)
+            listener.stop()
+        with open(logfile, "r") as fid:
+            written = fid.read()
+        self.assertIn("Loaded {'rows': 1}", written)
+        self.assertIn("ValueError: bad file", written)
+
+    def test_setup_logging_reuse(self):
+        setup_logging("test_loggers")
+        handlers = list(loggers._listener.handlers)
+        logfile = loggers._logfile
+        setup_logging("test_loggers_other")
+        self.assertEqual(loggers._listener.handlers, handlers)
+        self.assertEqual(len(handlers), 1)
+        self.assertEqual(loggers._logfile, logfile)
+        root = logging.getLogger("pysemantic")
+        self.assertEqual(len([h for h in root.handlers
+                              if isinstance(h, QueueHandler)]), 1)
+
+if __name__ == '__main__':
+    unittest.main()
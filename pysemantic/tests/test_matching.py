@@ -0,0 +1,65 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""
+Tests for the pysemantic.matching module.
+"""
+
+import re
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pysemantic.matching import get_matcher, RegexMatcher
+
+
+class TestRegexMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.series = pd.Series(["A12", "b12", "A1", "xA12y", "A12$", np.nan,
+                                 "foo", "foobar", "barfoo", ""])
+
+    def _ideal(self, regex):
+        return np.array([not isinstance(x, basestring) or
+                         re.search(regex, x) is not None
+                         for x in self.series])
+
+    def test_kinds(self):
+        kinds = {'foo': "literal", '^foo': "prefix", 'foo$': "suffix",
+                 '^foo$': "equal", r'^[A-Z]\d{2}': "anchored",
+                 r'[A-Z]\d{2}': "regex", r'A12\$': "regex"}
+        for regex, kind in kinds.iteritems():
+            self.assertEqual(RegexMatcher(regex).kind, kind)
+
+    def test_match(self):
+        for regex in ['foo', '^foo', 'foo$', '^foo$', r'^[A-Z]\d{2}',
+                      r'[A-Z]\d{2}', r'A12\$', '^$']:
+            matched = RegexMatcher(regex).match(self.series)
+            self.assertTrue(np.all(matched == self._ideal(regex)), regex)
+
+    def test_match_categorical(self):
+        regex = r'[A-Z]\d{2}'
+        series = self.series.astype("category")
+        matched = RegexMatcher(regex).match(series)
+        self.assertTrue(np.all(matched == self._ideal(regex)))
+
+    def test_match_repeated(self):
+        regex = r'^[A-Z]\d{2}'
+        series = pd.concat([self.series] * 10)
+        matched = RegexMatcher(regex).match(series)
+        self.assertTrue(np.all(matched == np.tile(self._ideal(regex), 10)))
+        series = pd.Series([1, "A12", 2.5, "b", "A12"])
+        self.assertEqual(RegexMatcher(regex).match(series).tolist(),
+                         [True, True, True, False, True])
+
+    def test_matcher_cache(self):
+        self.assertIs(get_matcher(r'\d+'), get_matcher(r'\d+'))
+
+if __name__ == '__main__':
+    unittest.main()
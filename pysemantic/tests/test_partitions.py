@@ -0,0 +1,173 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""
+Tests for the pysemantic.partitions module.
+"""
+
+import os
+import shutil
+import warnings
+import datetime
+import tempfile
+import unittest
+import os.path as op
+
+import numpy as np
+import pandas as pd
+
+from pysemantic import project as pr
+from pysemantic.exporters import PartitionedExporter
+from pysemantic.partitions import (encode_value, decode_value, cast_value,
+                                   find_partitions, split_partitions,
+                                   is_partitioned_path, NULL_PARTITION)
+
+
+class TestPartitions(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = op.join(self.tempdir, "sales")
+        self.dframe = pd.DataFrame({'region': ["north", "south", None] * 4,
+                                    'year': [2014, 2015] * 6,
+                                    'amount': np.arange(12.0)})
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def export(self, **config):
+        config.update({'path': self.path, 'by': ["region", "year"]})
+        return PartitionedExporter(config, self.dframe).run()
+
+    def test_encode_value(self):
+        for value in ("north", "a/b=c", "x y", "007", 2015, 1.5):
+            self.assertEqual(decode_value(encode_value(value)), str(value))
+        self.assertEqual(cast_value("007"), "007")
+        self.assertEqual(cast_value("007", int), 7)
+        self.assertEqual(cast_value("2015-01-02", datetime.date),
+                         pd.Timestamp("2015-01-02"))
+        self.assertTrue(np.isnan(cast_value(None, float)))
+        self.assertNotIn("/", encode_value("a/b"))
+        self.assertEqual(encode_value(np.nan), NULL_PARTITION)
+        self.assertIsNone(decode_value(encode_value(None)))
+
+    def test_split_partitions(self):
+        parts = split_partitions(self.dframe, ["region"])
+        self.assertEqual([dirname for dirname, _ in parts],
+                         ["region=" + NULL_PARTITION, "region=north",
+                          "region=south"])
+        for _, group in parts:
+            self.assertEqual(group.columns.tolist(), ["amount", "year"])
+            self.assertEqual(group.shape[0], 4)
+
+    def test_export(self):
+        files = self.export(workers=2)
+        self.assertTrue(is_partitioned_path(self.path))
+        self.assertEqual(len(files), 6)
+        self.assertTrue(all([op.isfile(path) for path in files]))
+        path = op.join(self.path, "region=north", "year=2014",
+                       "part-00000.csv")
+        self.assertIn(path, files)
+        self.assertEqual(pd.read_csv(path)['amount'].tolist(),
+                         [0.0, 6.0])
+        # Exporting again replaces the directory.
+        self.dframe = self.dframe[self.dframe['region'] == "north"]
+        self.assertEqual(len(self.export()), 2)
+        self.assertEqual(os.listdir(self.path), ["region=north"])
+
+    def test_find_partitions(self):
+        self.export()
+        partitions = find_partitions(self.path)
+        self.assertEqual(len(partitions), 6)
+        partitions = find_partitions(self.path, {'region': ["north", None],
+                                                 'year': 2014})
+        self.assertEqual([values for _, values in partitions],
+                         [{'region': None, 'year': "2014"},
+                          {'region': 'north', 'year': "2014"}])
+        self.assertEqual(find_partitions(self.path, {'year': 2000}), [])
+
+    def test_export_refuses_other_paths(self):
+        os.makedirs(self.path)
+        with open(op.join(self.path, "notes.txt"), "w") as fid:
+            fid.write("foo")
+        self.assertRaises(ValueError, self.export)
+        self.assertEqual(os.listdir(self.path), ["notes.txt"])
+        os.remove(op.join(self.path, "notes.txt"))
+        self.assertEqual(len(self.export()), 6)
+
+    def test_round_trip(self):
+        """Test if string keys which look like numbers and missing keys
+        survive a round trip."""
+        self.dframe['zip'] = ["007", "010", "100"] * 4
+        config = {'path': self.path, 'by': ["zip", "region"]}
+        PartitionedExporter(config, self.dframe).run()
+        specs = {'path': self.path,
+                 'dataframe_rules': {'drop_na': False,
+                                     'drop_duplicates': False}}
+        project = pr.Project(schema={'sales': specs})
+        loaded = project.load_dataset("sales")
+        self.assertEqual(loaded.shape[0], 12)
+        self.assertEqual(sorted(loaded['zip'].unique()),
+                         ["007", "010", "100"])
+        self.assertEqual(loaded['region'].isnull().sum(), 4)
+        chunks = list(project.iter_dataset("sales", chunksize=2))
+        self.assertEqual(sum([chunk.shape[0] for chunk in chunks]), 12)
+        specs['dtypes'] = {'zip': int}
+        del specs['dataframe_rules']
+        loaded = pr.Project(schema={'sales': specs}).load_dataset("sales")
+        # The rows with missing regions, all in zip 100, are dropped.
+        self.assertEqual(loaded.shape[0], 8)
+        self.assertEqual(sorted(loaded['zip'].unique()), [7, 10])
+
+    def test_load_pruned(self):
+        self.export(format="csv")
+        specs = {'path': self.path, 'partition_filter': {'region': "south"},
+                 'exclude_columns': ["year"]}
+        project = pr.Project(schema={'sales': specs})
+        loaded = project.load_dataset("sales")
+        self.assertEqual(sorted(loaded.columns.tolist()),
+                         ["amount", "region"])
+        self.assertEqual(sorted(loaded['amount'].tolist()),
+                         [1.0, 4.0, 7.0, 10.0])
+        self.assertTrue((loaded['region'] == "south").all())
+        chunks = list(project.iter_dataset("sales", chunksize=1))
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(chunks[0].columns.tolist(),
+                         loaded.columns.tolist())
+
+    def test_nrows_ignored(self):
+        """Test if the nrows of a partitioned dataset is ignored with a
+        warning."""
+        self.export(format="csv")
+        specs = {'path': self.path, 'nrows': 2}
+        project = pr.Project(schema={'sales': specs})
+        with warnings.catch_warnings(record=True) as catcher:
+            warnings.simplefilter("always")
+            loaded = project.load_dataset("sales")
+            chunks = list(project.iter_dataset("sales", chunksize=3))
+        self.assertEqual(len(catcher), 2)
+        self.assertTrue(all([w.category is UserWarning for w in catcher]))
+        self.assertEqual(loaded.shape[0], 8)
+        self.assertEqual(sum([chunk.shape[0] for chunk in chunks]), 8)
+
+    def test_export_dataset(self):
+        project = pr.Project(schema={'sales': {
+            'path': op.join(op.abspath(op.dirname(__file__)), "testdata",
+                            "iris.csv"),
+            'exporter': {'kind': "partitioned", 'by': "Species"}}})
+        project.export_dataset("sales", outpath=self.path, chunksize=60)
+        files = sorted(find_partitions(self.path))
+        self.assertEqual([op.relpath(path, self.path) for path, _ in files],
+                         ["Species=setosa/part-00000.csv",
+                          "Species=versicolor/part-00000.csv",
+                          "Species=versicolor/part-00001.csv",
+                          "Species=virginica/part-00001.csv",
+                          "Species=virginica/part-00002.csv"])
+
+if __name__ == '__main__':
+    unittest.main()
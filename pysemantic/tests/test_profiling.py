@@ -0,0 +1,97 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""
+Tests for the pysemantic.profiling module.
+"""
+
+import unittest
+import os.path as op
+
+from pysemantic import project as pr
+from pysemantic.profiling import (LoadProfile, activate, current_profile,
+                                  stage, record_rule)
+
+IRIS = op.join(op.abspath(op.dirname(__file__)), "testdata", "iris.csv")
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_inactive(self):
+        self.assertIsNone(current_profile())
+        with stage("parse", 10) as record:
+            record['rows_out'] = 5
+        record_rule("a", "min", 0.1, 10, 5)
+        profile = LoadProfile("iris")
+        with activate(profile):
+            self.assertIs(current_profile(), profile)
+            with activate(None):
+                self.assertIsNone(current_profile())
+            with self.assertRaises(ValueError):
+                with stage("parse", 10):
+                    raise ValueError("bad file")
+        self.assertIsNone(current_profile())
+        self.assertEqual(len(profile.stages), 1)
+        self.assertEqual(profile.stages[0]['error'], "ValueError: bad file")
+        self.assertEqual(profile.rules, [])
+
+    def test_load_profile(self):
+        specs = {'path': IRIS, 'drop_duplicates': True,
+                 'column_rules': {'Sepal Length': {'min': 5.0},
+                                  'Species': {'regex': "^v"}}}
+        project = pr.Project(schema={'iris': specs})
+        self.assertIsNone(project.last_load_profile("iris"))
+        profiles = []
+        project.add_load_hook(profiles.append)
+        project.add_load_hook(lambda profile: 1 / 0)
+        iris = project.load_dataset("iris")
+        profile = project.last_load_profile("iris")
+        self.assertEqual(profiles, [profile])
+        self.assertEqual(profile.rows, iris.shape[0])
+        self.assertEqual(profile.bytes_read, op.getsize(IRIS))
+        self.assertGreaterEqual(profile.peak_memory, profile.start_memory)
+        self.assertEqual([record['stage'] for record in profile.stages],
+                         ["parse", "drop_na", "drop_duplicates",
+                          "column_rules"])
+        parse, _, drop, rules = profile.stages
+        self.assertEqual(parse['rows_out'], 150)
+        self.assertEqual(drop['rows_in'], 150)
+        self.assertEqual(drop['rows_out'], 147)
+        self.assertEqual(rules['rows_out'], iris.shape[0])
+        self.assertEqual(sorted([(r['column'], r['rule'])
+                                 for r in profile.rules]),
+                         [('Sepal Length', 'min'), ('Species', 'regex')])
+        for record in profile.rules:
+            self.assertLessEqual(record['rows_out'], record['rows_in'])
+        self.assertEqual(sum([r['rows_in'] - r['rows_out']
+                              for r in profile.rules]), 147 - iris.shape[0])
+        self.assertEqual(profile.to_dict()['rows'], iris.shape[0])
+        self.assertIn("drop_duplicates", repr(profile))
+
+        project.remove_load_hook(profiles.append)
+        project.load_dataset("iris")
+        self.assertEqual(len(profiles), 1)
+        self.assertIsNot(project.last_load_profile("iris"), profile)
+
+    def test_multifile_profile(self):
+        specs = {'path': [IRIS, IRIS], 'nrows': [150, 150], 'parallel': 2,
+                 'column_rules': {'Species': {'unique_values': ["setosa"]}}}
+        project = pr.Project(schema={'iris': specs})
+        iris = project.load_dataset("iris")
+        profile = project.last_load_profile("iris")
+        stages = [record['stage'] for record in profile.stages]
+        self.assertEqual(stages.count("parse"), 2)
+        self.assertEqual(stages.count("column_rules"), 2)
+        self.assertEqual(stages[-1], "concat")
+        self.assertEqual(profile.bytes_read, 2 * op.getsize(IRIS))
+        self.assertEqual(len(profile.rules), 2)
+        self.assertEqual(profile.stages[-1]['rows_out'], iris.shape[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,12 +8,16 @@
 
 """Tests for the project class."""
 
+import os
+import sys
 import os.path as op
 import tempfile
 import shutil
 import warnings
 import datetime
 import unittest
+import threading
+import traceback
 from ConfigParser import RawConfigParser, NoSectionError
 from copy import deepcopy
 
@@ -25,7 +29,8 @@ from pandas.io.parsers import ParserWarning
 import pysemantic.project as pr
 from pysemantic.tests.test_base import (BaseProjectTestCase, TEST_DATA_DICT,
                                         TEST_CONFIG_FILE_PATH, _dummy_postproc)
-from pysemantic.errors import MissingProject
+from pysemantic.errors import MissingProject, DatasetFileError
+from pysemantic.catalog import get_catalog
 
 try:
     from yaml import CLoader as Loader
@@ -179,6 +184,7 @@ class TestProjectClass(BaseProjectTestCase):
         pr.add_project("multi_iris", schema_fpath)
         try:
             ideal = pd.concat((iris, iris), axis=0)
+            ideal['Species'] = ideal['Species'].astype(object)
             actual = pr.Project('multi_iris').load_dataset("iris")
             self.assertDataFrameEqual(ideal, actual)
         finally:
@@ -189,6 +195,7 @@ class TestProjectClass(BaseProjectTestCase):
         """Test if specifying the sheetname loads the correct dataframe."""
         xl_project = pr.Project("test_excel")
         ideal_iris = self.project.load_dataset("iris")
+        ideal_iris['Species'] = ideal_iris['Species'].astype(object)
         actual_iris = xl_project.load_dataset("iris_renamed")
         self.assertDataFrameEqual(ideal_iris, actual_iris)
 
@@ -196,6 +203,7 @@ class TestProjectClass(BaseProjectTestCase):
         """Test if excel spreadsheets are read properly from the schema."""
         xl_project = pr.Project("test_excel")
         ideal_iris = self.project.load_dataset("iris")
+        ideal_iris['Species'] = ideal_iris['Species'].astype(object)
         actual_iris = xl_project.load_dataset("iris")
         self.assertDataFrameEqual(ideal_iris, actual_iris)
 
@@ -265,11 +273,34 @@ class TestProjectClass(BaseProjectTestCase):
             outpath = op.join(tempdir, dataset + ".csv")
             project.export_dataset(dataset, outpath=outpath)
             self.assertTrue(op.exists(outpath))
-            loaded = pd.read_csv(outpath)
+            loaded = pd.read_csv(outpath, dtype={'Species': "category"})
             self.assertDataFrameEqual(loaded, project.load_dataset(dataset))
         finally:
             shutil.rmtree(tempdir)
 
+    def test_export_dataset_columnar(self):
+        """Test if a dataset exported to a columnar store can be loaded from
+        it."""
+        tempdir = tempfile.mkdtemp()
+        project = pr.Project("pysemantic")
+        try:
+            ideal = project.load_dataset("iris")
+            outpath = op.join(tempdir, "iris.pscol") + "/"
+            project.export_dataset("iris", outpath=outpath)
+            self.assertTrue(op.isdir(outpath))
+
+            specs = {'path': outpath, 'exclude_columns': ['Sepal Width'],
+                     'nrows': 100}
+            project = pr.Project(schema={'iris': specs})
+            loaded = project.load_dataset("iris")
+            self.assertDataFrameEqual(loaded,
+                                      ideal.drop('Sepal Width', axis=1)[:100])
+            chunks = list(project.iter_dataset("iris", chunksize=30))
+            self.assertEqual([chunk.shape[0] for chunk in chunks],
+                             [30, 30, 30, 10])
+        finally:
+            shutil.rmtree(tempdir)
+
     def test_exclude_cols(self):
         """Test if importing data with excluded columns works."""
         filepath = op.join(op.abspath(op.dirname(__file__)), "testdata",
@@ -283,6 +314,33 @@ class TestProjectClass(BaseProjectTestCase):
         finally:
             pr.remove_dataset("pysemantic", "excl_iris")
 
+    def test_verify_dataset(self):
+        """Test if the files of a dataset are checked against the schema only
+        when verifying it."""
+        filepath = op.join(op.abspath(op.dirname(__file__)), "testdata",
+                           "iris.csv")
+        specs = {'path': [filepath, filepath], 'parallel': 2,
+                 'checksum': {'algorithm': "crc32",
+                              'value': ["d00dec44", "d00dec44"]},
+                 'use_columns': ["Species"], 'nrows': [150, 150]}
+        project = pr.Project(schema={'iris': specs})
+        self.assertEqual(project.verify_dataset("iris"),
+                         {'checksum': True, 'missing_columns': {},
+                          'valid': True})
+        specs['checksum']['value'][1] = "foo"
+        specs['use_columns'] = ["Species", "foo"]
+        project = pr.Project(schema={'iris': specs})
+        with warnings.catch_warnings(record=True) as catcher:
+            warnings.simplefilter("always")
+            project.get_project_specs()
+            self.assertEqual(len(catcher), 0)
+            report = project.verify_dataset("iris", workers=1)
+        self.assertEqual(len(catcher), 3)
+        self.assertFalse(report['checksum'])
+        self.assertFalse(report['valid'])
+        self.assertEqual(report['missing_columns'],
+                         {filepath: ["foo"]})
+
     def test_column_postprocessors(self):
         """Test if postprocessors work on column data properly."""
         filepath = op.join(op.abspath(op.dirname(__file__)), "testdata",
@@ -395,6 +453,113 @@ class TestProjectClass(BaseProjectTestCase):
         finally:
             shutil.rmtree(tempdir)
 
+    def test_export_dataset_chunks(self):
+        """Test if streaming a dataset to csv and hdf files in chunks exports
+        the same data as exporting it whole."""
+        tempdir = tempfile.mkdtemp()
+        project = pr.Project("pysemantic")
+        try:
+            ideal = project.load_dataset("iris")
+            outpath = op.join(tempdir, "iris.csv")
+            project.export_dataset("iris", outpath=outpath, chunksize=40)
+            loaded = pd.read_csv(outpath, dtype={'Species': "category"})
+            self.assertDataFrameEqual(loaded, ideal)
+
+            outpath = op.join(tempdir, "iris.h5")
+            project.export_dataset("iris", outpath=outpath)
+            project.export_dataset("iris", outpath=outpath, chunksize=40)
+            loaded = pd.read_hdf(outpath, "/pysemantic/iris")
+            self.assertDataFrameEqual(loaded, ideal)
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_export_empty_chunks(self):
+        """Test if streaming a dataset whose rows are all dropped to a csv
+        file writes its header."""
+        tempdir = tempfile.mkdtemp()
+        try:
+            datapath = op.join(tempdir, "data.csv")
+            pd.DataFrame({'a': [1, 2, 3], 'b': list("xyz")}).to_csv(
+                datapath, index=False)
+            specs = {'path': datapath,
+                     'column_rules': {'a': {'min': 10}}}
+            project = pr.Project(schema={'data': specs})
+            chunks = list(project.iter_dataset("data", chunksize=2))
+            self.assertEqual(len(chunks), 1)
+            self.assertEqual(chunks[0].shape, (0, 2))
+            outpath = op.join(tempdir, "out.csv")
+            project.export_dataset("data", outpath=outpath, chunksize=2)
+            with open(outpath, "r") as fid:
+                self.assertEqual(fid.read(), "a,b\n")
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_export_hdf_chunks_growing_strings(self):
+        """Test if a dataset whose strings grow across chunks is streamed to
+        an HDF table."""
+        tempdir = tempfile.mkdtemp()
+        try:
+            datapath = op.join(tempdir, "data.csv")
+            ideal = pd.DataFrame({'name': ["a", "bb", "c" * 10, "d" * 50,
+                                           "e", "f" * 7, "g" * 100],
+                                  'kind': ["x", "x", "x", "y", "z", "y",
+                                           "x"]},
+                                 columns=["name", "kind"])
+            ideal.to_csv(datapath, index=False)
+            specs = {'path': datapath,
+                     'dtypes': {'name': str, 'kind': str},
+                     'column_rules': {'kind': {'unique_values': ["x", "y",
+                                                                 "z"]}}}
+            project = pr.Project(schema={'data': specs})
+            outpath = op.join(tempdir, "data.h5")
+            project.export_dataset("data", outpath=outpath, chunksize=3)
+            loaded = pd.read_hdf(outpath, "/None/data")
+            self.assertEqual(loaded['name'].tolist(), ideal['name'].tolist())
+            self.assertEqual(loaded['kind'].tolist(), ideal['kind'].tolist())
+            self.assertEqual(loaded['kind'].cat.categories.tolist(),
+                             ["x", "y", "z"])
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_prefetch_close(self):
+        """Test if the background reader stops when the consumer stops before
+        the end of the chunks."""
+        closed = []
+
+        def chunks():
+            try:
+                for i in range(3):
+                    yield i
+            finally:
+                closed.append(True)
+
+        prefetched = pr._prefetch(chunks())
+        self.assertEqual(next(prefetched), 0)
+        closer = threading.Thread(target=prefetched.close)
+        closer.daemon = True
+        closer.start()
+        closer.join(5)
+        self.assertFalse(closer.is_alive())
+        self.assertEqual(closed, [True])
+
+    def test_prefetch_errors(self):
+        """Test if errors raised while reading chunks ahead are raised by the
+        consumer."""
+        def chunks():
+            yield pd.DataFrame({'a': [1]})
+            raise ValueError("foo")
+
+        prefetched = pr._prefetch(chunks())
+        self.assertEqual(next(prefetched).shape, (1, 1))
+        try:
+            next(prefetched)
+        except ValueError:
+            # The traceback leads to where the error was raised.
+            frames = traceback.extract_tb(sys.exc_info()[2])
+            self.assertEqual(frames[-1][2], "chunks")
+        else:
+            raise AssertionError("ValueError not raised.")
+
     def test_reload_data_dict(self):
         """Test if the reload_data_dict method works."""
         project = pr.Project("pysemantic")
@@ -546,6 +711,58 @@ class TestProjectClass(BaseProjectTestCase):
             pr.remove_project("wrong_dtype")
             shutil.rmtree(tempdir)
 
+    def test_coerce_dtypes(self):
+        """Test if the declared dtypes are coerced after parsing when
+        coerce_dtypes is set, and if the coerced columns are reported."""
+        tempdir = tempfile.mkdtemp()
+        x = map(str, range(20))
+        x[13] = ""
+        y = map(str, range(20))
+        y[7] = "aa"
+        dframe = pd.DataFrame.from_dict(dict(a=x, b=y, c=range(20),
+                                             d=range(20)))
+        outfile = op.join(tempdir, "testdata.csv")
+        dframe.to_csv(outfile, index=False)
+        specs = dict(delimiter=',', path=outfile, coerce_dtypes=True,
+                     dtypes={'a': int, 'b': int, 'c': int, 'd': float},
+                     dataframe_rules={'drop_na': False})
+        try:
+            project = pr.Project(schema={'testdata': specs})
+            with warnings.catch_warnings(record=True) as catcher:
+                loaded = project.load_dataset("testdata")
+                self.assertEqual(len(catcher), 1)
+                self.assertTrue(issubclass(catcher[0].category, UserWarning))
+            self.assertEqual(loaded['a'].dtype, float)
+            self.assertEqual(loaded['b'].dtype, np.dtype('O'))
+            self.assertEqual(loaded['c'].dtype, int)
+            self.assertEqual(loaded['d'].dtype, float)
+            report = project.dtype_report("testdata")
+            report = dict([(item['column'], item) for item in report])
+            self.assertItemsEqual(report.keys(), ['a', 'b'])
+            self.assertEqual(report['a']['reason'], "missing values")
+            self.assertEqual(report['a']['count'], 1)
+            self.assertEqual(report['a']['dtype'], "float64")
+            self.assertEqual(report['b']['reason'], "non-numerical values")
+            self.assertEqual(report['b']['count'], 1)
+            self.assertEqual(report['b']['file'], outfile)
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_coerce_dtypes_multifile(self):
+        """Test if dtypes are coerced for each file of a multifile dataset."""
+        specs = pr.get_schema_specs("pysemantic", "multi_iris")
+        specs['coerce_dtypes'] = True
+        specs['dtypes']['Petal Length'] = int
+        project = pr.Project(schema={'multi_iris': specs})
+        loaded = project.load_dataset("multi_iris")
+        self.assertEqual(loaded['Petal Length'].dtype, float)
+        report = project.dtype_report("multi_iris")
+        self.assertEqual(len(report), 2)
+        self.assertItemsEqual([item['file'] for item in report],
+                              specs['path'])
+        for item in report:
+            self.assertEqual(item['reason'], "fractional values")
+
     def test_load_dataset_missing_nrows(self):
         """Test if the project loads datasets properly if the nrows parameter
         is not provided in the schema.
@@ -614,6 +831,7 @@ class TestProjectClass(BaseProjectTestCase):
                      dtype={'Sepal Length': str})
         self.assertTrue(self.project.set_dataset_specs("iris", specs))
         expected = pd.read_csv(**specs)
+        expected['Species'] = expected['Species'].astype("category")
         loaded = self.project.load_dataset("iris")
         self.assertDataFrameEqual(expected, loaded)
 
@@ -655,6 +873,313 @@ class TestProjectClass(BaseProjectTestCase):
         dframe.set_index(np.arange(dframe.shape[0]), inplace=True)
         self.assertDataFrameEqual(loaded['multi_iris'], dframe)
 
+    def test_load_multifile_parallel(self):
+        """Test if loading the files of a multifile dataset in parallel
+        produces the same data as loading them sequentially."""
+        ideal = self.project.load_dataset("multi_iris")
+        loaded = self.project.load_dataset("multi_iris", workers=2)
+        self.assertDataFrameEqual(loaded, ideal)
+        specs = pr.get_schema_specs("pysemantic", "multi_iris")
+        specs['parallel'] = 2
+        project = pr.Project(schema={'multi_iris': specs})
+        self.assertEqual(project.validators['multi_iris'].parallel, 2)
+        self.assertDataFrameEqual(project.load_dataset("multi_iris"), ideal)
+
+    def test_lazy_validators(self):
+        """Test if the validators of datasets are only built when the datasets
+        are first used."""
+        specs = pr.get_schema_specs("pysemantic")
+        project = pr.Project(schema=specs)
+        self.assertItemsEqual(project.datasets, specs.keys())
+        self.assertEqual(project.validators.built, [])
+        self.assertIn("iris", project.validators)
+        self.assertEqual(len(project.validators), len(specs))
+        validator = project.validators['iris']
+        self.assertEqual(project.validators.built, ["iris"])
+        self.assertIs(project.validators['iris'], validator)
+        self.assertEqual(project.get_dataset_specs("iris")['nrows'],
+                         self.expected_specs['iris']['nrows'])
+
+    def test_load_multifile_parallel_error(self):
+        """Test if the error raised when a file of a multifile dataset fails to
+        load names the file."""
+        tempdir = tempfile.mkdtemp()
+        specs = pr.get_schema_specs("pysemantic", "multi_iris")
+        bad_path = op.join(tempdir, "bad_iris.csv")
+        dframe = pd.read_csv(specs['path'][0])
+        dframe['Sepal Length'] = dframe['Sepal Length'].astype(str)
+        dframe.loc[10, 'Sepal Length'] = "foo"
+        dframe.to_csv(bad_path, index=False)
+        specs['path'] = [specs['path'][0], bad_path]
+        try:
+            project = pr.Project(schema={'multi_iris': specs})
+            with self.assertRaises(DatasetFileError) as context:
+                project.load_dataset("multi_iris", workers=2)
+            self.assertEqual(context.exception.filepath, bad_path)
+            self.assertIn(bad_path, str(context.exception))
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_load_all_concurrent(self):
+        """Test if loading all datasets concurrently works as expected."""
+        ideal = self.project.load_datasets()
+        loaded, summary = self.project.load_datasets(workers=3,
+                                                     return_summary=True)
+        self.assertItemsEqual(loaded.keys(), ideal.keys())
+        self.assertItemsEqual(summary.keys(), ideal.keys())
+        for name in ('iris', 'person_activity', 'multi_iris'):
+            self.assertDataFrameEqual(loaded[name], ideal[name])
+        for stats in summary.itervalues():
+            self.assertIsNone(stats['error'])
+            self.assertGreater(stats['size'], 0)
+            self.assertGreaterEqual(stats['time'], 0)
+
+    def test_load_all_failure_summary(self):
+        """Test if a dataset that fails to load is reported in the summary
+        without affecting the others."""
+        tempdir = tempfile.mkdtemp()
+        specs = pr.get_schema_specs("pysemantic")
+        bad_path = op.join(tempdir, "bad_iris.csv")
+        dframe = pd.read_csv(specs['iris']['path'])
+        dframe['Sepal Length'] = dframe['Sepal Length'].astype(str)
+        dframe.loc[10, 'Sepal Length'] = "foo"
+        dframe.to_csv(bad_path, index=False)
+        specs['multi_iris']['path'] = [specs['iris']['path'], bad_path]
+        try:
+            project = pr.Project(schema=specs)
+            with warnings.catch_warnings(record=True):
+                loaded, summary = project.load_datasets(workers=2,
+                                                        return_summary=True)
+            self.assertNotIn('multi_iris', loaded)
+            self.assertIn(bad_path, summary['multi_iris']['error'])
+            self.assertItemsEqual(loaded.keys(), ('iris', 'person_activity',
+                                                  'bad_iris',
+                                                  'random_row_iris'))
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_disk_cache(self):
+        """Test if cleaned datasets are cached on disk, and if the cache is
+        invalidated when the file or the specifications change."""
+        tempdir = tempfile.mkdtemp()
+        outpath = op.join(tempdir, "iris.csv")
+        specs = pr.get_schema_specs("pysemantic", "iris")
+        dframe = pd.read_csv(specs['path'])
+        dframe.to_csv(outpath, index=False)
+        specs['path'] = outpath
+        specs['cache'] = True
+        try:
+            project = pr.Project(schema={'iris': specs})
+            project._disk_cache.cachedir = op.join(tempdir, "cache")
+            ideal = project.load_dataset("iris")
+            self.assertEqual(len(os.listdir(project._disk_cache.cachedir)), 1)
+
+            def _fail(*args, **kwargs):
+                raise AssertionError("Dataset was not loaded from the cache.")
+            org_loader = project._load_dataset
+            project._load_dataset = _fail
+            self.assertDataFrameEqual(project.load_dataset("iris"), ideal)
+
+            # Changing the specifications should miss the cache.
+            project._load_dataset = org_loader
+            project.set_dataset_specs("iris", {'nrows': 100})
+            self.assertEqual(project.load_dataset("iris").shape[0], 100)
+            self.assertEqual(len(os.listdir(project._disk_cache.cachedir)), 1)
+
+            # Changing the file should miss the cache.
+            project = pr.Project(schema={'iris': specs})
+            project._disk_cache.cachedir = op.join(tempdir, "cache")
+            dframe.iloc[:50].to_csv(outpath, index=False)
+            os.utime(outpath, (0, 0))
+            self.assertEqual(project.load_dataset("iris").shape[0], 50)
+
+            project.invalidate_cache("iris")
+            self.assertEqual(len(os.listdir(project._disk_cache.cachedir)), 0)
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_cache_postprocessors(self):
+        """Test if the caches miss when a postprocessor is replaced by
+        another anonymous function."""
+        tempdir = tempfile.mkdtemp()
+        specs = pr.get_schema_specs("pysemantic", "iris")
+        specs['cache'] = True
+        specs['column_rules'] = {
+            'Sepal Length': {'postprocessors': [lambda x: x + 1]}}
+        try:
+            project = pr.Project(schema={'iris': deepcopy(specs)},
+                                 cache_size=2 ** 20)
+            project._disk_cache.cachedir = tempdir
+            ideal = project.load_dataset("iris")
+            rules = project.column_rules['iris']['Sepal Length']
+            rules['postprocessors'] = [lambda x: x + 2]
+            loaded = project.load_dataset("iris")
+            self.assertTrue(np.allclose(loaded['Sepal Length'],
+                                        ideal['Sepal Length'] + 1))
+            specs['column_rules']['Sepal Length']['postprocessors'] = \
+                [lambda x: x - 1]
+            project = pr.Project(schema={'iris': specs})
+            project._disk_cache.cachedir = tempdir
+            loaded = project.load_dataset("iris")
+            self.assertTrue(np.allclose(loaded['Sepal Length'],
+                                        ideal['Sepal Length'] - 2))
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_memory_cache(self):
+        """Test if loaded datasets are kept in memory, and invalidated when
+        their specifications change."""
+        project = pr.Project("pysemantic", cache_size=2 ** 20)
+        ideal = project.load_dataset("iris")
+        loaded = project.load_dataset("iris")
+        self.assertDataFrameEqual(loaded, ideal)
+        loaded['Species'] = "foo"
+        self.assertDataFrameEqual(project.load_dataset("iris"), ideal)
+        info = project.cache_info()
+        self.assertEqual(info['hits'], 2)
+        self.assertEqual(info['misses'], 1)
+        self.assertEqual(info['keys'], ["iris"])
+        self.assertEqual(info['size'],
+                         ideal.memory_usage(deep=True).sum())
+
+        project.set_dataset_specs("iris", {'nrows': 100})
+        self.assertEqual(project.cache_info()['keys'], [])
+        self.assertEqual(project.load_dataset("iris").shape[0], 100)
+        project.reload_data_dict()
+        self.assertEqual(project.cache_info()['keys'], [])
+        self.assertDataFrameEqual(project.load_dataset("iris"), ideal)
+
+        # Random rows are not cached
+        project.load_dataset("random_row_iris")
+        self.assertEqual(project.cache_info()['keys'], ["iris"])
+
+    def test_unique_values_categorical(self):
+        """Test if columns with declared unique values are loaded as
+        categoricals, across multiple files."""
+        tempdir = tempfile.mkdtemp()
+        specs = pr.get_schema_specs("pysemantic", "iris")
+        dframe = pd.read_csv(specs['path'])
+        noisy = dframe.copy()
+        noisy.loc[::10, 'Species'] = "lily"
+        paths = [op.join(tempdir, "iris.csv"), op.join(tempdir, "noisy.csv")]
+        dframe.to_csv(paths[0], index=False)
+        noisy.to_csv(paths[1], index=False)
+        specs['path'] = paths
+        specs['nrows'] = [150, 150]
+        categories = specs['column_rules']['Species']['unique_values']
+        try:
+            project = pr.Project(schema={'iris': specs})
+            self.assertEqual(
+                project.get_dataset_specs("iris")[0]['dtype']['Species'],
+                "category")
+            loaded = project.load_dataset("iris")
+            self.assertEqual(loaded['Species'].dtype.name, "category")
+            self.assertEqual(loaded['Species'].cat.categories.tolist(),
+                             categories)
+            n_rows = dframe.drop_duplicates().shape[0] + \
+                noisy[noisy['Species'] != "lily"].drop_duplicates().shape[0]
+            self.assertEqual(loaded.shape[0], n_rows)
+            self.assertEqual(loaded['Species'].isnull().sum(), 0)
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_regex_report(self):
+        """Test if the values matched and rejected by regex rules are
+        counted."""
+        specs = pr.get_schema_specs("pysemantic", "person_activity")
+        specs['column_rules']['tag']['regex'] = r'^010-000-024-033$'
+        project = pr.Project(schema={'person_activity': specs})
+        loaded = project.load_dataset("person_activity")
+        report = project.regex_report("person_activity")
+        self.assertItemsEqual(report.keys(), ['activity', 'sequence_name',
+                                              'tag'])
+        self.assertEqual(report['tag']['matched'], loaded.shape[0])
+        for counts in report.itervalues():
+            self.assertEqual(counts['matched'] + counts['rejected'], 100)
+
+    def test_iter_dataset(self):
+        """Test if iterating over a dataset in chunks produces the same data as
+        loading it at once."""
+        for name in ("iris", "person_activity", "multi_iris"):
+            chunks = list(self.project.iter_dataset(name, chunksize=40))
+            self.assertTrue(all([chunk.shape[0] <= 40 for chunk in chunks]))
+            self.assertDataFrameEqual(pd.concat(chunks),
+                                      self.project.load_dataset(name))
+
+    def test_iter_dataset_drop_duplicates(self):
+        """Test if duplicate rows are dropped across chunks when iterating over
+        a dataset."""
+        iris_specs = pr.get_schema_specs("pysemantic", "iris")
+        del iris_specs['dataframe_rules']
+        project = pr.Project(schema={'iris': iris_specs})
+        ideal = project.load_dataset("iris")
+        chunks = list(project.iter_dataset("iris", chunksize=20))
+        self.assertEqual(ideal.shape[0], 147)
+        self.assertDataFrameEqual(pd.concat(chunks), ideal)
+
+    def test_record_nrows(self):
+        """Test if the number of rows of a loaded dataset is written to the
+        catalog only when it changes."""
+        catalog = get_catalog(pr.locate_config_file())
+        calls = []
+        set_nrows = catalog.set_nrows
+        catalog.set_nrows = lambda *args: calls.append(args) or \
+            set_nrows(*args)
+        try:
+            project = pr.Project("pysemantic")
+            for _ in range(2):
+                project._memory_cache.invalidate()
+                loaded = project.load_dataset("iris")
+        finally:
+            del catalog.set_nrows
+        self.assertEqual(len(calls), 1)
+        info = [x for x in catalog.get_datasets("pysemantic")
+                if x['name'] == "iris"][0]
+        self.assertEqual(info['nrows'], loaded.shape[0])
+
+    def test_drop_seen_rows(self):
+        """Test if rows are deduplicated by their values and not by their
+        hashes."""
+        # hash(-1) == hash(-2) in CPython.
+        seen = set()
+        first = pd.DataFrame({'a': [-1, 1], 'b': [np.nan, 2.0]})
+        second = pd.DataFrame({'a': [-2, -1, 1], 'b': [np.nan, np.nan, 3.0]})
+        self.assertEqual(pr._drop_seen_rows(first, seen).shape[0], 2)
+        deduped = pr._drop_seen_rows(second, seen)
+        self.assertEqual(deduped['a'].tolist(), [-2, 1])
+        self.assertEqual(len(seen), 4)
+
+    def test_drop_seen_rows_memory(self):
+        """Test if the rows seen while deduplicating a stream are kept as
+        hashes of a fixed size, and not as their values."""
+        seen = set()
+        chunk = pd.DataFrame({'a': ["x" * 10000, "y" * 10000, "x" * 10000],
+                              'b': [1.5, np.nan, 1.5]})
+        self.assertEqual(pr._drop_seen_rows(chunk, seen).shape[0], 2)
+        self.assertEqual(len(seen), 2)
+        for key in seen:
+            self.assertLess(key, 2 ** 128)
+            self.assertLessEqual(sys.getsizeof(key), sys.getsizeof(2 ** 127))
+        # Integral floats and integers are the same values across chunks.
+        chunk = pd.DataFrame({'a': ["x" * 10000], 'b': [1.5]})
+        self.assertEqual(pr._drop_seen_rows(chunk, seen).shape[0], 0)
+        first = pd.DataFrame({'a': [1, 2]})
+        second = pd.DataFrame({'a': [1.0, np.nan]})
+        seen = set()
+        pr._drop_seen_rows(first, seen)
+        self.assertEqual(pr._drop_seen_rows(second, seen).shape[0], 1)
+
+    def test_iter_dataset_random_rows(self):
+        """Test if random row selection works when iterating over a
+        dataset."""
+        chunks = list(self.project.iter_dataset("random_row_iris",
+                                                chunksize=20))
+        self.assertItemsEqual([chunk.shape[0] for chunk in chunks],
+                              [20, 20, 10])
+        loaded = pd.concat(chunks)
+        self.assertFalse(np.all(loaded.index.values == np.arange(50)))
+        self.assertEqual(np.unique(loaded.index.values).shape[0], 50)
+
     def test_init_project_yaml_dump(self):
         """Test initialization of Project class with the raw yaml dump."""
         project_specs = pr.get_schema_specs('pysemantic')
@@ -687,7 +1212,12 @@ class TestProjectClass(BaseProjectTestCase):
         for name in ['iris', 'person_activity']:
             loaded = self.project.load_dataset(name)
             for colname in loaded:
-                if loaded[colname].dtype == np.dtype('O'):
+                if loaded[colname].dtype.name == "category":
+                    col_rules = self.data_specs[name]['column_rules']
+                    self.assertIn('unique_values', col_rules[colname])
+                    self.assertEqual(self.data_specs[name]['dtypes'][colname],
+                                     str)
+                elif loaded[colname].dtype == np.dtype('O'):
                     self.assertEqual(self.data_specs[name]['dtypes'][colname],
                                      str)
                 elif loaded[colname].dtype == np.dtype('<M8[ns]'):
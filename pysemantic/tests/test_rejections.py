@@ -0,0 +1,159 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""
+Tests for the pysemantic.rejections module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+import os.path as op
+
+import numpy as np
+import pandas as pd
+
+from pysemantic import project as pr
+from pysemantic.rejections import RejectionMask, Rejections
+from pysemantic.validator import DataFrameValidator
+
+IRIS = op.join(op.abspath(op.dirname(__file__)), "testdata", "iris.csv")
+
+
+class TestRejections(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.iris = pd.read_csv(IRIS)
+        self.specs = {'path': IRIS,
+                      'column_rules': {'Sepal Length': {'min': 5.0},
+                                       'Species': {'regex': "^v"}}}
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_mask(self):
+        mask = RejectionMask.from_positions([0, 3, 9], 11)
+        self.assertEqual(mask.count, 3)
+        self.assertEqual(mask.bits.nbytes, 2)
+        self.assertEqual(mask.positions().tolist(), [0, 3, 9])
+        combined = mask | RejectionMask.from_positions([1, 3], 11)
+        self.assertEqual(combined.positions().tolist(), [0, 1, 3, 9])
+        self.assertEqual(combined.count, 4)
+
+    def test_save_load(self):
+        first = Rejections(5)
+        first.add("a", "min", np.array([1, 2]))
+        first.add(None, "drop_na", np.array([4]))
+        first.add("b", "max", np.array([], dtype=int))
+        second = Rejections(3)
+        second.add("a", "min", np.array([0]))
+        combined = Rejections.concatenate([first, second])
+        self.assertEqual(combined.n_rows, 8)
+        self.assertEqual(list(combined), [(None, "drop_na"), ("a", "min")])
+        self.assertEqual(combined["a", "min"].tolist(), [1, 2, 5])
+        self.assertEqual(combined.rejected().tolist(), [1, 2, 4, 5])
+        path = op.join(self.tempdir, "iris.rejections.npz")
+        combined.save(path)
+        loaded = Rejections.load(path)
+        self.assertEqual(loaded.n_rows, 8)
+        self.assertEqual(loaded.counts(), combined.counts())
+        self.assertEqual(loaded["a", "min"].tolist(), [1, 2, 5])
+
+    def test_clean(self):
+        """Test if the rejected rows are numbered as in the dataframe before
+        it is cleaned."""
+        dframe = self.iris.copy()
+        dframe.index = dframe.index[::-1]
+        validator = DataFrameValidator(data=dframe,
+                                       rules={'nrows': {'count': 100}},
+                                       column_rules=self.specs['column_rules'])
+        cleaned = validator.clean()
+        rejections = validator.rejections
+        self.assertEqual(rejections.n_rows, 150)
+        # Column rules are only enforced on the rows which are not
+        # duplicates.
+        duplicated = self.iris[:100].duplicated().values
+        self.assertEqual(rejections[None, "drop_duplicates"].tolist(),
+                         np.flatnonzero(duplicated).tolist())
+        short = (self.iris['Sepal Length'].values[:100] < 5.0) & ~duplicated
+        self.assertEqual(rejections["Sepal Length", "min"].tolist(),
+                         np.flatnonzero(short).tolist())
+        setosa = np.arange(100) < 50
+        self.assertEqual(rejections["Species", "regex"].tolist(),
+                         np.flatnonzero(setosa & ~duplicated).tolist())
+        kept = np.setdiff1d(np.arange(100), rejections.rejected())
+        self.assertEqual(cleaned.shape[0], len(kept))
+
+    def test_project_rejections(self):
+        project = pr.Project(schema={'iris': self.specs})
+        self.assertIsNone(project.rejections("iris"))
+        iris = project.load_dataset("iris")
+        rejections = project.rejections("iris")
+        self.assertEqual(rejections.n_rows, 150)
+        self.assertEqual(iris.shape[0], 150 - len(rejections.rejected()))
+        outpath = op.join(self.tempdir, "iris.csv")
+        project.export_dataset("iris", outpath=outpath, save_rejections=True)
+        loaded = Rejections.load(outpath + ".rejections.npz")
+        self.assertEqual(loaded.counts(), rejections.counts())
+
+    def test_stale_rejections(self):
+        """Test if rejections are only written along with the dataframe of
+        the load which recorded them."""
+        outpath = op.join(self.tempdir, "iris.csv")
+        sidecar = outpath + ".rejections.npz"
+        project = pr.Project(schema={'iris': self.specs}, cache_size=2 ** 20)
+        first = project.load_dataset("iris")
+        counts = project.rejections("iris").counts()
+        # A dataframe from the memory cache has the rejections of the load
+        # which filled the cache.
+        cached = project.load_dataset("iris")
+        self.assertEqual(project.rejections("iris").counts(), counts)
+        with warnings.catch_warnings(record=True) as catcher:
+            warnings.simplefilter("always")
+            project.export_dataset("iris", dataframe=first, outpath=outpath,
+                                   save_rejections=True)
+            self.assertEqual(len(catcher), 1)
+        self.assertFalse(op.exists(sidecar))
+        project.export_dataset("iris", dataframe=cached, outpath=outpath,
+                               save_rejections=True)
+        self.assertEqual(Rejections.load(sidecar).counts(), counts)
+
+        os.remove(sidecar)
+        specs = dict(self.specs, cache=True)
+        project = pr.Project(schema={'iris': specs})
+        project._disk_cache.cachedir = op.join(self.tempdir, "cache")
+        project.load_dataset("iris")
+        self.assertIsNotNone(project.rejections("iris"))
+        project = pr.Project(schema={'iris': specs})
+        project._disk_cache.cachedir = op.join(self.tempdir, "cache")
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter("always")
+            project.export_dataset("iris", outpath=outpath,
+                                   save_rejections=True)
+        self.assertIsNone(project.rejections("iris"))
+        self.assertFalse(op.exists(sidecar))
+
+    def test_multifile_rejections(self):
+        specs = dict(self.specs)
+        specs.update({'path': [IRIS, IRIS], 'nrows': [150, 150]})
+        project = pr.Project(schema={'iris': specs})
+        project.load_dataset("iris")
+        rejections = project.rejections("iris")
+        self.assertEqual(rejections.n_rows, 300)
+        setosa = (self.iris['Species'] == "setosa").values & \
+            ~self.iris.duplicated().values
+        expected = np.flatnonzero(np.hstack((setosa, setosa)))
+        self.assertEqual(rejections["Species", "regex"].tolist(),
+                         expected.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2015 jaidev <jaidev@newton>
+#
+# Distributed under terms of the BSD 3-clause license.
+
+"""
+Tests for the pysemantic.specfile module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import os.path as op
+
+import yaml
+
+from pysemantic import specfile
+from pysemantic.specfile import (read_specfile, write_specfile,
+                                 invalidate_specfile)
+
+
+class TestSpecfile(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = op.join(self.tempdir, "schema.yaml")
+        self.specs = {'iris': {'path': '/tmp/iris.csv', 'dtypes': {'a': str}},
+                      'diamonds': {'path': '/tmp/diamonds.csv'}}
+        with open(self.path, "w") as fid:
+            yaml.dump(self.specs, fid)
+        self.n_parsed = 0
+        self.yaml_load = specfile.yaml.load
+
+        def counting_load(*args, **kwargs):
+            self.n_parsed += 1
+            return self.yaml_load(*args, **kwargs)
+
+        specfile.yaml.load = counting_load
+
+    def tearDown(self):
+        specfile.yaml.load = self.yaml_load
+        invalidate_specfile(self.path)
+        shutil.rmtree(self.tempdir)
+
+    def test_parsed_once(self):
+        self.assertEqual(read_specfile(self.path), self.specs)
+        self.assertEqual(read_specfile(self.path, "iris"), self.specs['iris'])
+        self.assertEqual(read_specfile(self.path, "foo"), {})
+        self.assertEqual(self.n_parsed, 1)
+
+    def test_copies(self):
+        specs = read_specfile(self.path)
+        specs['iris']['path'] = "/tmp/foo.csv"
+        del specs['diamonds']
+        read_specfile(self.path, "iris")['dtypes']['b'] = int
+        self.assertEqual(read_specfile(self.path), self.specs)
+
+    def test_external_change(self):
+        read_specfile(self.path)
+        self.specs['iris']['nrows'] = 10
+        with open(self.path, "w") as fid:
+            yaml.dump(self.specs, fid)
+        os.utime(self.path, (0, 0))
+        self.assertEqual(read_specfile(self.path, "iris")['nrows'], 10)
+        self.assertEqual(self.n_parsed, 2)
+
+    def test_write(self):
+        read_specfile(self.path)
+        self.specs['iris']['nrows'] = 10
+        write_specfile(self.path, self.specs)
+        self.specs['iris']['nrows'] = 20
+        self.assertEqual(read_specfile(self.path, "iris")['nrows'], 10)
+        self.assertEqual(self.n_parsed, 1)
+        invalidate_specfile(self.path)
+        self.assertEqual(read_specfile(self.path, "iris")['nrows'], 10)
+        self.assertEqual(self.n_parsed, 2)
+
+    def test_sidecar(self):
+        read_specfile(self.path, use_sidecar=True)
+        sidecar = op.join(self.tempdir, ".schema.yaml.pickle")
+        self.assertTrue(op.isfile(sidecar))
+        invalidate_specfile()
+        self.assertEqual(read_specfile(self.path, use_sidecar=True),
+                         self.specs)
+        self.assertEqual(self.n_parsed, 1)
+        self.specs['iris']['nrows'] = 10
+        write_specfile(self.path, self.specs, use_sidecar=True)
+        invalidate_specfile()
+        self.assertEqual(read_specfile(self.path, "iris", use_sidecar=True),
+                         self.specs['iris'])
+        self.assertEqual(self.n_parsed, 1)
+        invalidate_specfile(self.path)
+        self.assertFalse(op.isfile(sidecar))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,9 +10,17 @@
 Tests for a the pysemantic.utils module.
 """
 
+import os
+import shutil
+import tempfile
 import unittest
 import os.path as op
-from pysemantic.utils import colnames, get_md5_checksum
+
+import numpy as np
+import pandas as pd
+
+from pysemantic.utils import (colnames, get_md5_checksum, read_header,
+                              read_headers, append_hdf)
 
 
 class TestUtils(unittest.TestCase):
@@ -27,6 +35,60 @@ class TestUtils(unittest.TestCase):
         actual = colnames(self.filepath)
         self.assertItemsEqual(actual, ideal)
 
+    def test_read_header(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            path = op.join(tempdir, "data.csv")
+            with open(path, "w") as fid:
+                fid.write('\xef\xbb\xbfa|"b|c"|"d\ne"||a|a\n1|2|3|4|5|6\n')
+            ideal = pd.read_csv(path, sep="|").columns.tolist()
+            self.assertEqual(read_header(path, sep="|"), ideal)
+            self.assertEqual(colnames(path, delimiter="|"), ideal)
+            self.assertEqual(read_header(path, sep="|", header=None),
+                             range(6))
+            # Headers are read again once the file changes.
+            with open(path, "w") as fid:
+                fid.write("\nx,y\n1,2\n")
+            os.utime(path, (0, 0))
+            self.assertEqual(read_header(path), ["x", "y"])
+            self.assertEqual(read_headers([path, self.filepath], workers=2),
+                             [["x", "y"], colnames(self.filepath)])
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_append_hdf(self):
+        """Test if chunks with growing strings and differing categories are
+        appended to an HDF table."""
+        tempdir = tempfile.mkdtemp()
+        try:
+            path = op.join(tempdir, "data.h5")
+            chunks = [pd.DataFrame({'s': ["a", np.nan],
+                                    'c': pd.Categorical(["x", "y"]),
+                                    'd': pd.Categorical(["u", "u"])},
+                                   index=["i", "j"]),
+                      pd.DataFrame({'s': ["b" * 5],
+                                    'c': pd.Categorical(["y"]),
+                                    'd': pd.Categorical(["v"])},
+                                   index=["k" * 4]),
+                      pd.DataFrame({'s': ["c" * 20],
+                                    'c': pd.Categorical(["z"]),
+                                    'd': pd.Categorical(["w"])},
+                                   index=["l"])]
+            append_hdf(path, "/foo/bar", iter(chunks),
+                       categories={'c': ["x", "y", "z"]})
+            loaded = pd.read_hdf(path, "/foo/bar")
+            self.assertEqual(loaded.index.tolist(), ["i", "j", "kkkk", "l"])
+            self.assertEqual(loaded['s'].tolist()[2:], ["bbbbb", "c" * 20])
+            self.assertEqual(loaded['c'].cat.categories.tolist(),
+                             ["x", "y", "z"])
+            self.assertEqual(loaded['c'].tolist(), ["x", "y", "y", "z"])
+            self.assertEqual(loaded['d'].tolist(), ["u", "u", "v", "w"])
+            with pd.HDFStore(path) as store:
+                self.assertFalse(any(["resized" in key
+                                      for key in store.keys()]))
+        finally:
+            shutil.rmtree(tempdir)
+
     def test_md5(self):
         ideal = "9b3ecf3031979169c0ecc5e03cfe20a6"
         actual = get_md5_checksum(self.filepath)
@@ -26,8 +26,9 @@ from pysemantic.tests.test_base import (BaseTestCase, TEST_DATA_DICT,
                                         _get_iris_args, _dummy_postproc,
                                         _get_person_activity_args)
 from pysemantic.validator import (SeriesValidator, SchemaValidator,
-                                  DataFrameValidator)
+                                  DataFrameValidator, RulePlan)
 from pysemantic.utils import get_md5_checksum
+from pysemantic.checksums import hash_file
 
 try:
     from yaml import CLoader as Loader
@@ -127,7 +128,8 @@ class TestSchemaValidator(BaseTestCase):
         schema = deepcopy(self.basespecs['iris'])
         schema['exclude_columns'] = ['Sepal Length', 'Petal Width']
         validator = SchemaValidator(specification=schema)
-        loaded = pd.read_csv(**validator.get_parser_args())
+        self.assertNotIn("usecols", validator.get_parser_args())
+        loaded = pd.read_csv(**validator.get_load_args())
         self.assertItemsEqual(loaded.columns,
                               ['Petal Length', 'Sepal Width', 'Species'])
 
@@ -247,12 +249,38 @@ class TestSchemaValidator(BaseTestCase):
         schema['path'] = outpath
         try:
             with warnings.catch_warnings(record=True) as catcher:
-                SchemaValidator(specification=schema).get_parser_args()
+                validator = SchemaValidator(specification=schema)
+                validator.get_parser_args()
+                self.assertEqual(len(catcher), 0)
+                validator.get_load_args()
                 assert len(catcher) == 1
                 assert issubclass(catcher[-1].category, UserWarning)
         finally:
             shutil.rmtree(tempdir)
 
+    def test_checksum_algorithm(self):
+        """Check if the checksums of multiple files can be validated with an
+        algorithm declared in the schema."""
+        schema = deepcopy(self.basespecs["iris"])
+        paths = [schema['path'], schema['path']]
+        schema['path'] = paths
+        schema['parallel'] = 2
+        schema['checksum'] = {'algorithm': "crc32",
+                              'value': [hash_file(path, "crc32")
+                                        for path in paths]}
+        validator = SchemaValidator(specification=schema)
+        with warnings.catch_warnings(record=True) as catcher:
+            warnings.simplefilter("always")
+            self.assertTrue(validator.verify_checksum())
+            schema['checksum']['value'][1] = "foo"
+            validator = SchemaValidator(specification=schema)
+            self.assertFalse(validator.verify_checksum())
+            schema['checksum']['value'] = "foo"
+            validator = SchemaValidator(specification=schema)
+            self.assertFalse(validator.verify_checksum())
+        self.assertEqual(len(catcher), 2)
+        self.assertIn("CRC32 checksum", str(catcher[0].message))
+
     def test_pandas_defaults_empty_specs(self):
         """Test if the validator falls back to pandas defaults for empty specs.
         """
@@ -498,7 +526,7 @@ class TestSeriesValidator(BaseTestCase):
                                         rules=self.species_rules)
             cleaned = validator.clean()
             self.assertEqual(cleaned.nunique(), self.species.nunique())
-            self.assertItemsEqual(cleaned.unique().tolist(),
+            self.assertItemsEqual(list(cleaned.unique()),
                                   self.species.unique().tolist())
         finally:
             self.species_rules['drop_na'] = False
@@ -541,7 +569,7 @@ class TestSeriesValidator(BaseTestCase):
                                         rules=self.species_rules)
             cleaned = validator.clean()
             self.assertItemsEqual(cleaned.shape, (50,))
-            self.assertItemsEqual(cleaned.unique().tolist(), ['virginica'])
+            self.assertItemsEqual(list(cleaned.unique()), ['virginica'])
         finally:
             del self.species_rules['regex']
 
@@ -632,9 +660,53 @@ class TestDataFrameValidator(BaseTestCase):
                                         column_rules=col_rules,
                                         rules={'drop_duplicates': False})
         cleaned_species = dframe_val.clean()['Species']
-        self.assertItemsEqual(cleaned_species.unique().tolist(), ['setosa'])
+        self.assertItemsEqual(list(cleaned_species.unique()), ['setosa'])
         self.assertEqual(cleaned_species.shape[0], 50)
 
+    def test_column_rules_drop_rows(self):
+        """Test if rows that violate the rules of any column are dropped
+        together, leaving the columns aligned."""
+        col_rules = {'Sepal Length': {'min': 5.0, 'max': 7.0},
+                     'Species': {'unique_values': ['setosa', 'virginica']},
+                     'Petal Width': {'exclude': [0.2]}}
+        data = self.iris_dframe.copy()
+        validator = DataFrameValidator(data=data, column_rules=col_rules,
+                                       rules={'drop_duplicates': False})
+        cleaned = validator.clean()
+        ideal = data[(data['Sepal Length'] >= 5.0) &
+                     (data['Sepal Length'] <= 7.0) &
+                     (data['Species'] != "versicolor") &
+                     (data['Petal Width'] != 0.2)]
+        ideal['Species'] = ideal['Species'].cat.set_categories(['setosa',
+                                                                'virginica'])
+        self.assertDataFrameEqual(cleaned, ideal)
+        self.assertFalse(pd.isnull(cleaned).any().any())
+
+    def test_postprocessor_after_filters(self):
+        """Test if postprocessors only get the values which pass the checks on
+        the parsed values."""
+        data = pd.DataFrame({'a': [1.0, np.nan, 3.0, 4.0],
+                             'b': ["x", "y", "z", "x"]})
+        col_rules = {'a': {'drop_na': True,
+                           'postprocessors': [lambda x: x.astype(int)],
+                           'min': 2},
+                     'b': {'unique_values': ["x", "y"]}}
+        validator = DataFrameValidator(data=data, column_rules=col_rules,
+                                       rules={'drop_na': False})
+        cleaned = validator.clean()
+        self.assertEqual(cleaned['a'].tolist(), [4])
+        self.assertEqual(validator.rejections['a', 'drop_na'].tolist(), [1])
+        self.assertEqual(validator.rejections['a', 'min'].tolist(), [0])
+        self.assertEqual(validator.rejections['b', 'unique_values'].tolist(),
+                         [2])
+
+    def test_rule_plan_skips_columns(self):
+        """Test if columns without rules are not compiled into checks."""
+        plan = RulePlan({'Species': {'regex': r'\w'}, 'Sepal Width': {}},
+                        self.iris_dframe.columns)
+        self.assertEqual([check[:2] for check in plan.checks],
+                         [('Species', 'regex')])
+
 
 if __name__ == '__main__':
     unittest.main()
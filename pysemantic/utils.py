@@ -10,14 +10,25 @@
 Misecellaneous bells and whistles.
 """
 
+import os
+import os.path as op
+import csv
 import json
+import codecs
+import datetime
+import threading
+
 import pandas as pd
 import numpy as np
-import datetime
+
+from pysemantic.inference import infer_schema
 
 DATA_TYPES = {'String': str, 'Date/Time': datetime.date, 'Float': float,
               'Integer': int}
 
+_headers = {}
+_headers_lock = threading.Lock()
+
 
 class TypeEncoder(json.JSONEncoder):
 
@@ -34,6 +45,97 @@ class TypeEncoder(json.JSONEncoder):
             return json.JSONEncoder.default(self, obj)
 
 
+def get_hdf_format(dataframe):
+    """Get the HDF5 format in which a dataframe can be stored. Categorical
+    columns can only be stored in the table format.
+
+    :param dataframe: The dataframe to be stored.
+    :return: "table" if the dataframe has categorical columns, else "fixed".
+    :rtype: str
+    """
+    for dtype in dataframe.dtypes:
+        if dtype.name == "category":
+            return "table"
+    return "fixed"
+
+
+def _string_widths(dataframe):
+    """Get the length of the longest string in each object column and in the
+    index of a dataframe, keyed as by the ``min_itemsize`` argument of
+    `pandas.HDFStore.append`."""
+    widths = {}
+    columns = [(col, dataframe[col]) for col in dataframe
+               if dataframe[col].dtype == np.dtype('O')]
+    if dataframe.index.dtype == np.dtype('O'):
+        columns.append(("index", pd.Series(dataframe.index)))
+    for key, series in columns:
+        width = series.str.len().max()
+        if not pd.isnull(width):
+            widths[key] = int(width)
+    return widths
+
+
+def append_hdf(outpath, key, chunks, categories=None):
+    """Write a sequence of dataframes to a table in an HDF5 file, replacing
+    the table if it exists.
+
+    Strings are stored in columns of a fixed width, which is set by the first
+    chunk. When a later chunk holds longer strings, the rows written so far
+    are copied to a table with columns at least twice as wide, so that the
+    table is copied only a few times however the strings grow.
+
+    Categorical columns can only be appended to if their categories are those
+    of the table. The categories of the columns found in `categories` are set
+    to the given ones, and other categorical columns are stored as strings.
+
+    :param outpath: Path to the HDF5 file.
+    :param key: Key of the table in the file.
+    :param chunks: Iterable of dataframes with the same columns.
+    :param categories: Dictionary mapping columns to their declared \
+            categories, e.g. the ``unique_values`` of their column rules.
+    :type outpath: str
+    :type key: str
+    :type categories: dict
+    """
+    if categories is None:
+        categories = {}
+    itemsize = {}
+    with pd.HDFStore(outpath) as store:
+        if key in store:
+            store.remove(key)
+        for chunk in chunks:
+            converted = {}
+            for col in chunk:
+                if chunk[col].dtype.name == "category":
+                    if col in categories:
+                        converted[col] = chunk[col].cat.set_categories(
+                            categories[col])
+                    else:
+                        converted[col] = chunk[col].astype(object)
+            if len(converted) > 0:
+                chunk = chunk.copy(deep=False)
+                for col, series in converted.iteritems():
+                    chunk[col] = series
+            grown = {}
+            for col, width in _string_widths(chunk).iteritems():
+                if width > itemsize.get(col, 0):
+                    grown[col] = max(width, 2 * itemsize.get(col, 0))
+            if len(grown) > 0:
+                itemsize.update(grown)
+                if key in store:
+                    _resize_hdf_table(store, key, itemsize)
+            store.append(key, chunk, format="table", min_itemsize=itemsize)
+
+
+def _resize_hdf_table(store, key, itemsize, chunksize=100000):
+    """Copy a table of an HDF5 store to one with wider string columns."""
+    resized = key + "__resized"
+    for chunk in store.select(key, chunksize=chunksize):
+        store.append(resized, chunk, format="table", min_itemsize=itemsize)
+    store.remove(key)
+    store.get_node(resized)._f_rename(key.rstrip("/").split("/")[-1])
+
+
 def generate_questionnaire(filepath):
     """Generate a questionnaire for data at `filepath`.
 
@@ -45,22 +147,15 @@ def generate_questionnaire(filepath):
     :return: A dictionary of questions and their possible answers. The format
     of the dictionary is such that every key is a question to be put to the
     client, and its value is a list of possible answers. The first item in the
-    list is the default value.
+    list is the default value, inferred from a sample of the file.
     :rtype: dict
     """
     qdict = {}
-    if filepath.endswith(".tsv"):
-        dataframe = pd.read_table(filepath)
-    else:
-        dataframe = pd.read_csv(filepath)
-    for col in dataframe.columns:
+    type_names = dict([(v, k) for k, v in DATA_TYPES.iteritems()])
+    dtypes = infer_schema(filepath, rules=False)['dtypes']
+    for col, dtype in dtypes.iteritems():
         qstring = "What is the data type of {}?".format(col)
-        if "float" in str(dataframe[col].dtype).lower():
-            defaultType = "Float"
-        elif "object" in str(dataframe[col].dtype).lower():
-            defaultType = "String"
-        elif "int" in str(dataframe[col].dtype).lower():
-            defaultType = "Integer"
+        defaultType = type_names[dtype]
         typeslist = DATA_TYPES.keys()
         typeslist.remove(defaultType)
         typeslist = [defaultType] + typeslist
@@ -71,8 +166,11 @@ def generate_questionnaire(filepath):
 def colnames(filename, **kwargs):
     """
     Read the column names of a delimited file, without actually reading the
-    whole file. This is simply a wrapper around `pandas.read_csv`, which reads
-    only one row and returns the column names.
+    whole file. Only the `sep` (or `delimiter`), `header` and `quotechar`
+    arguments are understood by `read_header`, which is used if no other
+    argument is passed and the delimiter is a single character. Otherwise,
+    this is simply a wrapper around `pandas.read_csv`, which reads only one
+    row and returns the column names.
 
 
     :param filename: Path to the file to be read
@@ -93,12 +191,115 @@ def colnames(filename, **kwargs):
         UserWarning("The nrows parameter is pointless here. This function only"
                     "reads one row.")
         kwargs.pop('nrows')
+    header_args = dict(kwargs)
+    if 'delimiter' in header_args:
+        header_args['sep'] = header_args.pop('delimiter')
+    sep = header_args.get('sep', ',')
+    if set(header_args).issubset(("sep", "header", "quotechar")) and \
+            isinstance(sep, basestring) and len(sep) == 1:
+        return read_header(filename, **header_args)
     import pandas as pd
     return pd.read_csv(filename, nrows=1, **kwargs).columns.tolist()
 
 
+def read_header(filepath, sep=",", header=0, quotechar='"'):
+    """Read the column names of a delimited file by parsing only the bytes of
+    its header line, honouring the delimiter and quoted names. Blank lines
+    before the header are skipped, unnamed columns are named "Unnamed: i" and
+    duplicate names are numbered, like `pandas.read_csv` does. Headers are
+    cached until the file changes.
+
+    :param filepath: Path to the file to be read
+    :param sep: The delimiter, a single character.
+    :param header: Number of the row containing the column names, or None \
+            if the file has no header.
+    :param quotechar: The character used to quote names.
+    :type filepath: str
+    :type sep: str
+    :type header: int
+    :type quotechar: str
+    :return: The column names.
+    :rtype: list
+    :Example:
+
+    >>> read_header("/path/to/iris.csv")
+    ['Sepal Length', 'Petal Length', 'Sepal Width', 'Petal Width', 'Species']
+    """
+    filepath = op.abspath(filepath)
+    stat = os.stat(filepath)
+    stamp = stat.st_mtime, stat.st_size
+    key = filepath, sep, header, quotechar
+    with _headers_lock:
+        cached = _headers.get(key)
+    if cached is not None and cached[0] == stamp:
+        return list(cached[1])
+    row_number = 0 if header is None else header
+    row = None
+    with open(filepath, "rb") as fid:
+        reader = csv.reader(fid, delimiter=str(sep),
+                            quotechar=str(quotechar))
+        i = 0
+        for fields in reader:
+            if len(fields) == 0:
+                continue
+            if i == row_number:
+                row = fields
+                break
+            i += 1
+    if row is None:
+        raise ValueError("No header row found in {0}.".format(filepath))
+    if header is None:
+        names = range(len(row))
+    else:
+        if row[0].startswith(codecs.BOM_UTF8):
+            row[0] = row[0][len(codecs.BOM_UTF8):]
+        names = _mangle_names(row)
+    with _headers_lock:
+        _headers[key] = stamp, names
+    return list(names)
+
+
+def read_headers(filepaths, workers=1, **kwargs):
+    """Read the column names of several delimited files, reading up to
+    `workers` headers concurrently.
+
+    :param filepaths: List of paths to the files.
+    :param workers: Number of headers read concurrently.
+    :param kwargs: Arguments to be passed to `colnames`.
+    :type filepaths: list
+    :type workers: int
+    :return: List of the column names of each file.
+    :rtype: list
+    """
+    reader = lambda path: colnames(path, **kwargs)
+    if workers <= 1 or len(filepaths) <= 1:
+        return map(reader, filepaths)
+    from multiprocessing.pool import ThreadPool
+    pool = ThreadPool(min(workers, len(filepaths)))
+    try:
+        return pool.map(reader, filepaths, chunksize=1)
+    finally:
+        pool.terminate()
+
+
+def _mangle_names(names):
+    """Name unnamed columns and number duplicate names as pandas does."""
+    counts = {}
+    mangled = []
+    for i, name in enumerate(names):
+        if name == "":
+            name = "Unnamed: {0}".format(i)
+        count = counts.get(name, 0)
+        counts[name] = count + 1
+        if count > 0:
+            name = "{0}.{1}".format(name, count)
+        mangled.append(name)
+    return mangled
+
+
 def get_md5_checksum(filepath):
-    """Get the md5 checksum of a file.
+    """Get the md5 checksum of a file. The file is read in chunks, and its
+    checksum is cached until the file changes (see `pysemantic.checksums`).
 
     :param filepath: Path to the file of which to calculate the md5 checksum.
     :type filepath: Str
@@ -110,7 +311,5 @@ def get_md5_checksum(filepath):
     '9b3ecf3031979169c0ecc5e03cfe20a6'
 
     """
-    import hashlib
-    with open(filepath, "rb") as fid:
-        checksum = hashlib.md5(fid.read()).hexdigest()
-    return checksum
+    from pysemantic.checksums import get_checksum
+    return get_checksum(filepath, "md5")
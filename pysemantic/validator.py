@@ -10,33 +10,193 @@
 
 import copy
 import cPickle
-import json
 import logging
 import datetime
 import warnings
 import os.path as op
+from time import time
 
-import yaml
 import numpy as np
 import pandas as pd
 from traits.api import (HasTraits, File, Property, Str, Dict, List, Type,
                         Bool, Either, push_exception_handler, cached_property,
-                        Array, Instance, Float, Any, Callable)
-
-from pysemantic.utils import TypeEncoder, get_md5_checksum, colnames
+                        Array, Instance, Float, Any, Callable, Int)
+
+from pysemantic.utils import read_headers
+from pysemantic.loggers import log_json, summarize_rows
+from pysemantic.checksums import get_checksums
+from pysemantic.columnar import is_columnar_path
+from pysemantic.arrowio import get_arrow_format, arrow_colnames
+from pysemantic.partitions import find_partitions, is_partitioned_path
+from pysemantic.matching import get_matcher
+from pysemantic.profiling import stage, record_rule
+from pysemantic.rejections import Rejections
+from pysemantic.specfile import read_specfile, write_specfile
 from pysemantic.custom_traits import (DTypesDict, NaturalNumber, AbsFile,
-                                      ValidTraitList)
-
-try:
-    from yaml import CDumper as Dumper
-    from yaml import CLoader as Loader
-except ImportError:
-    from yaml import Dumper, Loader
+                                      ValidTraitList, ColumnarStore,
+                                      PartitionedDirectory)
 
 push_exception_handler(lambda *args: None, reraise_exceptions=True)
 logger = logging.getLogger(__name__)
 
 
+class RulePlan(object):
+
+    """Column rules compiled into vectorized checks on a dataframe.
+
+    Every rule of a column becomes a check which computes a boolean mask of
+    the rows that satisfy it, with a single vectorized operation over the
+    whole column. The masks of all checks are combined into one mask of the
+    rows to keep, which is applied to the dataframe once. Columns without
+    rules are not touched at all.
+
+    Duplicates, NAs and unique values are checked on the parsed values of a
+    column, and the minimum, maximum, regex and excluded values on its values
+    after the postprocessors have been applied.
+
+    The positions of the rows failing each check are kept in `rejected`.
+    """
+
+    def __init__(self, column_rules, columns):
+        """Compile the rules of the given columns.
+
+        :param column_rules: Dictionary mapping column names to their rules.
+        :param columns: Columns of the dataframe on which the rules are to be \
+                enforced.
+        """
+        self.checks = []
+        self.postprocessors = []
+        self.categories = []
+        self.regex_counts = {}
+        self.rejected = []
+        for col in columns:
+            rules = column_rules.get(col)
+            if not rules:
+                continue
+            if rules.get("drop_duplicates", False):
+                self.checks.append((col, "drop_duplicates", False,
+                                    lambda x: ~x.duplicated().values))
+            if rules.get("drop_na", False):
+                self.checks.append((col, "drop_na", False,
+                                    lambda x: x.notnull().values))
+            if "unique_values" in rules:
+                uniques = rules['unique_values']
+                self.checks.append((col, "unique_values", False,
+                                    lambda x, u=uniques: _isin(x, u) |
+                                    x.isnull().values))
+                if all([isinstance(x, basestring) for x in uniques]):
+                    self.categories.append((col, uniques))
+            for postprocessor in rules.get("postprocessors", []):
+                self.postprocessors.append((col, postprocessor))
+            minimum = rules.get("min", -np.inf)
+            if minimum != -np.inf:
+                self.checks.append((col, "min", True,
+                                    lambda x, m=minimum: _compare(x, m,
+                                                                  np.less)))
+            maximum = rules.get("max", np.inf)
+            if maximum != np.inf:
+                self.checks.append((col, "max", True,
+                                    lambda x, m=maximum: _compare(x, m,
+                                                                  np.greater)))
+            if rules.get("regex", ""):
+                matcher = get_matcher(rules['regex'])
+                self.checks.append((col, "regex", True,
+                                    lambda x, m=matcher: _match(x, m)))
+            exclude = rules.get("exclude", [])
+            if len(exclude) > 0:
+                self.checks.append((col, "exclude", True,
+                                    lambda x, e=exclude: ~_isin(x, e)))
+
+    def apply(self, dataframe):
+        """Enforce the compiled rules on a dataframe.
+
+        :param dataframe: The dataframe to clean. The postprocessors modify \
+                its columns in place.
+        :return: The rows of the dataframe that satisfy all the rules.
+        :rtype: pandas.DataFrame
+        """
+        keep = np.ones((dataframe.shape[0],), dtype=bool)
+        positions = np.arange(dataframe.shape[0])
+        self._update_mask(keep, dataframe, positions, postprocessed=False)
+        if len(self.postprocessors) > 0 and not keep.all():
+            # Postprocessors only get the rows which passed the checks on the
+            # parsed values, so that they don't have to handle NAs or
+            # unexpected values.
+            positions = np.flatnonzero(keep)
+            dataframe = dataframe.take(positions, is_copy=False)
+            keep = np.ones((dataframe.shape[0],), dtype=bool)
+        for col, postprocessor in self.postprocessors:
+            logger.info("Applying postprocessor on column {0}:".format(col))
+            log_json(logger, postprocessor)
+            org_len = dataframe.shape[0]
+            start = time()
+            processed = postprocessor(dataframe[col])
+            record_rule(col, "postprocessor", time() - start, org_len,
+                        len(processed))
+            if len(processed) != org_len:
+                msg = ("Size of column changed after applying postprocessor."
+                       "This could disturb the alignment of your data.")
+                logger.warn(msg)
+                warnings.warn(msg, UserWarning)
+            dataframe[col] = processed
+        self._update_mask(keep, dataframe, positions, postprocessed=True)
+        if not keep.all():
+            dataframe = dataframe.take(np.flatnonzero(keep), is_copy=False)
+        # Columns with declared unique values end up as categoricals with
+        # exactly those categories, so that they can be concatenated without
+        # becoming objects.
+        for col, categories in self.categories:
+            series = dataframe[col]
+            if series.dtype.name == "category":
+                dataframe[col] = series.cat.set_categories(categories)
+            elif series.dtype is np.dtype('O'):
+                dataframe[col] = pd.Categorical(series, categories=categories)
+        return dataframe
+
+    def _update_mask(self, keep, dataframe, positions, postprocessed):
+        for col, rule, stage, check in self.checks:
+            if stage != postprocessed:
+                continue
+            start = time()
+            passed = check(dataframe[col])
+            if passed is None:
+                continue
+            failed = ~passed
+            self.rejected.append((col, rule, positions[failed]))
+            n_failed = (keep & failed).sum()
+            keep &= passed
+            n_kept = keep.sum()
+            record_rule(col, rule, time() - start, n_kept + n_failed, n_kept)
+            if rule == "regex":
+                n_matched = passed.sum()
+                self.regex_counts[col] = {'matched': n_matched,
+                                          'rejected': len(passed) - n_matched}
+            logger.info("{0} rows were dropped by the {1} rule of column "
+                        "{2}.".format(n_failed, rule, col))
+
+
+def _compare(series, value, comparison):
+    """Mask of the elements of a series that are not beyond a bound, if the
+    series is numerical."""
+    if series.dtype in (int, float, datetime.date):
+        return ~comparison(series.values, value)
+
+
+def _isin(series, values):
+    """Mask of the elements of a series that are among the given values. A
+    categorical series is checked by its codes."""
+    if series.dtype.name == "category":
+        found = np.append(series.cat.categories.isin(values), False)
+        return found[series.cat.codes.values]
+    return series.isin(values).values
+
+
+def _match(series, matcher):
+    """Mask of the elements of a series of strings that match a regex."""
+    if series.dtype.name == "category" or series.dtype is np.dtype('O'):
+        return matcher.match(series)
+
+
 class DataFrameValidator(HasTraits):
 
     """A validator class for `pandas.DataFrame` objects."""
@@ -62,6 +222,14 @@ class DataFrameValidator(HasTraits):
     # Specifications relating to the selection of rows.
     nrows = Property(Any, depends_on=['rules'])
 
+    # Number of values matched and rejected by the regex rule of each column,
+    # populated by `clean`
+    regex_counts = Dict
+
+    # Rows rejected by each rule, numbered as in the dataframe before it is
+    # cleaned, populated by `clean`
+    rejections = Instance(Rejections)
+
     def _rules_default(self):
         return {}
 
@@ -85,7 +253,7 @@ class DataFrameValidator(HasTraits):
         """Rename columns in dataframe as per the schema."""
         if self.column_names is not None:
             logger.info("Renaming columns as follows:")
-            logger.info(json.dumps(self.column_names, cls=TypeEncoder))
+            log_json(logger, self.column_names)
             if isinstance(self.column_names, dict):
                 for old_name, new_name in self.column_names.iteritems():
                     if old_name in self.data:
@@ -98,48 +266,75 @@ class DataFrameValidator(HasTraits):
 
     def clean(self):
         """Return the converted dataframe after enforcing all rules."""
-        if isinstance(self.nrows, dict):
-            if len(self.nrows) > 0:
-                if self.nrows.get('random', False):
-                    ix = self.data.index.values.copy()
-                    np.random.shuffle(ix)
-                    self.data = self.data.ix[ix]
-                count = self.nrows.get('count', self.data.shape[0])
-                self.data = self.data.ix[self.data.index[:count]]
-        elif callable(self.nrows):
-            ix = self.nrows(self.data.index)
-            self.data = self.data.ix[self.data.index[ix]]
+        index = self.data.index
+        positions = np.arange(self.data.shape[0])
+        if (isinstance(self.nrows, dict) and len(self.nrows) > 0) or \
+                callable(self.nrows):
+            with stage("nrows", self.data.shape[0]) as record:
+                if callable(self.nrows):
+                    ix = self.nrows(self.data.index)
+                    self.data = self.data.ix[self.data.index[ix]]
+                else:
+                    if self.nrows.get('random', False):
+                        ix = self.data.index.values.copy()
+                        np.random.shuffle(ix)
+                        self.data = self.data.ix[ix]
+                    count = self.nrows.get('count', self.data.shape[0])
+                    self.data = self.data.ix[self.data.index[:count]]
+                record['rows_out'] = self.data.shape[0]
+            if index.is_unique:
+                positions = index.get_indexer(self.data.index)
+            else:
+                # The selected rows cannot be traced back to their positions,
+                # so rejections are numbered from the selected rows instead.
+                index = self.data.index
+                positions = np.arange(self.data.shape[0])
+        self.rejections = Rejections(index.shape[0])
 
         if self.is_drop_na:
             x = self.data.shape[0]
-            self.data.dropna(inplace=True)
-            y = self.data.shape[0]
+            with stage("drop_na", x) as record:
+                rejected = self.data.isnull().values.any(axis=1)
+                positions = self._drop_rows(rejected, positions, "drop_na")
+                y = record['rows_out'] = self.data.shape[0]
             logger.info("{0} rows containing NAs were dropped.".format(x - y))
 
         if self.is_drop_duplicates:
             x = self.data.shape[0]
-            self.data.drop_duplicates(inplace=True)
-            y = self.data.shape[0]
+            with stage("drop_duplicates", x) as record:
+                rejected = self.data.duplicated().values
+                positions = self._drop_rows(rejected, positions,
+                                            "drop_duplicates")
+                y = record['rows_out'] = self.data.shape[0]
             logger.info("{0} duplicate rows were dropped.".format(x - y))
 
-        for col in self.data:
-            logger.info("Commence cleaning of column {}".format(col))
-            series = self.data[col]
-            rules = self.column_rules.get(col, {})
-            validator = SeriesValidator(data=series, rules=rules)
-            self.data[col] = validator.clean()
-            if len(validator.exclude_values) > 0:
-                for exval in validator.exclude_values:
-                    self.data.drop(self.data.index[self.data[col] == exval],
-                                   inplace=True)
-                logger.info("Excluding following values from col {0}".format(
-                                                                          col))
-                logger.info(json.dumps(validator.exclude_values))
-            # self.data.dropna(inplace=True)
+        with stage("column_rules", self.data.shape[0]) as record:
+            plan = RulePlan(self.column_rules, self.data.columns)
+            self.data = plan.apply(self.data)
+            record['rows_out'] = self.data.shape[0]
+        for col, rule, rejected in plan.rejected:
+            self.rejections.add(col, rule, positions[rejected])
+        self.regex_counts = plan.regex_counts
         self.rename_columns()
 
         return self.data
 
+    def _drop_rows(self, rejected, positions, rule):
+        """Drop the rows rejected by a dataframe rule, and record them.
+
+        :param rejected: Boolean mask of the rows to drop.
+        :param positions: Positions of the rows of the dataframe before it \
+                was cleaned.
+        :param rule: Name of the rule.
+        :return: Positions of the rows which are kept.
+        """
+        if rejected.any():
+            self.rejections.add(None, rule, positions[rejected])
+            kept = np.flatnonzero(~rejected)
+            self.data = self.data.take(kept, is_copy=False)
+            positions = positions[kept]
+        return positions
+
 
 class SeriesValidator(HasTraits):
 
@@ -179,7 +374,7 @@ class SeriesValidator(HasTraits):
         for postprocessor in self.postprocessors:
             org_len = self.data.shape[0]
             logger.info("Applying postprocessor on column:")
-            logger.info(json.dumps(postprocessor, cls=TypeEncoder))
+            log_json(logger, postprocessor)
             self.data = postprocessor(self.data)
             final_len = self.data.shape[0]
             if org_len != final_len:
@@ -191,18 +386,19 @@ class SeriesValidator(HasTraits):
     def do_drop_duplicates(self):
         """Drop duplicates from the series if required."""
         if self.is_drop_duplicates:
-            duplicates = self.data.index[self.data.duplicated()].tolist()
-            logger.info("Following duplicated rows were dropped:")
-            logger.info(json.dumps(duplicates))
+            if logger.isEnabledFor(logging.INFO):
+                duplicates = self.data.index[self.data.duplicated().values]
+                logger.info("Dropped duplicated rows: {0}".format(
+                                                  summarize_rows(duplicates)))
             self.data.drop_duplicates(inplace=True)
 
     def do_drop_na(self):
         """Drop NAs from the series if required."""
         if self.is_drop_na:
-            na_bool = pd.isnull(self.data)
-            na_rows = self.data.index[na_bool].tolist()
-            logger.info("Following rows containing NAs were dropped:")
-            logger.info(json.dumps(na_rows))
+            if logger.isEnabledFor(logging.INFO):
+                na_rows = self.data.index[pd.isnull(self.data).values]
+                logger.info("Dropped rows containing NAs: {0}".format(
+                                                     summarize_rows(na_rows)))
             self.data.dropna(inplace=True)
 
 #    def apply_converters(self):
@@ -216,7 +412,7 @@ class SeriesValidator(HasTraits):
         """Remove all values not included in the `uniques`."""
         if not np.all(self.data.unique() == self.unique_values):
             logger.info("Keeping only the following unique values:")
-            logger.info(json.dumps(self.unique_values, cls=TypeEncoder))
+            log_json(logger, self.unique_values)
             for value in self.data.unique():
                 if value not in self.unique_values:
                     self.data = self.data[self.data != value]
@@ -225,7 +421,7 @@ class SeriesValidator(HasTraits):
         """Remove all values specified in `exclude_values`."""
         if len(self.exclude_values) > 0:
             logger.info("Removing the following excluded values:")
-            logger.info(json.dumps(self.excluded_values))
+            log_json(logger, self.exclude_values)
             for value in self.exclude_values:
                 self.data.drop(self.data.index[self.data == value],
                                inplace=True)
@@ -247,17 +443,15 @@ class SeriesValidator(HasTraits):
                 # filter by regex
                 logger.info("Applying regex filter with the following regex:")
                 logger.info(self.regex)
-                self.data = self.data[self.data.str.contains(self.regex)]
+                matcher = get_matcher(self.regex)
+                self.data = self.data[matcher.match(self.data)]
 
     def clean(self):
-        """Return the converted dataframe after enforcing all rules."""
-        self.do_drop_duplicates()
-        self.do_drop_na()
-        self.apply_uniques()
-        self.do_postprocessing()
-        self.apply_minmax_rules()
-        self.apply_regex()
-        return self.data
+        """Return the converted series after enforcing all rules."""
+        plan = RulePlan({0: self.rules}, [0])
+        cleaned = plan.apply(self.data.to_frame(0))[0]
+        cleaned.name = self.data.name
+        return cleaned
 
     @cached_property
     def _get_postprocessors(self):
@@ -333,11 +527,28 @@ class SchemaValidator(HasTraits):
     specification = Dict
 
     # Path to the file containing the data
-    filepath = Either(AbsFile, List(AbsFile))
+    filepath = Either(AbsFile, List(AbsFile), ColumnarStore,
+                      PartitionedDirectory)
 
     # Whether the dataset spans multiple files
     is_multifile = Property(Bool, depends_on=['filepath'])
 
+    # Whether the dataset is contained in a columnar store
+    is_columnar = Property(Bool, depends_on=['filepath'])
+
+    # Whether the dataset is a directory partitioned by column values
+    is_partitioned = Property(Bool, depends_on=['filepath'])
+
+    # Values of the partition columns of a partitioned dataset to load
+    partition_filter = Property(Dict, depends_on=['specification'])
+
+    # Files of a partitioned dataset which match the partition filter, along
+    # with the values of their partition columns
+    partitions = Property(List, depends_on=['filepath', 'partition_filter'])
+
+    # Whether the dataset is contained in Parquet or Feather files
+    is_arrow = Property(Bool, depends_on=['filepath'])
+
     # Whether the dataset is contained in a spreadsheet
     is_spreadsheet = Property(Bool, depends_on=['filepath'])
 
@@ -354,10 +565,24 @@ class SchemaValidator(HasTraits):
     # Index column for the dataset
     index_col = Property(Any, depends_on=['specification'])
 
+    # Number of workers used to load the files of a multifile dataset
+    parallel = Property(Int, depends_on=['specification'])
+
+    # Whether to cache the cleaned dataset on disk
+    cache = Property(Bool, depends_on=['specification'])
+
+    # Whether to coerce the declared dtypes after parsing the dataset, instead
+    # of passing them to the parser
+    coerce_dtypes = Property(Bool, depends_on=['specification'])
+
     # A dictionary whose keys are the names of the columns in the dataset, and
     # the keys are the datatypes of the corresponding columns
     dtypes = DTypesDict(key_trait=Str, value_trait=Type)
 
+    # Columns of strings with declared unique values, which are parsed as
+    # categoricals, mapped to their unique values
+    categorical_columns = Property(Dict, depends_on=['specification'])
+
     # Names of the columns in the dataset. This is just a convenience trait,
     # it's value is just a list of the keys of `dtypes`
     colnames = Property(List, depends_on=['specification'])
@@ -365,6 +590,9 @@ class SchemaValidator(HasTraits):
     # md5 checksum of the dataset file
     md5 = Property(Str, depends_on=['filepath'])
 
+    # Checksums of the dataset files, and the algorithm computing them
+    checksum = Property(Dict, depends_on=['specification'])
+
     # List of values that represent NAs
     na_values = Property(Any, depends_on=['specification'])
 
@@ -422,7 +650,9 @@ class SchemaValidator(HasTraits):
     # Public interface
 
     def get_parser_args(self):
-        """Return parser args as required by pandas parsers."""
+        """Return parser args as required by pandas parsers. These are
+        derived from the schema alone, without reading the dataset files,
+        see `get_load_args` for the arguments with which they are read."""
         return self.parser_args
 
     to_dict = get_parser_args
@@ -433,16 +663,13 @@ class SchemaValidator(HasTraits):
         if write_to_file:
             logger.info("Following specs for dataset {0}".format(self.name) +
                         " were written to specfile {0}".format(self.specfile))
-            with open(self.specfile, "r") as f:
-                allspecs = yaml.load(f, Loader=Loader)
+            allspecs = read_specfile(self.specfile)
             allspecs[self.name] = specs
-            with open(self.specfile, "w") as f:
-                yaml.dump(allspecs, f, Dumper=Dumper,
-                          default_flow_style=False)
+            write_specfile(self.specfile, allspecs)
         else:
             logger.info("Following parser args were set for dataset {}".format(
                                                                     self.name))
-        logger.info(json.dumps(specs, cls=TypeEncoder))
+        log_json(logger, specs)
         return True
 
     # Property getters and setters
@@ -455,6 +682,41 @@ class SchemaValidator(HasTraits):
                     return True
         return False
 
+    @cached_property
+    def _get_is_columnar(self):
+        return is_columnar_path(self.filepath)
+
+    @cached_property
+    def _get_is_partitioned(self):
+        if not self.is_pickled:
+            return is_partitioned_path(self.filepath) and \
+                not self.is_columnar
+        return False
+
+    @cached_property
+    def _get_partition_filter(self):
+        return self.specification.get('partition_filter', {})
+
+    @cached_property
+    def _get_partitions(self):
+        if not self.is_partitioned:
+            return []
+        partitions = find_partitions(self.filepath, self.partition_filter)
+        if len(partitions) == 0:
+            msg = "No partitions of the dataset {0} match the filter " + \
+                  "{1}."
+            msg = msg.format(self.name, self.partition_filter)
+            logger.warn(msg)
+            warnings.warn(msg, UserWarning)
+        return partitions
+
+    @cached_property
+    def _get_is_arrow(self):
+        if not self.is_pickled:
+            return all([get_arrow_format(path) is not None
+                        for path in self._get_paths()])
+        return False
+
     @cached_property
     def _get_is_spreadsheet(self):
         if (not self.is_multifile) and (not self.is_pickled):
@@ -465,23 +727,171 @@ class SchemaValidator(HasTraits):
     def _get_index_col(self):
         return self.specification.get('index_col', False)
 
+    @cached_property
+    def _get_parallel(self):
+        return self.specification.get('parallel', 1)
+
+    @cached_property
+    def _get_cache(self):
+        return self.specification.get('cache', False)
+
+    @cached_property
+    def _get_coerce_dtypes(self):
+        return self.specification.get('coerce_dtypes', False)
+
+    @cached_property
+    def _get_categorical_columns(self):
+        dtypes = self.specification.get('dtypes', {})
+        col_rules = self.specification.get('column_rules', {})
+        categoricals = {}
+        for colname, rules in col_rules.iteritems():
+            uniques = rules.get('unique_values', [])
+            if len(uniques) == 0:
+                continue
+            if dtypes.get(colname, str) not in (str, unicode, object):
+                continue
+            if all([isinstance(x, basestring) for x in uniques]):
+                categoricals[colname] = uniques
+        return categoricals
+
     @cached_property
     def _get_sheetname(self):
         if self.is_spreadsheet:
             return self.specification.get('sheetname', self.name)
 
-    @cached_property
-    def _get_parser_args(self):
-        if self.md5:
-            if self.md5 != get_md5_checksum(self.filepath):
+    def get_load_args(self):
+        """Get the parser arguments with which the dataset files are actually
+        read. Unlike `get_parser_args`, which only looks at the schema, this
+        verifies the checksums of the files and reads their headers to find
+        the columns to use when some columns are excluded.
+
+        :return: Parser arguments required to import the dataset in pandas.
+        :rtype: dict or list
+        """
+        self.verify_checksum()
+        args = self.get_parser_args()
+        if len(self.exclude_columns) == 0 or self.is_spreadsheet:
+            return args
+        args = copy.deepcopy(args)
+        arglist = args if isinstance(args, list) else [args]
+        with stage("read_headers", files=len(arglist)):
+            headers = self._read_headers([argset['filepath_or_buffer']
+                                          for argset in arglist],
+                                         self.parallel,
+                                         sep=self._delimiter or ',')
+        for argset, usecols in zip(arglist, headers):
+            for colname in self.exclude_columns:
+                # Partition columns are not found in the files.
+                if colname in usecols:
+                    usecols.remove(colname)
+            argset['usecols'] = usecols
+        return args
+
+    def verify(self, workers=None):
+        """Run the checks of the dataset files which require reading them:
+        compare their checksums with the ones declared in the schema, and
+        check that the columns named in the schema are found in their
+        headers. The files are checked in parallel.
+
+        :param workers: Number of files checked concurrently. If None \
+                (default), the ``parallel`` setting of the dataset is used.
+        :type workers: int
+        :return: Dictionary containing whether the checksums match (None if \
+                no checksum is declared), the columns missing from each file, \
+                and whether the dataset passed all checks.
+        :rtype: dict
+        """
+        if workers is None:
+            workers = self.parallel
+        checksum = None
+        if len(self.checksum) > 0:
+            checksum = self.verify_checksum(workers)
+        missing = {}
+        expected = list(self.colnames) + list(self.exclude_columns)
+        partition_columns = set()
+        for _, values in self.partitions:
+            partition_columns.update(values)
+        expected = [col for col in expected if col not in partition_columns]
+        if len(expected) > 0 and not (self.is_spreadsheet or
+                                      self.is_columnar or self.is_pickled or
+                                      isinstance(self.column_names, list)):
+            paths = self._get_paths()
+            headers = self._read_headers(paths, workers,
+                                         sep=self._delimiter or ',',
+                                         header=self.header)
+            for path, header in zip(paths, headers):
+                notfound = [col for col in expected if col not in header]
+                if len(notfound) > 0:
+                    missing[path] = notfound
+                    msg = "Columns {0} of the dataset {1} were not found in " \
+                          "the file {2}.".format(notfound, self.name, path)
+                    logger.warn(msg)
+                    warnings.warn(msg, UserWarning)
+        return {'checksum': checksum, 'missing_columns': missing,
+                'valid': checksum is not False and len(missing) == 0}
+
+    def _read_headers(self, paths, workers, **kwargs):
+        """Read the column names of the dataset files. Parquet and Feather
+        files store them in their metadata, which is read instead of a
+        header."""
+        if self.is_arrow:
+            return [arrow_colnames(path) for path in paths]
+        return read_headers(paths, workers, **kwargs)
+
+    def _get_paths(self):
+        """Get the list of the dataset files."""
+        if self.is_partitioned:
+            return [path for path, _ in self.partitions]
+        if self.is_multifile:
+            return list(self.filepath)
+        return [self.filepath]
+
+    def verify_checksum(self, workers=None):
+        """Compare the checksums of the dataset files with the ones declared
+        in the schema, warning about the files that don't match. The files of
+        a multifile dataset are hashed in parallel.
+
+        :param workers: Number of files hashed concurrently. If None \
+                (default), the ``parallel`` setting of the dataset is used.
+        :type workers: int
+        :return: True if all the checksums match, or if none are declared.
+        :rtype: bool
+        """
+        if len(self.checksum) == 0:
+            return True
+        if workers is None:
+            workers = self.parallel
+        algorithm = self.checksum['algorithm']
+        expected = self.checksum['value']
+        paths = self._get_paths()
+        if not isinstance(expected, list):
+            expected = [expected]
+        if len(expected) != len(paths):
+            msg = "{0} checksums are specified for the {1} files of the " + \
+                  "dataset {2}."
+            msg = msg.format(len(expected), len(paths), self.name)
+            logger.warn(msg)
+            warnings.warn(msg, UserWarning)
+            return False
+        with stage("verify_checksum", files=len(paths)):
+            actual = get_checksums(paths, algorithm, workers=workers)
+        matched = True
+        for path, declared, checksum in zip(paths, expected, actual):
+            if str(declared).lower() != checksum:
                 msg = \
-                    """The MD5 checksum of the file {} does not match the one
+                    """The {0} checksum of the file {1} does not match the one
                      specified in the schema. This may not be the file you are
                      looking for."""
-                logger.warn(msg.format(self.filepath))
-                warnings.warn(msg.format(self.filepath), UserWarning)
+                msg = msg.format(algorithm.upper(), path)
+                logger.warn(msg)
+                warnings.warn(msg, UserWarning)
+                matched = False
+        return matched
+
+    @cached_property
+    def _get_parser_args(self):
         args = {}
-        if not self.is_spreadsheet:
+        if not (self.is_spreadsheet or self.is_arrow):
             args['error_bad_lines'] = False
         if self._delimiter:
             args['sep'] = self._delimiter
@@ -492,12 +902,8 @@ class SchemaValidator(HasTraits):
         if len(self.colnames) > 0:
             args['usecols'] = self.colnames
 
-        # Columns to exclude
-        if len(self.exclude_columns) > 0:
-            usecols = colnames(self._filepath, sep=args.get('sep', ','))
-            for colname in self.exclude_columns:
-                usecols.remove(colname)
-            args['usecols'] = usecols
+        # Columns to exclude are resolved from the header of the files when
+        # they are read, see `get_load_args`.
 
         # NA values
         if len(self.na_values) > 0:
@@ -522,6 +928,12 @@ class SchemaValidator(HasTraits):
             if len(parse_dates) > 0:
                 args['parse_dates'] = parse_dates
 
+        if len(self.categorical_columns) > 0:
+            dtypes = dict(args.get('dtype', {}))
+            for colname in self.categorical_columns:
+                dtypes[colname] = "category"
+            args['dtype'] = dtypes
+
         if len(self.converters) > 0:
             args['converters'] = self.converters
 
@@ -535,6 +947,28 @@ class SchemaValidator(HasTraits):
             elif isinstance(self.column_names, dict) or callable(self.column_names):
                 self.df_rules['column_names'] = self.column_names
 
+        if self.is_partitioned:
+            arglist = []
+            declared = self.specification.get('dtypes', {})
+            for path, values in self.partitions:
+                argset = copy.deepcopy(args)
+                argset['filepath_or_buffer'] = path
+                # The partition columns are added from the directory names,
+                # unless they are not selected.
+                values = dict([(col, value) for col, value in
+                               values.iteritems() if
+                               (len(self.colnames) == 0 or
+                                col in self.colnames) and
+                               col not in self.exclude_columns])
+                argset['partition_values'] = values
+                argset['partition_dtypes'] = dict(
+                    [(col, declared[col]) for col in values
+                     if col in declared])
+                if 'usecols' in argset:
+                    argset['usecols'] = [col for col in argset['usecols']
+                                         if col not in values]
+                arglist.append(argset)
+            return arglist
         if self.is_multifile:
             arglist = []
             for i in range(len(self._filepath)):
@@ -605,6 +1039,18 @@ class SchemaValidator(HasTraits):
     def _get_md5(self):
         return self.specification.get("md5", "")
 
+    @cached_property
+    def _get_checksum(self):
+        checksum = self.specification.get("checksum")
+        if checksum is None:
+            if self.md5:
+                return {'algorithm': "md5", 'value': self.md5}
+            return {}
+        if not isinstance(checksum, dict):
+            return {'algorithm': "md5", 'value': checksum}
+        return {'algorithm': checksum.get('algorithm', "md5"),
+                'value': checksum['value']}
+
     @cached_property
     def _get_na_values(self):
         na_values = self.specification.get("na_values", False)
@@ -640,10 +1086,7 @@ class SchemaValidator(HasTraits):
 
     def _specfile_changed(self):
         if self.specification == {}:
-            with open(self.specfile, "r") as f:
-                self.specification = yaml.load(f,
-                                               Loader=Loader).get(
-                                                                 self.name, {})
+            self.specification = read_specfile(self.specfile, self.name)
 
     def _filepath_default(self):
         return self.specification.get("path")
@@ -664,9 +1107,7 @@ class SchemaValidator(HasTraits):
 
     def _specification_default(self):
         if op.isfile(self.specfile):
-            with open(self.specfile, 'r') as f:
-                data = yaml.load(f, Loader=Loader).get(self.name, {})
-            return data
+            return read_specfile(self.specfile, self.name)
         return {}
 
     def _dtypes_default(self):